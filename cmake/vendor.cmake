@@ -0,0 +1,95 @@
+# Vendored libraries (SDL2, SDL2_image, SDL2_mixer, SDL2_ttf, zlib, libzip,
+# pe-resource-loader). Shared by the engine build and the prebuilt vendor cache
+# in engine-build-resources/vendor-cache, so both configure them identically.
+#
+# ZT1_ROOT must point at the project root before including this file.
+
+# DISABLE LIBRARY BLOAT & INSTALLS (Fixes NASM and Export errors)
+set(BUILD_SHARED_LIBS OFF CACHE BOOL "Build static libs" FORCE)
+set(LIBZIP_DO_INSTALL OFF CACHE BOOL "No install" FORCE)
+set(SDL2IMAGE_AVIF OFF CACHE BOOL "Disable AVIF" FORCE)
+set(SDL2IMAGE_WEBP OFF CACHE BOOL "Disable WEBP" FORCE)
+set(SDL2IMAGE_JXL OFF CACHE BOOL "Disable JXL" FORCE)
+set(SDL2IMAGE_TIF OFF CACHE BOOL "Disable TIF" FORCE)
+set(SDL2IMAGE_VENDORED OFF CACHE BOOL "Disable downloading extra stuff" FORCE)
+set(SDL2IMAGE_BACKEND_STB ON CACHE BOOL "Use lightweight STB decoder" FORCE)
+
+# ZLIB SETUP
+set(ZLIB_FOUND TRUE CACHE BOOL "ZLIB Found" FORCE)
+set(ZLIB_INCLUDE_DIR "${ZT1_ROOT}/vendor/zlib" "${CMAKE_BINARY_DIR}/vendor/zlib" CACHE PATH "ZLIB Include" FORCE)
+set(ZLIB_LIBRARY zlibstatic CACHE FILEPATH "ZLIB Library" FORCE)
+
+# ADD LIBRARIES
+add_subdirectory(${ZT1_ROOT}/vendor/SDL ${CMAKE_BINARY_DIR}/vendor/SDL)
+add_subdirectory(${ZT1_ROOT}/vendor/SDL_image ${CMAKE_BINARY_DIR}/vendor/SDL_image)
+add_subdirectory(${ZT1_ROOT}/vendor/SDL_mixer ${CMAKE_BINARY_DIR}/vendor/SDL_mixer)
+add_subdirectory(${ZT1_ROOT}/vendor/SDL_ttf ${CMAKE_BINARY_DIR}/vendor/SDL_ttf)
+add_subdirectory(${ZT1_ROOT}/vendor/zlib ${CMAKE_BINARY_DIR}/vendor/zlib)
+add_subdirectory(${ZT1_ROOT}/vendor/libzip ${CMAKE_BINARY_DIR}/vendor/libzip)
+add_subdirectory(${ZT1_ROOT}/vendor/pe-resource-loader ${CMAKE_BINARY_DIR}/vendor/pe-resource-loader)
+
+# Libraries the engine links against. SDL2_image and SDL2_mixer are linked by
+# file name (see the MSVC link_directories in CMakeLists.txt).
+set(ZT1_VENDOR_LIBS
+    SDL2-static
+    SDL2_image-static
+    SDL2_mixer-static
+    SDL2_ttf
+    zip
+    zlibstatic
+    pe_resource_loader_static
+)
+
+# The targets behind ZT1_VENDOR_LIBS, for the vendor cache export
+set(ZT1_VENDOR_TARGETS
+    SDL2-static
+    SDL2_image
+    SDL2_mixer
+    SDL2_ttf
+    zip
+    zlibstatic
+    pe_resource_loader_static
+)
+
+# Collect every target reachable through the link libraries of the given
+# targets. Targets built here (sdl-build-options, zlib, ...) go to out_var,
+# since export() needs the whole set; imported ones the vendored libraries
+# found on the system (Freetype::Freetype, ...) go to out_imported.
+function(zt1_collect_link_targets out_var out_imported)
+    set(pending ${ARGN})
+    set(found "")
+    set(imports "")
+    while(pending)
+        list(POP_FRONT pending name)
+        # $<LINK_ONLY:$<BUILD_INTERFACE:name>> and similar
+        while(name MATCHES "^\\$<(LINK_ONLY|BUILD_INTERFACE):(.*)>$")
+            set(name "${CMAKE_MATCH_2}")
+        endwhile()
+        if(NOT TARGET "${name}" OR "${name}" IN_LIST found OR "${name}" IN_LIST imports)
+            continue()
+        endif()
+        get_target_property(aliased "${name}" ALIASED_TARGET)
+        get_target_property(imported "${name}" IMPORTED)
+        if(aliased)
+            list(APPEND pending "${aliased}")
+            continue()
+        elseif(imported)
+            list(APPEND imports "${name}")
+        else()
+            list(APPEND found "${name}")
+        endif()
+        get_target_property(type "${name}" TYPE)
+        set(deps "")
+        if(NOT imported AND NOT type STREQUAL "INTERFACE_LIBRARY")
+            get_target_property(deps "${name}" LINK_LIBRARIES)
+        endif()
+        get_target_property(interface_deps "${name}" INTERFACE_LINK_LIBRARIES)
+        foreach(dep IN LISTS deps interface_deps)
+            if(dep)
+                list(APPEND pending "${dep}")
+            endif()
+        endforeach()
+    endwhile()
+    set(${out_var} ${found} PARENT_SCOPE)
+    set(${out_imported} ${imports} PARENT_SCOPE)
+endfunction()
@@ -4,6 +4,10 @@
 ║              ZOO TYCOON 1 ENGINE - FULL BUILD                    ║
 ║                   Runs all 5 build steps                         ║
 ╚══════════════════════════════════════════════════════════════════╝
+
+    python build_all.py                  run every step, independent ones in parallel
+    python build_all.py --incremental    skip steps whose inputs are unchanged
+    python build_all.py --serial         run the steps one after another in this process
 """
 
 import os
@@ -12,12 +16,39 @@ import subprocess
 import time
 import traceback
 import io
+import re
+import argparse
+import importlib.util
+from collections import namedtuple
 from contextlib import redirect_stdout, redirect_stderr
 
 # Navigate to project root
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.dirname(SCRIPT_DIR)
 
+LOG_DIR = os.path.join(ROOT_DIR, "build_logs")
+
+sys.path.insert(0, SCRIPT_DIR)
+import build_state
+
+# Steps for the parallel schedule. Step 5 is split: fonts, zoo.ini and the game
+# folders do not need the engine build, the rest does. 5a still waits for
+# Step 4, which imports the installation's .ini files into the same folder, so
+# the zoo.ini left behind is always the one written here.
+# check/record are the build_state step numbers used in incremental mode.
+GraphStep = namedtuple("GraphStep", "id name script func deps check record")
+STEP_GRAPH = [
+    GraphStep("1",  "CLEAN WORKSPACE",     "step1_clean.py",  "main",                [],              1, 1),
+    GraphStep("2",  "PATCH SOURCE CODE",   "step2_patch.py",  "main",                ["1"],           2, 2),
+    GraphStep("3",  "BUILD ENGINE",        "step3_build.py",  "main",                ["2"],           3, 3),
+    GraphStep("4",  "IMPORT ASSETS",       "step4_import.py", "main",                ["1"],           4, 4),
+    GraphStep("5a", "SETUP RUNTIME FILES", "step5_setup.py",  "setup_runtime_files", ["1", "4"],      5, None),
+    GraphStep("5b", "FINALIZE RUNTIME",    "step5_setup.py",  "finalize_runtime",    ["3", "4", "5a"], 5, 5),
+]
+GRAPH_BY_ID = {step.id: step for step in STEP_GRAPH}
+
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
 # Colors
 class C:
     RESET = '\033[0m'
@@ -98,12 +129,23 @@ class BuildError:
             for line in self.traceback_str.split('\n')[-15:]:  # Last 15 lines
                 print(f"    {C.DIM}{line}{C.RESET}")
 
-def run_step(step_num, name, script_name, errors_list):
-    """Run a build step and return success status."""
+def run_step(step_num, name, script_name, errors_list, state=None):
+    """Run a build step and return success status.
+
+    With a state (incremental mode) the step is skipped when its fingerprint
+    matches the last successful run; returns "skipped" in that case.
+    """
     print(f"\n{C.MAGENTA}{'═' * 65}{C.RESET}")
     print(f"  {C.BOLD}STEP {step_num}/5: {name}{C.RESET}")
     print(f"{C.MAGENTA}{'═' * 65}{C.RESET}\n")
     
+    if state is not None:
+        up_to_date, reason = build_state.check_step(state, step_num)
+        if up_to_date:
+            print(f"  {C.GREEN}✓{C.RESET} Up to date {C.DIM}(inputs unchanged since last successful run){C.RESET}")
+            return "skipped"
+        print(f"  {C.DIM}Running: {reason}{C.RESET}\n")
+    
     script_path = os.path.join(SCRIPT_DIR, script_name)
     
     # Check if script exists
@@ -118,7 +160,6 @@ def run_step(step_num, name, script_name, errors_list):
         return False
     
     # Import and run the step's main function
-    import importlib.util
     spec = importlib.util.spec_from_file_location(f"step{step_num}", script_path)
     module = importlib.util.module_from_spec(spec)
     
@@ -139,8 +180,12 @@ def run_step(step_num, name, script_name, errors_list):
             
             error = BuildError(step_num, name, "StepFailed", error_msg)
             errors_list.append(error)
+            if state is not None:
+                build_state.forget_step(state, step_num)
             return False
         
+        # Recorded in full builds too, so the next incremental run can skip
+        build_state.record_step(state if state is not None else build_state.load_state(), step_num)
         return True
         
     except Exception as e:
@@ -155,14 +200,213 @@ def run_step(step_num, name, script_name, errors_list):
         print(f"  {C.RED}✗ Exception: {e}{C.RESET}")
         return False
 
-def main():
-    enable_ansi()
-    os.system('cls' if os.name == 'nt' else 'clear')
-    print(LOGO)
+def load_step_module(script_name):
+    script_path = os.path.join(SCRIPT_DIR, script_name)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(script_name)[0], script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def run_step_child(step_id):
+    """Entry point of the subprocess running one step of the parallel schedule."""
+    step = GRAPH_BY_ID[step_id]
+    result = getattr(load_step_module(step.script), step.func)()
+    return 0 if result in (0, None) else 1
+
+def read_log_tail(path, max_bytes=16384):
+    """Last lines of a step log, without colors or progress-bar carriage returns."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - max_bytes))
+            text = f.read().decode("utf-8", errors="replace")
+    except OSError:
+        return []
+    lines = [ANSI_RE.sub("", part).strip() for part in re.split(r"[\r\n]", text)]
+    return [line for line in lines if line]
+
+class StepRun:
+    """One step of the parallel schedule and its subprocess."""
+    ICONS = {
+        "waiting": f"{C.DIM}·{C.RESET}",
+        "running": f"{C.CYAN}▶{C.RESET}",
+        "done":    f"{C.GREEN}✓{C.RESET}",
+        "skipped": f"{C.GREEN}✓{C.RESET}",
+        "failed":  f"{C.RED}✗{C.RESET}",
+        "aborted": f"{C.YELLOW}■{C.RESET}",
+        "not run": f"{C.DIM}-{C.RESET}",
+    }
     
-    start_time = time.time()
-    errors_list = []
+    def __init__(self, step):
+        self.step = step
+        self.status = "waiting"
+        self.proc = None
+        self.log_file = None
+        self.log_path = os.path.join(LOG_DIR, f"step{step.id}.log")
+        self.start = None
+        self.end = None
+    
+    def launch(self, extra_args, env):
+        self.log_file = open(self.log_path, "w", encoding="utf-8")
+        cmd = [sys.executable, os.path.abspath(__file__), "--run-step", self.step.id] + extra_args
+        self.proc = subprocess.Popen(cmd, cwd=ROOT_DIR, stdout=self.log_file, stderr=subprocess.STDOUT,
+                                     stdin=subprocess.DEVNULL, env=env)
+        self.start = time.time()
+        self.status = "running"
+    
+    def poll(self):
+        """Return the exit code once the process is gone, else None."""
+        code = self.proc.poll()
+        if code is not None:
+            self.end = time.time()
+            self.log_file.close()
+        return code
     
+    def terminate(self):
+        if self.proc and self.proc.poll() is None:
+            self.proc.terminate()
+            self.proc.wait()
+            self.end = time.time()
+            self.log_file.close()
+            self.status = "aborted"
+    
+    def status_line(self):
+        elapsed = ""
+        if self.start:
+            elapsed = f"{(self.end or time.time()) - self.start:6.1f}s"
+        detail = ""
+        if self.status == "running":
+            tail = read_log_tail(self.log_path, 2048)
+            detail = tail[-1][:40] if tail else ""
+        elif self.status == "skipped":
+            detail = "up to date"
+        return f"  {self.ICONS[self.status]} Step {self.step.id:<3} {self.step.name:<20} {self.status:<8} {elapsed:>7}  {C.DIM}{detail}{C.RESET}"
+
+class StatusDisplay:
+    """Redraws one line per step in place (or prints changes when not a terminal)."""
+    def __init__(self, runs):
+        self.runs = runs
+        self.live = sys.stdout.isatty()
+        self.drawn = False
+        self.last = {}
+    
+    def draw(self):
+        if self.live:
+            if self.drawn:
+                sys.stdout.write(f"\033[{len(self.runs)}F")
+            for run in self.runs:
+                sys.stdout.write(run.status_line() + "\033[K\n")
+            self.drawn = True
+        else:
+            for run in self.runs:
+                if self.last.get(run.step.id) != run.status:
+                    self.last[run.step.id] = run.status
+                    if run.status != "waiting":
+                        print(run.status_line())
+        sys.stdout.flush()
+
+def ask_asset_source(state):
+    """Step 4 runs unattended in parallel mode, so ask for the game folder first."""
+    step4 = load_step_module("step4_import.py")
+    if step4.remembered_source():
+        return None  # Step 4 reuses the folder from its import manifest
+    step1_skipped = state is not None and build_state.check_step(state, 1)[0]
+    # Step 1 keeps only fonts and the vendor cache, so it removes imported assets
+    wipes_assets = not step1_skipped and os.path.isdir(step4.BUILD_DIR)
+    if state is not None and step1_skipped and build_state.check_step(state, 4)[0]:
+        return None
+    if step4.check_assets_present() and not wipes_assets:
+        return None
+    return step4.ask_source_folder()
+
+def run_parallel(args, state, errors_list):
+    """Run the step graph, independent steps at the same time.
+
+    After the first failure no new steps start; running ones finish (or are
+    stopped with --abort). Returns (completed_steps, skipped_steps, failed_step).
+    """
+    os.makedirs(LOG_DIR, exist_ok=True)
+    
+    env = os.environ.copy()
+    env["ZT1_BATCH"] = "1"
+    env["PYTHONUNBUFFERED"] = "1"
+    env["PYTHONIOENCODING"] = "utf-8"
+    source_dir = ask_asset_source(state)
+    if source_dir:
+        # Here too, so the Step 4 fingerprint is taken over the chosen folder
+        env["ZT1_ASSET_SOURCE"] = os.environ["ZT1_ASSET_SOURCE"] = source_dir
+    extra_args = [flag for flag, on in (("--no-vendor-cache", args.no_vendor_cache),
+                                        ("--pch", args.pch), ("--unity", args.unity)) if on]
+    
+    runs = [StepRun(step) for step in STEP_GRAPH]
+    by_id = {run.step.id: run for run in runs}
+    display = StatusDisplay(runs)
+    failed = None
+    
+    print(f"\n  {C.BOLD}Running build steps{C.RESET} {C.DIM}(logs: {LOG_DIR}){C.RESET}\n")
+    
+    try:
+        while True:
+            # Start everything whose dependencies are through; a skipped step
+            # can unblock others, so repeat until nothing changes
+            started = True
+            while started and failed is None:
+                started = False
+                for run in runs:
+                    if run.status != "waiting":
+                        continue
+                    if not all(by_id[d].status in ("done", "skipped") for d in run.step.deps):
+                        continue
+                    if state is not None and build_state.check_step(state, run.step.check)[0]:
+                        run.status = "skipped"
+                    else:
+                        run.launch(extra_args, env)
+                    started = True
+            
+            for run in runs:
+                if run.status != "running":
+                    continue
+                code = run.poll()
+                if code is None:
+                    continue
+                if code == 0:
+                    run.status = "done"
+                    if run.step.record:
+                        build_state.record_step(state if state is not None else build_state.load_state(), run.step.record)
+                    continue
+                
+                run.status = "failed"
+                failed = failed or run
+                message = "\n".join(read_log_tail(run.log_path)[-50:]) or f"Step returned exit code {code}"
+                errors_list.append(BuildError(run.step.id, run.step.name, "StepFailed", message))
+                if state is not None and run.step.record:
+                    build_state.forget_step(state, run.step.record)
+                if args.abort:
+                    for other in runs:
+                        other.terminate()
+            
+            display.draw()
+            if not any(run.status == "running" for run in runs):
+                if failed is not None or all(run.status != "waiting" for run in runs):
+                    break
+            time.sleep(0.25)
+    finally:
+        # Ctrl+C or an error in the scheduler: do not leave builds running
+        for run in runs:
+            run.terminate()
+    
+    for run in runs:
+        if run.status == "waiting":
+            run.status = "not run"
+    display.draw()
+    
+    completed = [(run.step.id, run.step.name) for run in runs if run.status in ("done", "skipped")]
+    skipped = [run.step.id for run in runs if run.status == "skipped"]
+    failed_step = (failed.step.id, failed.step.name) if failed else None
+    return completed, skipped, failed_step
+
+def run_serial(state, errors_list):
+    """Run the five steps in order in this process, stopping at the first failure."""
     steps = [
         (1, "CLEAN WORKSPACE", "step1_clean.py"),
         (2, "PATCH SOURCE CODE", "step2_patch.py"),
@@ -172,22 +416,59 @@ def main():
     ]
     
     completed_steps = []
+    skipped_steps = []
     failed_step = None
     
     for step_num, name, script in steps:
-        success = run_step(step_num, name, script, errors_list)
+        success = run_step(step_num, name, script, errors_list, state)
         
-        if success:
+        if success == "skipped":
+            skipped_steps.append(step_num)
+            completed_steps.append((step_num, name))
+        elif success:
             completed_steps.append((step_num, name))
         else:
             failed_step = (step_num, name)
-            # Step 3 (build) is critical - stop if it fails
-            if step_num == 3:
-                break
-            # Other steps can have warnings but continue
-            # Actually, let's stop on any failure for now
             break
     
+    return completed_steps, skipped_steps, failed_step
+
+def main():
+    parser = argparse.ArgumentParser(description="Run all engine build steps")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip steps whose inputs have not changed since their last successful run")
+    parser.add_argument("--no-vendor-cache", action="store_true",
+                        help="build vendor/ together with the engine instead of using the prebuilt cache (step 3)")
+    parser.add_argument("--pch", action="store_true",
+                        help="precompile the common headers of the engine target (step 3)")
+    parser.add_argument("--unity", action="store_true",
+                        help="build the engine target as unity files (step 3)")
+    parser.add_argument("--serial", action="store_true",
+                        help="run the steps one after another in this process, with their normal prompts")
+    parser.add_argument("--abort", action="store_true",
+                        help="stop running steps as soon as one fails instead of letting them finish")
+    parser.add_argument("--run-step", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.run_step:
+        return run_step_child(args.run_step)
+    
+    enable_ansi()
+    os.system('cls' if os.name == 'nt' else 'clear')
+    print(LOGO)
+    
+    state = build_state.load_state() if args.incremental else None
+    if args.incremental:
+        print(f"  {C.CYAN}Incremental mode{C.RESET} {C.DIM}(state: {build_state.STATE_FILE}){C.RESET}")
+    
+    start_time = time.time()
+    errors_list = []
+    
+    if args.serial:
+        completed_steps, skipped_steps, failed_step = run_serial(state, errors_list)
+    else:
+        completed_steps, skipped_steps, failed_step = run_parallel(args, state, errors_list)
+    
     elapsed = time.time() - start_time
     
     # Display results
@@ -198,7 +479,12 @@ def main():
         # Summary of completed steps
         print(f"\n  {C.GREEN}Completed steps:{C.RESET}")
         for num, name in completed_steps:
-            print(f"    {C.GREEN}✓{C.RESET} Step {num}: {name}")
+            note = f" {C.DIM}(up to date){C.RESET}" if num in skipped_steps else ""
+            print(f"    {C.GREEN}✓{C.RESET} Step {num}: {name}{note}")
+        
+        # Step 5 asks itself in serial mode
+        if not args.serial:
+            load_step_module("step5_setup.py").offer_launch()
         
         return 0
     else:
@@ -247,6 +533,8 @@ def main():
         return 1
 
 if __name__ == "__main__":
+    if "--run-step" in sys.argv:
+        sys.exit(main())
     try:
         code = main()
         print()
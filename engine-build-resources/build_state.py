@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Step fingerprints for incremental builds (build_all.py --incremental).
+
+Each build step has a set of inputs. Small trees (src/, patches/,
+CMakeLists.txt, fonts, the step scripts themselves) are hashed by content.
+Large trees (vendor/, game assets, build output) are hashed by path, size and
+mtime so a no-op check stays fast. A step is up to date when its fingerprint
+matches the one recorded after its last successful run and its outputs still
+exist.
+
+The state file lives in the project root, not in build/, so Step 1 cannot
+wipe it.
+"""
+
+import os
+import sys
+import json
+import hashlib
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+BUILD_DIR = os.path.join(ROOT_DIR, "build")
+REL_DIR = os.path.join(BUILD_DIR, "Release")
+PATCHES_DIR = os.path.join(SCRIPT_DIR, "patches")
+STATE_FILE = os.path.join(ROOT_DIR, ".build_state.json")
+MANIFEST_FILE = os.path.join(ROOT_DIR, ".asset_manifest.json")
+
+STATE_VERSION = 1
+SKIP_DIRS = {"__pycache__", ".git"}
+ASSET_EXTENSIONS = ('.ztd', '.dll', '.wav', '.avi')
+SOURCE_EXTENSIONS = ('.ztd', '.dll', '.ini', '.wav', '.avi')  # What Step 4 imports
+STEP3_FLAGS = ('--pch', '--unity', '--no-vendor-cache')
+
+def _script(name):
+    return os.path.join(SCRIPT_DIR, name)
+
+# Inputs per step: (kind, path[, extensions]) where kind is
+#   "content" - hash file bytes (file or whole tree)
+#   "stat"    - hash relative path, size and mtime (file or whole tree)
+#   "patches" - content of the active patch scripts only
+#   "options" - which of STEP3_FLAGS this run was given
+#   "source"  - path of the installation Step 4 imports from, and a stat of
+#               its game files
+# Step 1 only wipes build/ when the vendored libraries change; CMakeLists.txt
+# edits are handled by CMake re-configuring in Step 3.
+# Steps read what earlier steps wrote (Step 3 reads patched src/, Step 5 reads
+# the built exe), so a change upstream invalidates everything that uses it.
+STEP_INPUTS = {
+    1: [
+        ("content", _script("step1_clean.py")),
+        ("stat", os.path.join(ROOT_DIR, "vendor")),
+    ],
+    2: [
+        ("content", _script("step2_patch.py")),
+        ("patches", PATCHES_DIR),
+        ("content", os.path.join(ROOT_DIR, "src")),
+    ],
+    3: [
+        ("content", _script("step3_build.py")),
+        ("content", _script("vendor_cache.py")),
+        ("content", os.path.join(SCRIPT_DIR, "vendor-cache")),
+        ("content", os.path.join(ROOT_DIR, "src")),
+        ("content", os.path.join(ROOT_DIR, "CMakeLists.txt")),
+        ("content", os.path.join(ROOT_DIR, "cmake")),
+        ("stat", os.path.join(ROOT_DIR, "vendor")),
+        ("options", None),
+    ],
+    4: [
+        ("content", _script("step4_import.py")),
+        ("source", None),
+        ("stat", REL_DIR, ('.ztd',)),
+    ],
+    5: [
+        ("content", _script("step5_setup.py")),
+        ("content", os.path.join(ROOT_DIR, "fonts")),
+        ("stat", os.path.join(REL_DIR, "zt1-engine.exe")),
+        ("stat", REL_DIR, ASSET_EXTENSIONS),
+    ],
+}
+
+# Files a step leaves behind; if any is gone the step runs again
+STEP_OUTPUTS = {
+    1: [],
+    2: [],
+    3: [os.path.join(REL_DIR, "zt1-engine.exe")],
+    4: [os.path.join(REL_DIR, "animals.ztd"), os.path.join(REL_DIR, "ui.ztd")],
+    5: [os.path.join(REL_DIR, "zoo.ini"), os.path.join(REL_DIR, "fonts")],
+}
+
+def _walk(path, extensions=None, recursive=True):
+    """Yield (relative path, full path) for files below path, in a stable order."""
+    if os.path.isfile(path):
+        yield os.path.basename(path), path
+        return
+    if not os.path.isdir(path):
+        return
+    for folder, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS) if recursive else []
+        for name in sorted(files):
+            if extensions and not name.lower().endswith(extensions):
+                continue
+            full = os.path.join(folder, name)
+            yield os.path.relpath(full, path).replace('\\', '/'), full
+
+def step3_options():
+    """Step 3 switches, read the way step3_build.py reads them."""
+    flags = {flag for flag in STEP3_FLAGS if flag in sys.argv}
+    if os.environ.get("ZT1_NO_VENDOR_CACHE"):
+        flags.add("--no-vendor-cache")
+    return sorted(flags)
+
+def asset_source():
+    """The folder Step 4 imports from: the one given for this run, else the
+    one its manifest remembers."""
+    source = os.environ.get("ZT1_ASSET_SOURCE")
+    if not source:
+        try:
+            with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+                source = json.load(f).get("source")
+        except (OSError, ValueError):
+            pass
+    return os.path.abspath(source) if source else None
+
+def _hash_source(h):
+    source = asset_source()
+    h.update(f"source:{source}\n".encode('utf-8', 'replace'))
+    if not source or not os.path.isdir(source):
+        return
+    release = os.path.normcase(os.path.abspath(REL_DIR))
+    for folder, dirs, files in os.walk(source):
+        # Step 4 never imports the build output back in, so it is no input
+        dirs[:] = sorted(d for d in dirs if os.path.normcase(os.path.abspath(os.path.join(folder, d))) != release)
+        for name in sorted(files):
+            if name.lower().endswith(SOURCE_EXTENSIONS):
+                full = os.path.join(folder, name)
+                st = os.stat(full)
+                h.update(f"{os.path.relpath(full, source)}\0{st.st_size}:{st.st_mtime_ns}\n".encode('utf-8', 'replace'))
+
+def _hash_input(h, kind, path, extensions=None):
+    if kind == "options":
+        h.update(f"options:{' '.join(step3_options())}\n".encode())
+        return
+    if kind == "source":
+        _hash_source(h)
+        return
+    h.update(f"{kind}:{os.path.relpath(path, ROOT_DIR)}\n".encode())
+    if not os.path.exists(path):
+        h.update(b"<missing>\n")
+        return
+
+    if kind == "patches":
+        entries = _walk(path, ('.py',), recursive=False)
+        entries = ((rel, full) for rel, full in entries if not rel.startswith('_'))
+    else:
+        entries = _walk(path, extensions)
+
+    for rel, full in entries:
+        h.update(rel.encode('utf-8', 'replace') + b"\0")
+        if kind == "stat":
+            st = os.stat(full)
+            h.update(f"{st.st_size}:{st.st_mtime_ns}\n".encode())
+        else:
+            with open(full, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            h.update(b"\n")
+
+def step_fingerprint(step_num):
+    """Hash all inputs of one step."""
+    h = hashlib.blake2b(digest_size=16)
+    for entry in STEP_INPUTS[step_num]:
+        _hash_input(h, *entry)
+    return h.hexdigest()
+
+def outputs_present(step_num):
+    return all(os.path.exists(p) for p in STEP_OUTPUTS[step_num])
+
+def load_state():
+    try:
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") == STATE_VERSION:
+            return state
+    except (OSError, ValueError):
+        pass
+    return {"version": STATE_VERSION, "steps": {}}
+
+def save_state(state):
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_FILE)
+
+def check_step(state, step_num):
+    """Return (up_to_date, reason)."""
+    recorded = state["steps"].get(str(step_num))
+    if not recorded:
+        return False, "no previous successful run"
+    if not outputs_present(step_num):
+        return False, "outputs missing"
+    if recorded != step_fingerprint(step_num):
+        return False, "inputs changed"
+    return True, "up to date"
+
+def record_step(state, step_num):
+    """Store the fingerprint after a successful run.
+
+    Taken after the step so that changes the step makes to its own inputs
+    (Step 2 patches src/ and archives patches) count as part of that run.
+    """
+    state["steps"][str(step_num)] = step_fingerprint(step_num)
+    save_state(state)
+
+def forget_step(state, step_num):
+    if state["steps"].pop(str(step_num), None) is not None:
+        save_state(state)
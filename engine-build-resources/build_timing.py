@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Per translation unit build timing for step3_build.py.
+
+BuildTimer is fed every build output line with a timestamp. Each compile,
+link or target-done line closes the previous one, so a unit's time is the
+time until the build prints its next step. That is exact for serial builds
+and an approximation when several units compile in parallel. A target's time
+is the sum of its units and its link.
+
+Understands Makefile/Ninja output ("[ 42%] Building CXX object
+CMakeFiles/<target>.dir/<source>.obj", "Built target <target>") and MSBuild
+output (bare "<source>.cpp" lines and "<target>.vcxproj -> ...").
+
+The report goes to build_timing.json / build_timing.txt in the project root,
+compared against the report of the previous build. The build options (PCH,
+unity build) are stored with it so a comparison shows what changed.
+"""
+
+import os
+import re
+import json
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+REPORT_JSON = os.path.join(ROOT_DIR, "build_timing.json")
+REPORT_TXT = os.path.join(ROOT_DIR, "build_timing.txt")
+
+TOP_UNITS = 25
+
+_STEP = r"^\s*\[\s*\d+(?:%|/\d+)\]\s+"
+MAKE_COMPILE = re.compile(_STEP + r"Building \S+ object (?:.*?/)?CMakeFiles/([^/]+)\.dir/(.+?)\.(?:o|obj)\s*$")
+MAKE_LINK = re.compile(_STEP + r"Linking ")
+MAKE_BUILT = re.compile(_STEP + r"Built target (\S+)")
+MSBUILD_COMPILE = re.compile(r"^\s+([^\s\\/:]+\.(?:c|cc|cpp|cxx))\s*$", re.IGNORECASE)
+MSBUILD_DONE = re.compile(r"^\s*(\S+)\.vcxproj -> ")
+
+class BuildTimer:
+    def __init__(self):
+        self.phases = {}
+        self.units = []        # [target, source, seconds]
+        self.links = {}        # target -> seconds
+        self._open = None      # (kind, unit index or target, start)
+        self._target = None
+
+    def phase(self, name, seconds):
+        self.phases[name] = round(self.phases.get(name, 0.0) + seconds, 3)
+
+    def _close(self, now):
+        if not self._open:
+            return
+        kind, ref, start = self._open
+        if kind == "unit":
+            self.units[ref][2] = now - start
+        else:
+            self.links[ref] = self.links.get(ref, 0.0) + now - start
+        self._open = None
+
+    def _open_unit(self, target, source, now):
+        self._close(now)
+        self.units.append([target, source, 0.0])
+        self._open = ("unit", len(self.units) - 1, now)
+
+    def feed(self, line, now=None):
+        now = time.time() if now is None else now
+
+        m = MAKE_COMPILE.match(line)
+        if m:
+            self._target = m.group(1)
+            self._open_unit(m.group(1), m.group(2), now)
+            return
+
+        m = MSBUILD_COMPILE.match(line)
+        if m:
+            self._open_unit(None, m.group(1), now)
+            return
+
+        if MAKE_LINK.match(line):
+            self._close(now)
+            self._open = ("link", self._target or "(unknown)", now)
+            return
+
+        m = MAKE_BUILT.match(line)
+        if m:
+            self._close(now)
+            self._target = None
+            return
+
+        m = MSBUILD_DONE.match(line)
+        if m:
+            # MSBuild names the project only when it is done; its link time
+            # is counted in the last unit
+            self._close(now)
+            for unit in self.units:
+                if unit[0] is None:
+                    unit[0] = m.group(1)
+
+    def finish(self, now=None):
+        """Close the last unit when a build command exits."""
+        self._close(time.time() if now is None else now)
+        self._target = None
+
+    def to_dict(self, options=None):
+        units = sorted(
+            ({"target": t or "(unknown)", "source": s, "seconds": round(sec, 3)} for t, s, sec in self.units),
+            key=lambda u: u["seconds"], reverse=True)
+        targets = {}
+        for unit in units:
+            entry = targets.setdefault(unit["target"], {"seconds": 0.0, "units": 0, "link_s": 0.0})
+            entry["seconds"] += unit["seconds"]
+            entry["units"] += 1
+        for name, seconds in self.links.items():
+            entry = targets.setdefault(name, {"seconds": 0.0, "units": 0, "link_s": 0.0})
+            entry["seconds"] += seconds
+            entry["link_s"] += seconds
+        for entry in targets.values():
+            entry["seconds"] = round(entry["seconds"], 3)
+            entry["link_s"] = round(entry["link_s"], 3)
+        return {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "options": dict(options or {}),
+            "phases": self.phases,
+            "total_s": round(sum(self.phases.values()), 3),
+            "units": units,
+            "targets": targets,
+        }
+
+def load_previous():
+    try:
+        with open(REPORT_JSON, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def format_options(options):
+    if not options:
+        return "default"
+    return ", ".join(f"{name} {'on' if value else 'off'}" for name, value in sorted(options.items()))
+
+def _delta(now, before):
+    if before is None:
+        return ""
+    diff = now - before
+    pct = f" ({diff / before * 100:+.0f}%)" if before > 0 else ""
+    return f"{diff:+.1f}s{pct}"
+
+def format_report(report, previous=None):
+    prev_phases = previous.get("phases", {}) if previous else {}
+    prev_targets = previous.get("targets", {}) if previous else {}
+    prev_units = {(u["target"], u["source"]): u["seconds"] for u in previous.get("units", [])} if previous else {}
+
+    lines = ["ZOO TYCOON ENGINE BUILD TIMING", "=" * 50, f"Time: {report['time']}"]
+    lines.append(f"Options: {format_options(report.get('options'))}")
+    if previous:
+        lines.append(f"Compared with: {previous.get('time', '?')} ({format_options(previous.get('options'))})")
+    lines.append("")
+
+    lines.append("PHASES:")
+    for name, seconds in report["phases"].items():
+        lines.append(f"  {name:<20} {seconds:8.1f}s  {_delta(seconds, prev_phases.get(name))}")
+    lines.append(f"  {'total':<20} {report['total_s']:8.1f}s  {_delta(report['total_s'], previous.get('total_s') if previous else None)}")
+    lines.append("")
+
+    lines.append(f"SLOWEST TRANSLATION UNITS (top {TOP_UNITS}):")
+    for unit in report["units"][:TOP_UNITS]:
+        before = prev_units.get((unit["target"], unit["source"]))
+        lines.append(f"  {unit['seconds']:7.2f}s  {unit['target']:<24} {unit['source']}  {_delta(unit['seconds'], before)}")
+    lines.append("")
+
+    lines.append("TARGETS:")
+    for name, entry in sorted(report["targets"].items(), key=lambda kv: kv[1]["seconds"], reverse=True):
+        before = prev_targets.get(name, {}).get("seconds")
+        lines.append(f"  {name:<28} {entry['seconds']:8.1f}s  {entry['units']:4d} units  link {entry['link_s']:6.1f}s  {_delta(entry['seconds'], before)}")
+
+    if previous:
+        changes = []
+        for unit in report["units"]:
+            before = prev_units.get((unit["target"], unit["source"]))
+            if before is not None:
+                changes.append((unit["seconds"] - before, unit))
+        changes.sort(key=lambda c: abs(c[0]), reverse=True)
+        if changes:
+            lines.append("")
+            lines.append("BIGGEST CHANGES PER UNIT:")
+            for diff, unit in changes[:10]:
+                lines.append(f"  {diff:+7.2f}s  {unit['target']:<24} {unit['source']}")
+    return "\n".join(lines) + "\n"
+
+def write_report(timer, options=None):
+    """Write both reports and return (report, previous)."""
+    previous = load_previous()
+    report = timer.to_dict(options)
+    with open(REPORT_JSON, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    with open(REPORT_TXT, "w", encoding="utf-8") as f:
+        f.write(format_report(report, previous))
+    return report, previous
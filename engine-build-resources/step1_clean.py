@@ -46,7 +46,7 @@ def main():
         return 0
     
     print(f"  {C.YELLOW}Cleaning build folder...{C.RESET}")
-    print(f"  {C.YELLOW}(Preserving fonts folder if present){C.RESET}")
+    print(f"  {C.YELLOW}(Preserving fonts folder and vendor library cache if present){C.RESET}")
     print()
     
     # Track preserved items
@@ -57,6 +57,11 @@ def main():
         for item in os.listdir(BUILD_DIR):
             item_path = os.path.join(BUILD_DIR, item)
             
+            if item == "vendor-cache":
+                # Prebuilt vendor libraries (vendor_cache.py), keyed by content
+                preserved.append("vendor-cache")
+                continue
+            
             if item == "Release" and os.path.isdir(item_path):
                 # Inside Release, preserve fonts folder
                 for sub_item in os.listdir(item_path):
@@ -3,6 +3,16 @@
 ╔══════════════════════════════════════════════════════════════════╗
 ║            ZOO TYCOON 1 ENGINE - STEP 3: BUILD ENGINE            ║
 ╚══════════════════════════════════════════════════════════════════╝
+
+Vendored libraries come from the prebuilt cache (vendor_cache.py) unless
+--no-vendor-cache is given or ZT1_NO_VENDOR_CACHE is set.
+
+--pch and --unity turn on the precompiled header (ZT1_PCH) and the unity
+build (ZT1_UNITY_BUILD) for the engine target. Both are passed on every
+configure, so leaving a switch out turns it off again.
+
+Writes build_timing.json / build_timing.txt (build_timing.py) after a
+successful build.
 """
 import os
 import sys
@@ -15,6 +25,13 @@ ROOT_DIR = os.path.dirname(SCRIPT_DIR)
 BUILD_DIR = os.path.join(ROOT_DIR, "build")
 REL_DIR = os.path.join(BUILD_DIR, "Release")
 
+GENERATOR_ARGS = ["-A", "Win32"]
+CONFIG = "Release"
+
+sys.path.insert(0, SCRIPT_DIR)
+import vendor_cache
+import build_timing
+
 class C:
     RESET = '\033[0m'
     GREEN = '\033[92m'
@@ -22,11 +39,12 @@ class C:
     CYAN = '\033[96m'
     RED = '\033[91m'
     BOLD = '\033[1m'
+    DIM = '\033[2m'
 
 def enable_ansi():
     if os.name == 'nt': os.system('')
 
-def run_smart_build(command, cwd, desc):
+def run_smart_build(command, cwd, desc, timer=None):
     print(f"  {C.CYAN}{desc}...{C.RESET}\n")
     
     # Force unbuffered output so we see it live
@@ -53,6 +71,8 @@ def run_smart_build(command, cwd, desc):
         
         if line:
             full_log.append(line)
+            if timer:
+                timer.feed(line)
             clean = line.strip()
             
             # Update Progress Bar
@@ -70,6 +90,8 @@ def run_smart_build(command, cwd, desc):
                  sys.stdout.flush()
 
     print() # New line after done
+    if timer:
+        timer.finish()
     return process.poll(), full_log
 
 def print_error_box(log_lines):
@@ -96,20 +118,55 @@ def print_error_box(log_lines):
     if len(error_lines) > 20:
         print(f"  {C.DIM}... (and {len(error_lines)-20} more lines) ...{C.RESET}")
 
+def print_timing_summary(report, previous):
+    print(f"  {C.CYAN}Slowest units:{C.RESET}")
+    for unit in report["units"][:5]:
+        print(f"    {unit['seconds']:6.1f}s  {unit['source']} {C.DIM}({unit['target']}){C.RESET}")
+    print(f"  Options: {build_timing.format_options(report.get('options'))}")
+    if previous:
+        diff = report["total_s"] - previous.get("total_s", 0.0)
+        color = C.GREEN if diff <= 0 else C.YELLOW
+        before = previous.get("phases", {}).get("build")
+        build_diff = f", build {report['phases']['build'] - before:+.1f}s" if before is not None else ""
+        options = ""
+        if previous.get("options", {}) != report.get("options", {}):
+            options = f" {C.DIM}({build_timing.format_options(previous.get('options'))}){C.RESET}"
+        print(f"  Total {report['total_s']:.1f}s, {color}{diff:+.1f}s{build_diff}{C.RESET} vs. previous build{options}")
+    print(f"  Timing report: {C.DIM}{build_timing.REPORT_TXT}{C.RESET}")
+
 def main():
     enable_ansi()
     print(f"\n{C.CYAN}=== STEP 3: BUILD ENGINE ==={C.RESET}\n")
     os.makedirs(BUILD_DIR, exist_ok=True)
+    timer = build_timing.BuildTimer()
+    options = {"pch": "--pch" in sys.argv, "unity": "--unity" in sys.argv}
+    
+    def timed_build(command, cwd, desc):
+        return run_smart_build(command, cwd, desc, timer)
+    
+    # 0. Prebuilt vendor libraries
+    vendor_dir = None
+    if "--no-vendor-cache" not in sys.argv and not os.environ.get("ZT1_NO_VENDOR_CACHE"):
+        start = time.time()
+        vendor_dir = vendor_cache.prepare(GENERATOR_ARGS, CONFIG, timed_build)
+        timer.phase("vendor cache", time.time() - start)
     
-    # 1. Configure
-    code, log = run_smart_build(["cmake", "-A", "Win32", ".."], BUILD_DIR, "Configuring")
+    # 1. Configure (an empty ZT1_VENDOR_CACHE switches an old cache setting off again)
+    start = time.time()
+    code, log = timed_build(
+        ["cmake", *GENERATOR_ARGS, f"-DZT1_VENDOR_CACHE={vendor_dir or ''}",
+         f"-DZT1_PCH={'ON' if options['pch'] else 'OFF'}",
+         f"-DZT1_UNITY_BUILD={'ON' if options['unity'] else 'OFF'}", ".."],
+        BUILD_DIR, "Configuring")
+    timer.phase("configure", time.time() - start)
     if code != 0:
         print_error_box(log)
         return 1
         
     # 2. Build
     start = time.time()
-    code, log = run_smart_build(["cmake", "--build", ".", "--config", "Release"], BUILD_DIR, "Building")
+    code, log = timed_build(["cmake", "--build", ".", "--config", CONFIG], BUILD_DIR, "Building")
+    timer.phase("build", time.time() - start)
     
     if code != 0:
         print_error_box(log)
@@ -118,6 +175,9 @@ def main():
     print(f"\n{C.GREEN}✓ Build Successful! ({time.time()-start:.1f}s){C.RESET}")
     print(f"  Exe: {os.path.join(REL_DIR, 'zt1-engine.exe')}")
     print()
+    report, previous = build_timing.write_report(timer, options)
+    print_timing_summary(report, previous)
+    print()
     return 0
 
 if __name__ == "__main__":
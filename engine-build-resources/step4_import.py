@@ -3,17 +3,40 @@
 ╔══════════════════════════════════════════════════════════════════╗
 ║           ZOO TYCOON 1 ENGINE - STEP 4: IMPORT ASSETS            ║
 ╚══════════════════════════════════════════════════════════════════╝
+
+Game files are imported as reflinks or hardlinks when the installation is on
+the same drive, and copied otherwise. .ini files are never hardlinked, since
+writing to one would write to the installation's copy, and zoo.ini is not
+imported at all: Step 5 generates it. Files in subfolders (expansions and
+updates) keep their folder; Step 5 lists those in zoo.ini's resource path.
+.asset_manifest.json in the project root records size, mtime and BLAKE2 hash
+of every imported file plus the source folder, so re-imports only hash what
+changed and a wiped Release folder is refilled without asking again.
+--verify re-hashes everything.
 """
 
 import os
 import sys
+import json
 import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
 # Navigate to project root
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.dirname(SCRIPT_DIR)
 BUILD_DIR = os.path.join(ROOT_DIR, "build")
 REL_DIR = os.path.join(BUILD_DIR, "Release")
+MANIFEST_FILE = os.path.join(ROOT_DIR, ".asset_manifest.json")
+
+MANIFEST_VERSION = 1
+EXTENSIONS = ('.ztd', '.dll', '.ini', '.wav', '.avi')
+# Written by Step 5 after the import; the installation's copy would only be replaced
+BUILD_OUTPUTS = ('zoo.ini',)
+HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+# Linux FICLONE ioctl (copy-on-write clone on btrfs/xfs)
+FICLONE = 0x40049409
 
 # Colors
 class C:
@@ -35,56 +58,181 @@ def check_assets_present():
     present = sum(1 for f in required if os.path.exists(os.path.join(REL_DIR, f)))
     return present >= 2  # At least 2 of 3 required files
 
-def import_from_folder(source_dir):
-    """Import game files from source directory."""
-    extensions = ['.ztd', '.dll', '.ini', '.wav', '.avi']
-    files_copied = 0
+def load_manifest():
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "source": None, "files": {}}
+
+def save_manifest(manifest):
+    tmp = MANIFEST_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, MANIFEST_FILE)
+
+def remembered_source():
+    """Source folder of the last import, if it still exists."""
+    source = load_manifest().get("source")
+    return source if source and os.path.isdir(source) else None
+
+def file_hash(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def scan_source(source_dir):
+    """Game files below source_dir (expansions live in subfolders) as (relative path, full path)."""
+    release = os.path.normcase(os.path.abspath(REL_DIR))
+    found = []
+    for folder, dirs, files in os.walk(source_dir):
+        # Never import our own output back in
+        dirs[:] = sorted(d for d in dirs if os.path.normcase(os.path.abspath(os.path.join(folder, d))) != release)
+        for name in sorted(files):
+            if name.lower().endswith(EXTENSIONS):
+                full = os.path.join(folder, name)
+                rel = os.path.relpath(full, source_dir).replace('\\', '/')
+                if rel.lower() not in BUILD_OUTPUTS:
+                    found.append((rel, full))
+    return found
+
+def may_hardlink(rel):
+    """Config files get edited in place, which must not reach the installation."""
+    return not rel.lower().endswith('.ini')
+
+def wrongly_linked(rel, src_path, dst_path):
+    """True for a file hardlinked by an older import that must not be."""
+    try:
+        return not may_hardlink(rel) and os.path.samefile(src_path, dst_path)
+    except OSError:
+        return False
+
+def place_file(src_path, dst_path, hardlink=True):
+    """Reflink, hardlink (if allowed) or copy src to dst. Returns the method used."""
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    if os.path.lexists(dst_path):
+        os.remove(dst_path)
     
-    print(f"  {C.CYAN}Scanning source folder...{C.RESET}")
+    if sys.platform.startswith("linux"):
+        try:
+            import fcntl
+            with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            shutil.copystat(src_path, dst_path)
+            return "reflink"
+        except (OSError, ImportError):
+            if os.path.exists(dst_path):
+                os.remove(dst_path)
     
-    for filename in os.listdir(source_dir):
-        lower_name = filename.lower()
-        
-        if any(lower_name.endswith(ext) for ext in extensions):
-            src_path = os.path.join(source_dir, filename)
-            dst_path = os.path.join(REL_DIR, filename)
-            
-            try:
-                if os.path.isfile(src_path):
-                    # Skip if file already exists and is same size
-                    if os.path.exists(dst_path):
-                        if os.path.getsize(src_path) == os.path.getsize(dst_path):
-                            continue
-                    
-                    print(f"    {C.DIM}Copying: {filename}{C.RESET}")
-                    shutil.copy2(src_path, dst_path)
-                    files_copied += 1
-            except Exception as e:
-                print(f"    {C.RED}Failed: {filename} - {e}{C.RESET}")
-    
-    return files_copied
+    if hardlink:
+        try:
+            os.link(src_path, dst_path)
+            return "hardlink"
+        except OSError:
+            pass
+    
+    shutil.copy2(src_path, dst_path)
+    return "copy"
 
-def main():
-    enable_ansi()
-    print(f"""
-{C.CYAN}{C.BOLD}╔══════════════════════════════════════════════════════════════════╗
-║           ZOO TYCOON 1 ENGINE - STEP 4: IMPORT ASSETS            ║
-╚══════════════════════════════════════════════════════════════════╝{C.RESET}
-""")
+def stat_matches(entry, src_st, dst_path):
+    """True if neither side changed since the manifest entry was written."""
+    if entry["size"] != src_st.st_size or entry["mtime_ns"] != src_st.st_mtime_ns:
+        return False
+    try:
+        dst_st = os.stat(dst_path)
+    except OSError:
+        return False
+    return entry["dst_size"] == dst_st.st_size and entry["dst_mtime_ns"] == dst_st.st_mtime_ns
+
+def import_from_folder(source_dir, verify=False):
+    """Import game files from source directory. Returns the number of files
+    placed and the number that failed."""
+    manifest = load_manifest()
+    if manifest.get("source") != os.path.abspath(source_dir):
+        manifest = {"version": MANIFEST_VERSION, "source": os.path.abspath(source_dir), "files": {}}
+    files = manifest["files"]
     
-    print(f"  Destination: {C.CYAN}{REL_DIR}{C.RESET}")
-    print()
+    # Imports from before BUILD_OUTPUTS existed may have hardlinked them into
+    # the installation; unlink so Step 5 writes a file of its own
+    for rel in [rel for rel in files if rel.lower() in BUILD_OUTPUTS]:
+        entry = files.pop(rel)
+        dst_path = os.path.join(REL_DIR, rel)
+        if entry["method"] == "hardlink" and os.path.lexists(dst_path):
+            os.remove(dst_path)
     
-    # Create Release folder if needed
-    os.makedirs(REL_DIR, exist_ok=True)
+    print(f"  {C.CYAN}Scanning source folder...{C.RESET}")
+    sources = scan_source(source_dir)
     
-    # Check if assets already present
-    if check_assets_present():
-        print(f"  {C.GREEN}✓{C.RESET} Game assets already present")
-        print(f"  {C.DIM}Skipping import (delete .ztd files to re-import){C.RESET}")
-        return 0
+    # 1. Stat check against the manifest; only changed files get hashed
+    pending = []
+    unchanged = 0
+    for rel, src_path in sources:
+        dst_path = os.path.join(REL_DIR, rel)
+        src_st = os.stat(src_path)
+        entry = files.get(rel)
+        if entry and not verify and stat_matches(entry, src_st, dst_path) and not wrongly_linked(rel, src_path, dst_path):
+            unchanged += 1
+            continue
+        pending.append((rel, src_path, dst_path, src_st, entry))
+    
+    # 2. Hash sources (and same-size existing copies) in parallel
+    def hash_pair(item):
+        rel, src_path, dst_path, src_st, entry = item
+        if entry and entry["size"] == src_st.st_size and entry["mtime_ns"] == src_st.st_mtime_ns and not verify:
+            src_hash = entry["hash"]  # only the destination is missing or changed
+        else:
+            src_hash = file_hash(src_path)
+        dst_hash = None
+        if os.path.isfile(dst_path) and os.path.getsize(dst_path) == src_st.st_size and not wrongly_linked(rel, src_path, dst_path):
+            dst_hash = file_hash(dst_path)
+        return src_hash, dst_hash
+    
+    if pending:
+        print(f"  {C.CYAN}Hashing {len(pending)} changed file(s)...{C.RESET}")
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+        hashes = list(pool.map(hash_pair, pending))
     
-    # Ask for source folder
+    # 3. Place what differs, verify copies, record everything
+    placed = 0
+    failed = 0
+    methods = {}
+    for (rel, src_path, dst_path, src_st, entry), (src_hash, dst_hash) in zip(pending, hashes):
+        try:
+            method = entry["method"] if entry else "existing"
+            if dst_hash != src_hash:
+                print(f"    {C.DIM}Importing: {rel}{C.RESET}")
+                method = place_file(src_path, dst_path, may_hardlink(rel))
+                if method == "copy" and file_hash(dst_path) != src_hash:
+                    raise OSError("copy does not match the source hash")
+                placed += 1
+                methods[method] = methods.get(method, 0) + 1
+            dst_st = os.stat(dst_path)
+            files[rel] = {
+                "size": src_st.st_size,
+                "mtime_ns": src_st.st_mtime_ns,
+                "hash": src_hash,
+                "method": method,
+                "dst_size": dst_st.st_size,
+                "dst_mtime_ns": dst_st.st_mtime_ns,
+            }
+        except Exception as e:
+            files.pop(rel, None)
+            failed += 1
+            print(f"    {C.RED}Failed: {rel} - {e}{C.RESET}")
+    
+    save_manifest(manifest)
+    
+    print(f"  {C.DIM}{unchanged} unchanged, {len(pending) - placed - failed} verified in place, "
+          f"{placed} imported ({', '.join(f'{n} {m}' for m, n in sorted(methods.items())) or 'none'}){C.RESET}")
+    return placed, failed
+
+def ask_source_folder():
+    """Ask for the original installation. Returns the path, or None if cancelled."""
     print(f"  {C.YELLOW}Game assets not found. Import required.{C.RESET}")
     print()
     print(f"  Please enter the path to your original Zoo Tycoon installation")
@@ -107,13 +255,44 @@ def main():
         
         root.destroy()
         
-        if not source_dir:
+        return source_dir or None
+            
+    except Exception:
+        # No tkinter or no display: fallback to manual entry
+        return input(f"  {C.CYAN}Path:{C.RESET} ").strip().strip('"')
+
+def main():
+    enable_ansi()
+    print(f"""
+{C.CYAN}{C.BOLD}╔══════════════════════════════════════════════════════════════════╗
+║           ZOO TYCOON 1 ENGINE - STEP 4: IMPORT ASSETS            ║
+╚══════════════════════════════════════════════════════════════════╝{C.RESET}
+""")
+    
+    print(f"  Destination: {C.CYAN}{REL_DIR}{C.RESET}")
+    print()
+    
+    # Create Release folder if needed
+    os.makedirs(REL_DIR, exist_ok=True)
+    
+    verify = "--verify" in sys.argv
+    source_dir = os.environ.get("ZT1_ASSET_SOURCE") or remembered_source()
+    
+    # Legacy imports without a manifest: nothing to compare against
+    if check_assets_present() and not source_dir:
+        print(f"  {C.GREEN}✓{C.RESET} Game assets already present")
+        print(f"  {C.DIM}Skipping import (delete .ztd files to re-import){C.RESET}")
+        return 0
+    
+    # build_all.py asks before starting the steps it runs in parallel
+    if not source_dir:
+        if os.environ.get("ZT1_BATCH"):
+            print(f"  {C.YELLOW}Game assets not found and no source folder given. Skipping import.{C.RESET}")
+            return 0
+        source_dir = ask_source_folder()
+        if source_dir is None:
             print(f"  {C.YELLOW}No folder selected. Skipping import.{C.RESET}")
             return 0
-            
-    except ImportError:
-        # Fallback to manual entry
-        source_dir = input(f"  {C.CYAN}Path:{C.RESET} ").strip().strip('"')
     
     if not source_dir or not os.path.exists(source_dir):
         print(f"  {C.RED}✗ Invalid path{C.RESET}")
@@ -124,13 +303,17 @@ def main():
     print()
     
     # Import files
-    files_copied = import_from_folder(source_dir)
+    files_copied, files_failed = import_from_folder(source_dir, verify)
     
     print()
+    if files_failed > 0:
+        # Not recorded as done, so an incremental build retries the import
+        print(f"  {C.RED}✗ {files_failed} files could not be imported{C.RESET}")
+        return 1
     if files_copied > 0:
         print(f"  {C.GREEN}✓ Imported {files_copied} files{C.RESET}")
     else:
-        print(f"  {C.YELLOW}No new files to import{C.RESET}")
+        print(f"  {C.GREEN}✓ Game assets up to date{C.RESET}")
     
     return 0
 
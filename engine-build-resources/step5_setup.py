@@ -15,6 +15,10 @@ ROOT_DIR = os.path.dirname(SCRIPT_DIR)
 BUILD_DIR = os.path.join(ROOT_DIR, "build")
 REL_DIR = os.path.join(BUILD_DIR, "Release")
 
+# Expansion and update folders of an installation, searched before the base
+# game so their archives win; the first archive holding a name is the one used
+RESOURCE_FOLDER_ORDER = ["dlupdate", "updates", "xpack2", "xpack1", "zupdate1", "zupdate", "dupdate"]
+
 # Colors
 class C:
     RESET = '\033[0m'
@@ -61,10 +65,23 @@ def setup_fonts():
     print(f"  {C.GREEN}✓{C.RESET} Fonts installed")
     return True
 
+def resource_paths():
+    """zoo.ini path= list: every folder below Release holding .ztd files (Step 4
+    keeps the installation's subfolders), known update folders first, the
+    Release folder itself last. The engine does not search paths recursively."""
+    folders = []
+    for folder, dirs, files in os.walk(REL_DIR):
+        dirs.sort()
+        if folder != REL_DIR and any(name.lower().endswith('.ztd') for name in files):
+            folders.append(os.path.relpath(folder, REL_DIR).replace('\\', '/'))
+    order = {name: i for i, name in enumerate(RESOURCE_FOLDER_ORDER)}
+    folders.sort(key=lambda f: (order.get(f.lower(), len(order)), f.lower()))
+    return ";".join([f"./{f}" for f in folders] + ["."])
+
 def setup_zoo_ini():
     """Create the zoo.ini configuration file."""
-    ini_content = """[resource]
-path=.
+    ini_content = f"""[resource]
+path={resource_paths()}
 
 [ui]
 noMenuMusic=0
@@ -98,9 +115,12 @@ colourdepth=32
 msaa=0
 """
     
+    # Replaced rather than rewritten, so a zoo.ini linked to another file
+    # (an older asset import hardlinked the installation's) is left alone
     ini_path = os.path.join(REL_DIR, "zoo.ini")
-    with open(ini_path, "w", encoding="utf-8") as f:
+    with open(ini_path + ".tmp", "w", encoding="utf-8") as f:
         f.write(ini_content)
+    os.replace(ini_path + ".tmp", ini_path)
     
     print(f"  {C.GREEN}✓{C.RESET} zoo.ini created")
     return True
@@ -165,6 +185,33 @@ def verify_build():
     print(f"  {C.GREEN}✓{C.RESET} zt1-engine.exe found")
     return True
 
+def setup_runtime_files():
+    """Fonts, zoo.ini and game folders. Does not need the engine build, so
+    build_all.py runs this next to Step 3, once Step 4 has imported assets."""
+    os.makedirs(REL_DIR, exist_ok=True)
+    
+    all_ok = setup_fonts()
+    setup_zoo_ini()
+    setup_folders()
+    return 0 if all_ok else 1
+
+def finalize_runtime():
+    """Needs the engine build (Step 3) and imported assets (Step 4)."""
+    os.makedirs(REL_DIR, exist_ok=True)
+    
+    all_ok = verify_build()
+    setup_dlls()
+    return 0 if all_ok else 1
+
+def offer_launch():
+    print()
+    response = input(f"  {C.CYAN}Launch game now? [Y/n]:{C.RESET} ").strip().lower()
+    if response in ['', 'y', 'yes']:
+        exe_path = os.path.join(REL_DIR, "zt1-engine.exe")
+        print(f"\n  {C.GREEN}🚀 Launching Zoo Tycoon...{C.RESET}")
+        import subprocess
+        subprocess.Popen([exe_path], cwd=REL_DIR)
+
 def main():
     enable_ansi()
     print(f"""
@@ -176,23 +223,13 @@ def main():
     print(f"  Release Folder: {C.CYAN}{REL_DIR}{C.RESET}")
     print()
     
-    os.makedirs(REL_DIR, exist_ok=True)
-    
     # Run all setup steps
-    all_ok = True
-    
     print(f"  {C.CYAN}Setting up runtime environment...{C.RESET}")
     print()
     
-    if not verify_build():
-        all_ok = False
-    
-    if not setup_fonts():
-        all_ok = False
-    
-    setup_zoo_ini()
-    setup_folders()
-    setup_dlls()
+    build_ok = finalize_runtime() == 0
+    files_ok = setup_runtime_files() == 0
+    all_ok = build_ok and files_ok
     
     # Final summary
     print()
@@ -204,14 +241,9 @@ def main():
         print(f"  You can now run: {C.CYAN}zt1-engine.exe{C.RESET}")
         print(f"  Location: {C.DIM}{REL_DIR}{C.RESET}")
         
-        # Offer to launch
-        print()
-        response = input(f"  {C.CYAN}Launch game now? [Y/n]:{C.RESET} ").strip().lower()
-        if response in ['', 'y', 'yes']:
-            exe_path = os.path.join(REL_DIR, "zt1-engine.exe")
-            print(f"\n  {C.GREEN}🚀 Launching Zoo Tycoon...{C.RESET}")
-            import subprocess
-            subprocess.Popen([exe_path], cwd=REL_DIR)
+        # Offer to launch (not when build_all.py runs the steps unattended)
+        if not os.environ.get("ZT1_BATCH"):
+            offer_launch()
     else:
         print(f"  {C.YELLOW}Setup completed with warnings{C.RESET}")
         print(f"  {C.DIM}Review the messages above{C.RESET}")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Prebuilt cache for the vendored libraries (used by step3_build.py).
+
+SDL2, SDL2_image, SDL2_mixer, SDL2_ttf, zlib, libzip and pe-resource-loader
+are built once by the vendor-only CMake project in vendor-cache/ and kept in
+build/vendor-cache/<key>, where the key covers the vendor/ tree contents, the
+vendor CMake setup, the generator arguments, the build config and the
+compiler. The engine build then imports them with -DZT1_VENDOR_CACHE=<dir>
+and compiles only src/.
+
+Step 1 leaves build/vendor-cache alone, so a clean build reuses it.
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import platform
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+BUILD_DIR = os.path.join(ROOT_DIR, "build")
+VENDOR_DIR = os.path.join(ROOT_DIR, "vendor")
+PROJECT_DIR = os.path.join(SCRIPT_DIR, "vendor-cache")
+CACHE_DIR = os.path.join(BUILD_DIR, "vendor-cache")
+TREE_HASH_FILE = os.path.join(CACHE_DIR, "tree_hash.json")
+COMPLETE_MARKER = ".complete"
+
+# Cache entries kept besides the one in use
+KEEP_OLD = 1
+
+# Files that decide how vendor/ is configured
+SETUP_FILES = [
+    os.path.join(ROOT_DIR, "cmake", "vendor.cmake"),
+    os.path.join(PROJECT_DIR, "CMakeLists.txt"),
+]
+
+class C:
+    RESET = '\033[0m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    CYAN = '\033[96m'
+    RED = '\033[91m'
+    DIM = '\033[2m'
+
+def _tree_stat_hash(path):
+    h = hashlib.blake2b(digest_size=16)
+    for folder, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(folder, name)
+            st = os.stat(full)
+            h.update(f"{os.path.relpath(full, path)}:{st.st_size}:{st.st_mtime_ns}\n".encode('utf-8', 'replace'))
+    return h.hexdigest()
+
+def _tree_content_hash(path):
+    h = hashlib.blake2b(digest_size=16)
+    for folder, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(folder, name)
+            h.update(os.path.relpath(full, path).replace('\\', '/').encode('utf-8', 'replace') + b"\0")
+            with open(full, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+    return h.hexdigest()
+
+def vendor_tree_hash():
+    """Content hash of vendor/, reused while nothing in the tree has been touched."""
+    stat_hash = _tree_stat_hash(VENDOR_DIR)
+    try:
+        with open(TREE_HASH_FILE, "r", encoding="utf-8") as f:
+            memo = json.load(f)
+        if memo.get("stat") == stat_hash:
+            return memo["content"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    content_hash = _tree_content_hash(VENDOR_DIR)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(TREE_HASH_FILE, "w", encoding="utf-8") as f:
+        json.dump({"stat": stat_hash, "content": content_hash}, f)
+    return content_hash
+
+def compiler_identity():
+    """Everything outside vendor/ that changes the produced libraries."""
+    try:
+        cmake_version = subprocess.run(["cmake", "--version"], capture_output=True, text=True).stdout.splitlines()[0]
+    except (OSError, IndexError):
+        cmake_version = "unknown"
+    env = {name: os.environ.get(name, "") for name in
+           ("CC", "CXX", "CFLAGS", "CXXFLAGS", "VCToolsVersion", "VisualStudioVersion", "WindowsSDKVersion")}
+    return {
+        "cmake": cmake_version,
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "env": env,
+    }
+
+def cache_key(generator_args, config):
+    h = hashlib.blake2b(digest_size=8)
+    h.update(vendor_tree_hash().encode())
+    for path in SETUP_FILES:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    h.update(json.dumps({
+        "generator": list(generator_args),
+        "config": config,
+        "compiler": compiler_identity(),
+    }, sort_keys=True).encode())
+    return h.hexdigest()
+
+def _prune(keep):
+    """Remove old cache entries, newest first kept."""
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if os.path.isdir(path) and name != keep:
+            entries.append((os.path.getmtime(path), path))
+    entries.sort(reverse=True)
+    for _, path in entries[KEEP_OLD:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+def prepare(generator_args, config, run):
+    """Return the cache folder for this configuration, building it if needed.
+
+    run is step3's run_smart_build(command, cwd, desc) -> (code, log).
+    Returns None (after printing why) when the cache could not be built; the
+    caller then builds vendor/ in-tree as before.
+    """
+    key = cache_key(generator_args, config)
+    entry = os.path.join(CACHE_DIR, key)
+    marker = os.path.join(entry, COMPLETE_MARKER)
+
+    if os.path.exists(marker):
+        print(f"  {C.GREEN}✓{C.RESET} Vendor libraries: cached {C.DIM}({key}){C.RESET}\n")
+        os.utime(entry)
+        return entry
+
+    print(f"  {C.CYAN}Vendor libraries not cached for this setup - building them once{C.RESET} {C.DIM}({key}){C.RESET}\n")
+    os.makedirs(entry, exist_ok=True)
+
+    code, log = run(["cmake", *generator_args, PROJECT_DIR], entry, "Configuring vendor libraries")
+    if code == 0:
+        code, log = run(["cmake", "--build", ".", "--config", config], entry, "Building vendor libraries")
+    if code != 0:
+        print(f"  {C.YELLOW}⚠ Vendor cache build failed - building vendor/ with the engine instead{C.RESET}")
+        for line in log[-10:]:
+            print(f"    {C.DIM}{line.rstrip()}{C.RESET}")
+        print()
+        shutil.rmtree(entry, ignore_errors=True)
+        return None
+
+    with open(marker, "w", encoding="utf-8") as f:
+        json.dump({"generator": list(generator_args), "config": config, "compiler": compiler_identity()}, f, indent=2)
+    _prune(key)
+    print(f"  {C.GREEN}✓{C.RESET} Vendor libraries cached in {C.DIM}{entry}{C.RESET}\n")
+    return entry
+
+if __name__ == "__main__":
+    # Print the key for the default step 3 setup
+    print(cache_key(["-A", "Win32"], "Release"))
+    sys.exit(0)
@@ -1,13 +1,15 @@
 #include "AniFile.hpp"
 
+#include <algorithm>
 #include <vector>
 #include <cstring>
 
+#include "BinaryFormat.hpp"
 #include "ZtdFile.hpp"
 #include "Utils.hpp"
 
 // PATCHED: NULL safety checks
-Animation * AniFile::getAnimation(PalletManager * pallet_manager, const std::string &ztd_file, const std::string &file_name) {
+AnimationFrames * AniFile::getAnimationFrames(PalletManager * pallet_manager, const std::string &ztd_file, const std::string &file_name) {
   // Safety check - if ztd_file is empty, we can't load anything
   if (ztd_file.empty()) {
     SDL_Log("Warning: Empty ZTD file path for animation: %s", file_name.c_str());
@@ -44,7 +46,9 @@ Animation * AniFile::getAnimation(PalletManager * pallet_manager, const std::str
     return nullptr;
   }
 
-  return new Animation(animations);
+  AnimationFrames * frames = new AnimationFrames(animations);
+  delete animations;
+  return frames;
 }
 
 std::string AniFile::getAnimationDirectory(IniReader * ini_reader) {
@@ -70,99 +74,96 @@ std::string AniFile::getAnimationDirectory(IniReader * ini_reader) {
   return directory;
 }
 
-AnimationData * AniFile::loadAnimationData(PalletManager * pallet_manager, const std::string &ztd_file, const std::string &directory) {
-    // 1. Get File Content from ZTD
-    int raw_size = 0;
-    void * file_data = ZtdFile::getFileContent(ztd_file, directory, &raw_size);
-    
-    if (file_data == NULL) return NULL;
-
-    // 2. Wrap in RWops so we can read it like a file
-    SDL_RWops * rw = SDL_RWFromMem(file_data, raw_size);
-    if (rw == NULL) {
-        free(file_data);
-        return NULL;
-    }
-
-    Sint64 file_size = raw_size;
-    AnimationData * animation_data = new AnimationData;
-    animation_data->frame_count = 0;
-    animation_data->frames = nullptr;
-
-    // --- HEADER PARSING ---
-    // The file starts directly with Height (4 bytes), then String Len (4 bytes)
-    uint32_t total_height = SDL_ReadLE32(rw);
-    uint32_t str_len = SDL_ReadLE32(rw);
-
-    // Skip Palette String
-    SDL_RWseek(rw, str_len, RW_SEEK_CUR);
-
-    uint32_t total_width = SDL_ReadLE32(rw);
-    
-    animation_data->width = (uint16_t)total_width;
-    animation_data->height = (uint16_t)total_height;
-
-    // --- DYNAMIC FRAME LOADING ---
-    std::vector<AnimationFrameData> temp_frames;
-
-    while (SDL_RWtell(rw) < file_size) {
-        AnimationFrameData frame;
-        
-        // 1. FRAME HEADER
-        frame.size = SDL_ReadLE32(rw);
-        
-        // EOF / Garbage check
-        if (frame.size == 0 || frame.size > 10000000) break;
-
-        frame.height = SDL_ReadLE16(rw);
-        frame.width = SDL_ReadLE16(rw);
-        frame.offset_x = SDL_ReadLE16(rw);
-        frame.offset_y = SDL_ReadLE16(rw);
-        frame.mystery_bytes = SDL_ReadLE16(rw);
-        frame.is_shadow = false;
-
-        // 2. PIXEL DATA
-        frame.lines = (AnimationLineData *) calloc(frame.height, sizeof(AnimationLineData));
-        
-        long frame_data_start = SDL_RWtell(rw);
-        long frame_data_end = frame_data_start + frame.size;
-
-        for(int y = 0; y < frame.height; y++) {
-            if (SDL_RWtell(rw) >= frame_data_end) break;
-
-            frame.lines[y].instruction_count = SDL_ReadU8(rw);
-            
-            if (frame.lines[y].instruction_count > 0) {
-                frame.lines[y].instructions = (AnimationDrawInstruction *) calloc(frame.lines[y].instruction_count, sizeof(AnimationDrawInstruction));
-                
-                for(int x = 0; x < frame.lines[y].instruction_count; x++) {
-                    frame.lines[y].instructions[x].offset = SDL_ReadU8(rw);
-                    frame.lines[y].instructions[x].color_count = SDL_ReadU8(rw);
-                    
-                    if (frame.lines[y].instructions[x].color_count > 0) {
-                        frame.lines[y].instructions[x].colors = (uint8_t *) calloc(frame.lines[y].instructions[x].color_count, sizeof(uint8_t));
-                        SDL_RWread(rw, frame.lines[y].instructions[x].colors, sizeof(uint8_t), frame.lines[y].instructions[x].color_count);
-                    }
-                }
-            }
-        }
-
-        temp_frames.push_back(frame);
-        
-        // Align to next frame
-        SDL_RWseek(rw, frame_data_end, RW_SEEK_SET);
+static const size_t FRAME_HEADER_SIZE = 14;
+
+// Walks the frames starting at position and counts them. When the frame
+// table is already allocated it is filled in too. A frame's line_count stops
+// at the first line that runs past the end of the file.
+static uint32_t walkFrames(AnimationData * animation_data, size_t position) {
+  const uint8_t * data = animation_data->source.data();
+  size_t size = animation_data->source.size();
+  uint32_t frame_total = 0;
+
+  while (position + FRAME_HEADER_SIZE <= size) {
+    AnimationFrameData frame;
+    frame.size = readLE32(data + position);
+    // EOF / Garbage check
+    if (frame.size == 0 || frame.size > 10000000) break;
+
+    frame.height = readLE16(data + position + 4);
+    frame.width = readLE16(data + position + 6);
+    frame.offset_x = (int16_t) readLE16(data + position + 8);
+    frame.offset_y = (int16_t) readLE16(data + position + 10);
+    frame.mystery_bytes = readLE16(data + position + 12);
+    frame.is_shadow = false;
+    position += FRAME_HEADER_SIZE;
+    frame.data_offset = (uint32_t) position;
+    frame.line_count = 0;
+
+    // Each line is a count, then per instruction an offset, a color count and the colors
+    while (frame.line_count < frame.height && position < size) {
+      size_t line_end = position + 1;
+      bool complete = true;
+      for (int i = 0; i < data[position] && complete; i++) {
+        complete = line_end + 2 <= size && line_end + 2 + data[line_end + 1] <= size;
+        line_end += complete ? 2 + data[line_end + 1] : 0;
+      }
+      if (!complete) {
+        position = size;
+        break;
+      }
+      position = line_end;
+      frame.line_count++;
     }
 
-    // --- CONVERT VECTOR TO ARRAY ---
-    animation_data->frame_count = (uint32_t)temp_frames.size();
-    if (animation_data->frame_count > 0) {
-        animation_data->frames = (AnimationFrameData *) calloc(animation_data->frame_count, sizeof(AnimationFrameData));
-        for (size_t i = 0; i < temp_frames.size(); i++) {
-            animation_data->frames[i] = temp_frames[i];
-        }
+    if (animation_data->arena) {
+      animation_data->frames[frame_total] = frame;
     }
+    frame_total++;
+  }
+  return frame_total;
+}
 
-    SDL_RWclose(rw);
-    free(file_data); // Free the raw memory
+AnimationData * AniFile::loadAnimationData(PalletManager * pallet_manager, const std::string &ztd_file, const std::string &directory) {
+  MemberData file_data = ZtdFile::getFileData(ztd_file, directory);
+  if (!file_data) return NULL;
+
+  // Header: frame time, palette name (length prefixed), frame count
+  const uint8_t * data = file_data.data();
+  size_t size = file_data.size();
+  if (size < 8 || 8 + (uint64_t) readLE32(data + 4) + 4 > size) {
+    SDL_Log("Animation %s is too short for its header", directory.c_str());
+    return NULL;
+  }
+  uint32_t frame_time_in_ms = readLE32(data);
+  uint32_t pallet_name_length = readLE32(data + 4);
+  std::string pallet_name((const char *) data + 8, pallet_name_length);
+  pallet_name = Utils::string_to_lower(pallet_name.substr(0, pallet_name.find('\0')));
+  std::replace(pallet_name.begin(), pallet_name.end(), '\\', '/');
+  uint32_t frame_count = readLE32(data + 8 + pallet_name_length);
+  size_t frames_start = 12 + pallet_name_length;
+
+  AnimationData * animation_data = new AnimationData;
+  animation_data->frame_time_in_ms = frame_time_in_ms;
+  animation_data->source = std::move(file_data);
+
+  // Count first so the frame table is a single allocation
+  uint32_t frame_total = walkFrames(animation_data, frames_start);
+  if (frame_total == 0) {
     return animation_data;
+  }
+  animation_data->arena = std::make_unique<AnimationFrameData[]>(frame_total);
+  animation_data->frames = animation_data->arena.get();
+  walkFrames(animation_data, frames_start);
+
+  // One frame past the stated count is the background
+  if (frame_total == frame_count + 1) {
+    animation_data->frame_count = frame_count;
+    animation_data->has_background = 1;
+  } else {
+    animation_data->frame_count = frame_total;
+  }
+
+  animation_data->pallet = pallet_manager->getPallet(pallet_name);
+  return animation_data;
 }
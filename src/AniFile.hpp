@@ -16,7 +16,7 @@
 
 class AniFile {
 public:
-    static Animation * getAnimation(PalletManager * pallet_manager, const std::string &ztd_file, const std::string &file_name);
+    static AnimationFrames * getAnimationFrames(PalletManager * pallet_manager, const std::string &ztd_file, const std::string &file_name);
 private:
     static std::string getAnimationDirectory(IniReader * ini_reader);
     static AnimationData * loadAnimationData(PalletManager * pallet_manager, const std::string &ztd_file, const std::string &directory);
@@ -1,346 +1,158 @@
 #include "Animation.hpp"
 
 #include <assert.h>
-
-Animation::Animation(std::unordered_map<std::string, AnimationData *> * data) {
+#include <algorithm>
+#include <climits>
+
+// Frame sets to use for each direction, best first, and whether they have to
+// be mirrored to face that way. Indexed by CompassDirection.
+struct DirectionFallback {
+  const char * name;
+  SDL_RendererFlip flip;
+};
+static const DirectionFallback DIRECTION_FALLBACKS[10][9] = {
+  /* NE */ {{"NE", SDL_FLIP_NONE}, {"NW", SDL_FLIP_HORIZONTAL}, {"N", SDL_FLIP_NONE}},
+  /* SE */ {{"SE", SDL_FLIP_NONE}, {"SW", SDL_FLIP_HORIZONTAL}, {"E", SDL_FLIP_NONE}, {"W", SDL_FLIP_HORIZONTAL}, {"S", SDL_FLIP_NONE}, {"N", SDL_FLIP_NONE}},
+  /* SW */ {{"SW", SDL_FLIP_NONE}, {"SE", SDL_FLIP_HORIZONTAL}, {"S", SDL_FLIP_NONE}, {"W", SDL_FLIP_NONE}, {"E", SDL_FLIP_HORIZONTAL}, {"NW", SDL_FLIP_NONE}, {"NE", SDL_FLIP_HORIZONTAL}, {"N", SDL_FLIP_NONE}},
+  /* NW */ {{"NW", SDL_FLIP_NONE}, {"NE", SDL_FLIP_HORIZONTAL}, {"N", SDL_FLIP_NONE}},
+  /* N  */ {{"N", SDL_FLIP_NONE}, {"NE", SDL_FLIP_NONE}, {"NW", SDL_FLIP_NONE}},
+  /* E  */ {{"E", SDL_FLIP_NONE}, {"W", SDL_FLIP_HORIZONTAL}, {"NE", SDL_FLIP_NONE}, {"SE", SDL_FLIP_NONE}, {"NW", SDL_FLIP_HORIZONTAL}, {"SW", SDL_FLIP_HORIZONTAL}, {"N", SDL_FLIP_NONE}},
+  /* S  */ {{"S", SDL_FLIP_NONE}, {"SE", SDL_FLIP_NONE}, {"SW", SDL_FLIP_NONE}, {"N", SDL_FLIP_NONE}, {"NE", SDL_FLIP_NONE}, {"NW", SDL_FLIP_NONE}, {"E", SDL_FLIP_NONE}, {"W", SDL_FLIP_NONE}},
+  /* W  */ {{"W", SDL_FLIP_NONE}, {"E", SDL_FLIP_HORIZONTAL}, {"NW", SDL_FLIP_NONE}, {"SW", SDL_FLIP_NONE}, {"NE", SDL_FLIP_HORIZONTAL}, {"SE", SDL_FLIP_HORIZONTAL}, {"N", SDL_FLIP_NONE}},
+  /* H  */ {{"H", SDL_FLIP_NONE}, {"N", SDL_FLIP_NONE}},
+  /* G  */ {{"G", SDL_FLIP_NONE}, {"N", SDL_FLIP_NONE}},
+};
+
+AnimationFrames::AnimationFrames(std::unordered_map<std::string, AnimationData *> * data) {
+  std::unordered_map<std::string, int> set_by_name;
   for(auto map_entry : *data) {
-    this->loadSurfaces(map_entry.first, map_entry.second);
+    FrameSet set;
+    if (this->loadSurfaces(set, map_entry.second)) {
+      set_by_name[map_entry.first] = (int) this->sets.size();
+      this->sets.push_back(std::move(set));
+    }
+    delete map_entry.second;
+  }
+
+  static_assert(sizeof(DIRECTION_FALLBACKS) / sizeof(DIRECTION_FALLBACKS[0]) == DIRECTION_COUNT);
+  for (int direction = 0; direction < DIRECTION_COUNT; direction++) {
+    for (const DirectionFallback &fallback : DIRECTION_FALLBACKS[direction]) {
+      if (fallback.name == nullptr) {
+        break;
+      }
+      auto found = set_by_name.find(fallback.name);
+      if (found != set_by_name.end()) {
+        this->directions[direction] = {found->second, fallback.flip};
+        break;
+      }
+    }
   }
 }
 
-Animation::~Animation() {
-  for (auto surface_list : this->surfaces) {
-    for (SDL_Surface * surface : surface_list.second) {
+AnimationFrames::~AnimationFrames() {
+  for (FrameSet &set : this->sets) {
+    for (SDL_Surface * surface : set.surfaces) {
       SDL_FreeSurface(surface);
     }
-    surface_list.second.clear();
-  }
-  for (auto texture_list : this->textures) {
-    for (SDL_Texture * texture : texture_list.second) {
-      SDL_DestroyTexture(texture);
+    for (const TextureRegion &texture : set.textures) {
+      this->atlas->release(texture);
     }
-    texture_list.second.clear();
   }
 }
 
+Animation::Animation(std::shared_ptr<AnimationFrames> frames, TextureAtlas * atlas, RenderBatch * batch)
+  : frames(std::move(frames)), atlas(atlas), batch(batch) {
+}
+
 void Animation::draw(SDL_Renderer *renderer,  int x, int y, CompassDirection direction) {
-  std::string direction_string = convertCompassDirectionToExistingAnimationString(direction, this->textures);
   SDL_Rect rect = {x, y, 0, 0};
-  if (!this->textures[direction_string].empty()) {
-    SDL_QueryTexture(this->textures[direction_string][this->current_frame], NULL, NULL, &rect.w, &rect.h);
-  } else {
-    direction_string = convertCompassDirectionToExistingAnimationString(direction, this->surfaces);
-    rect.w = this->surfaces[direction_string][this->current_frame]->w;
-    rect.h = this->surfaces[direction_string][this->current_frame]->h;
-  }
-  assert(rect.h > 0);
-  assert(rect.w > 0);
+  this->queryTexture(direction, &rect.w, &rect.h);
   this->draw(renderer, &rect, direction);
 }
 
 void Animation::draw(SDL_Renderer *renderer,  SDL_Rect * dest_rect, CompassDirection direction) {
-  std::string direction_string = convertCompassDirectionToExistingAnimationString(direction, this->textures);
-  if (direction_string.empty()) {
-    direction_string = convertCompassDirectionToExistingAnimationString(direction, this->surfaces);
-    this->textures[direction_string] = std::vector<SDL_Texture *>();
-    if (!direction_string.empty()) {
-      for (SDL_Surface * surface: this->surfaces[direction_string]) {
-        this->textures[direction_string].push_back(
-          SDL_CreateTextureFromSurface(renderer, surface)
-        );
-        SDL_FreeSurface(surface);
-      }
-      this->surfaces[direction_string].clear();
-    } else {
-      SDL_Log("Cannot draw animation because the specified direction does not exist");
-      return;
+  const AnimationFrames::DirectionSlot &slot = this->frames->directions[(int) direction];
+  if (slot.set < 0) {
+    SDL_Log("Cannot draw animation because the specified direction does not exist");
+    return;
+  }
+  AnimationFrames::FrameSet &set = this->frames->sets[slot.set];
+  if (set.textures.empty()) {
+    this->frames->atlas = this->atlas;
+    set.textures.reserve(set.surfaces.size());
+    for (SDL_Surface * surface : set.surfaces) {
+      set.textures.push_back(this->atlas->add(renderer, surface));
+      SDL_FreeSurface(surface);
     }
+    set.surfaces.clear();
   }
-  assert(!this->textures[direction_string].empty());
+  assert(!set.textures.empty());
 
   if (direction != this->last_direction) {
     this->last_direction = direction;
     this->current_frame = 0;
     this->frame_start_time = SDL_GetTicks();
   } else {
-    if (this->frame_time_in_ms < SDL_GetTicks() - this->frame_start_time) {
+    if (this->frames->frame_time_in_ms < SDL_GetTicks() - this->frame_start_time) {
       this->current_frame++;
       this->frame_start_time = SDL_GetTicks();
     }
   }
 
-  if (this->current_frame >= this->textures[direction_string].size()) {
+  if (this->current_frame >= set.textures.size()) {
     this->current_frame = 0;
   }
 
   #ifdef DEBUG
+    this->batch->flush();
     SDL_SetRenderDrawColor(renderer, 255, 0, 0, 100);
     SDL_RenderFillRect(renderer, dest_rect);
   #endif
 
   if (dest_rect->w == 0 || dest_rect->h == 0) {
-    SDL_QueryTexture(this->textures[direction_string][this->current_frame], NULL, NULL, &dest_rect->w, &dest_rect->h);
+    dest_rect->w = set.textures[this->current_frame].rect.w;
+    dest_rect->h = set.textures[this->current_frame].rect.h;
   }
 
   // Draw background
-  if (this->has_background) {
-    SDL_RenderCopyEx(renderer, this->textures[direction_string][this->textures[direction_string].size() - 1], NULL, dest_rect, 0, NULL, this->renderer_flip);
-    if (this->current_frame >= this->textures[direction_string].size() - 1) {
+  if (this->frames->has_background) {
+    this->batch->copy(renderer, set.textures[set.textures.size() - 1], dest_rect, slot.flip);
+    if (this->current_frame >= set.textures.size() - 1) {
       this->current_frame = 0;
     }
   }
 
   // Draw object
-  SDL_RenderCopyEx(renderer, this->textures[direction_string][this->current_frame], NULL, dest_rect, 0, NULL, this->renderer_flip);
+  this->batch->copy(renderer, set.textures[this->current_frame], dest_rect, slot.flip);
 }
 
 void Animation::queryTexture(CompassDirection direction, int * w, int * h) {
-  std::string direction_string = convertCompassDirectionToExistingAnimationString(direction, this->textures);
-  if (!this->textures[direction_string].empty()) {
-    SDL_QueryTexture(this->textures[direction_string][this->current_frame], NULL, NULL, w, h);
-  } else {
-    direction_string = convertCompassDirectionToExistingAnimationString(direction, this->surfaces);
-    if (w != nullptr) {
-      *w = this->surfaces[direction_string][this->current_frame]->w;
-    }
-    if (h != nullptr) {
-      *h = this->surfaces[direction_string][this->current_frame]->h;
+  const AnimationFrames::DirectionSlot &slot = this->frames->directions[(int) direction];
+  int width = 0;
+  int height = 0;
+  if (slot.set >= 0) {
+    const AnimationFrames::FrameSet &set = this->frames->sets[slot.set];
+    // Another direction may have more frames than this one
+    if (!set.textures.empty()) {
+      const TextureRegion &texture = set.textures[this->current_frame < set.textures.size() ? this->current_frame : 0];
+      width = texture.rect.w;
+      height = texture.rect.h;
+    } else if (!set.surfaces.empty()) {
+      const SDL_Surface * surface = set.surfaces[this->current_frame < set.surfaces.size() ? this->current_frame : 0];
+      width = surface->w;
+      height = surface->h;
     }
   }
-}
-
-std::string Animation::convertCompassDirectionToString(CompassDirection direction) {
-  std::string direction_string = "";
-  
-  switch (direction) {
-    case CompassDirection::N:
-      direction_string = "N";
-      break;
-    case CompassDirection::NE:
-        direction_string = "NE";
-      break;
-    case CompassDirection::NW:
-      direction_string = "NW";
-      break;
-    case CompassDirection::S:
-      direction_string = "S";
-      break;
-    case CompassDirection::SE:
-        direction_string = "SE";
-      break;
-    case CompassDirection::SW:
-        direction_string = "SW";
-      break;
-    case CompassDirection::E:
-        direction_string = "E";
-      break;
-    case CompassDirection::W:
-        direction_string = "W";
-        break;
-    case CompassDirection::G:
-      direction_string = "G";
-      break;
-    case CompassDirection::H:
-      direction_string = "H";
-      break;
-    default:
-      SDL_Log("Direction used has no string equivalent direction used!");
-      break;
+  if (w != nullptr) {
+    *w = width;
   }
-
-  return direction_string;
-}
-
-template <typename T>
-std::string Animation::convertCompassDirectionToExistingAnimationString(CompassDirection direction, std::unordered_map<std::string, T> &animation_map) {
-  std::string direction_string = "";
-  
-  switch (direction) {
-    case CompassDirection::N:
-      if (animation_map.contains("N")) {
-        direction_string = "N";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("NE")) {
-        direction_string = "NE";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("NW")) {
-        direction_string = "NW";
-        this->renderer_flip = SDL_FLIP_NONE;
-      }
-      break;
-    case CompassDirection::NE:
-      if (animation_map.contains("NE")) {
-        direction_string = "NE";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("NW")) {
-        direction_string = "NW";
-        this->renderer_flip = SDL_FLIP_HORIZONTAL;
-      } else if (animation_map.contains("N")) {
-        direction_string = "N";
-        this->renderer_flip = SDL_FLIP_NONE;
-      }
-      break;
-    case CompassDirection::NW:
-      if (animation_map.contains("NW")) {
-        direction_string = "NW";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("NE")) {
-        direction_string = "NE";
-        this->renderer_flip = SDL_FLIP_HORIZONTAL;
-      } else if (animation_map.contains("N")) {
-        direction_string = "N";
-        this->renderer_flip = SDL_FLIP_NONE;
-      }
-      break;
-    case CompassDirection::S:
-      if (animation_map.contains("S")) {
-        direction_string = "S";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("SE")) {
-        direction_string = "SE";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("SW")) {
-        direction_string = "SW";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("N")) {
-        direction_string = "N";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("NE")) {
-        direction_string = "NE";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("NW")) {
-        direction_string = "NE";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("E")) {
-        direction_string = "E";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("W")) {
-        direction_string = "W";
-        this->renderer_flip = SDL_FLIP_NONE;
-      }
-      break;
-    case CompassDirection::SE:
-      if (animation_map.contains("SE")) {
-        direction_string = "SE";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("SW")) {
-        direction_string = "SW";
-        this->renderer_flip = SDL_FLIP_HORIZONTAL;
-      } else if (animation_map.contains("E")) {
-        direction_string = "E";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("W")) {
-        direction_string = "W";
-        this->renderer_flip = SDL_FLIP_HORIZONTAL;
-      } else if (animation_map.contains("S")) {
-        direction_string = "S";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("N")) {
-        direction_string = "N";
-        this->renderer_flip = SDL_FLIP_NONE;
-      }
-      break;
-    case CompassDirection::SW:
-      if (animation_map.contains("SW")) {
-        direction_string = "SW";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("SE")) {
-        direction_string = "SE";
-        this->renderer_flip = SDL_FLIP_HORIZONTAL;
-      } else if (animation_map.contains("S")) {
-        direction_string = "S";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("W")) {
-        direction_string = "W";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("E")) {
-        direction_string = "E";
-        this->renderer_flip = SDL_FLIP_HORIZONTAL;
-      } else if (animation_map.contains("NW")) {
-        direction_string = "SW";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("NE")) {
-        direction_string = "NE";
-        this->renderer_flip = SDL_FLIP_HORIZONTAL;
-      } else if (animation_map.contains("N")) {
-        direction_string = "N";
-        this->renderer_flip = SDL_FLIP_NONE;
-      }
-      break;
-    case CompassDirection::E:
-      if (animation_map.contains("E")) {
-        direction_string = "E";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("W")) {
-        direction_string = "W";
-        this->renderer_flip = SDL_FLIP_HORIZONTAL;
-      } else if (animation_map.contains("NE")) {
-        direction_string = "NE";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("SE")) {
-        direction_string = "SE";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("NW")) {
-        direction_string = "NW";
-        this->renderer_flip = SDL_FLIP_HORIZONTAL;
-      } else if (animation_map.contains("SW")) {
-        direction_string = "SW";
-        this->renderer_flip = SDL_FLIP_HORIZONTAL;
-      } else if (animation_map.contains("N")) {
-        direction_string = "N";
-        this->renderer_flip = SDL_FLIP_NONE;
-      }
-      break;
-    case CompassDirection::W:
-      if (animation_map.contains("W")) {
-        direction_string = "W";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("E")) {
-        direction_string = "E";
-        this->renderer_flip = SDL_FLIP_HORIZONTAL;
-      } else if (animation_map.contains("NW")) {
-        direction_string = "NW";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("SW")) {
-        direction_string = "SW";
-        this->renderer_flip = SDL_FLIP_NONE;
-      } else if (animation_map.contains("NE")) {
-        direction_string = "NE";
-        this->renderer_flip = SDL_FLIP_HORIZONTAL;
-      } else if (animation_map.contains("SE")) {
-        direction_string = "SE";
-        this->renderer_flip = SDL_FLIP_HORIZONTAL;
-      } else if (animation_map.contains("N")) {
-        direction_string = "N";
-        this->renderer_flip = SDL_FLIP_NONE;
-      }
-      break;
-    case CompassDirection::G:
-        if (animation_map.contains("G")) {
-          direction_string = "G";
-          this->renderer_flip = SDL_FLIP_NONE;
-        } else {
-          direction_string = "N";
-          this->renderer_flip = SDL_FLIP_NONE;
-        }
-        break;
-    case CompassDirection::H:
-        if (animation_map.contains("H")) {
-          direction_string = "H";
-          this->renderer_flip = SDL_FLIP_NONE;
-        } else {
-          direction_string = "N";
-          this->renderer_flip = SDL_FLIP_NONE;
-        }
-        break;
-    default:
-      SDL_Log("Unhandled direction used!");
-      break;
+  if (h != nullptr) {
+    *h = height;
   }
-
-  return direction_string;
 }
 
+// Where each frame's anchor goes in the surface. With a background the
+// background frame is centred; otherwise the box covering every frame is.
 static void calculateOffset(AnimationData * data, int16_t * offset_x, int16_t * offset_y) {
   if (data->has_background) {
     *offset_x = (data->width / 2) - (data->frames[data->frame_count].width / 2) + data->frames[data->frame_count].offset_x;
@@ -348,39 +160,66 @@ static void calculateOffset(AnimationData * data, int16_t * offset_x, int16_t *
     return;
   }
 
-  for(int i = 0; i < ((int) data->frame_count + (int) data->has_background); i++) {
-    int16_t current_frame_offset_x = (data->width / 2) - (data->frames[i].width / 2) + data->frames[i].offset_x;
-    int16_t current_frame_offset_y = (data->height / 2) - (data->frames[i].height / 2) + data->frames[i].offset_y;
+  // Frame edges relative to the anchor
+  int left = INT_MAX, top = INT_MAX, right = INT_MIN, bottom = INT_MIN;
+  for(uint32_t i = 0; i < data->frame_count; i++) {
+    const AnimationFrameData &frame = data->frames[i];
+    left = std::min(left, -frame.offset_x);
+    top = std::min(top, -frame.offset_y);
+    right = std::max(right, frame.width - frame.offset_x);
+    bottom = std::max(bottom, frame.height - frame.offset_y);
+  }
+  if (right - left > data->width || bottom - top > data->height) {
+    SDL_Log("Frames cover %ix%i, more than the %ix%i animation; clipping", right - left, bottom - top, data->width, data->height);
+  }
+  *offset_x = (int16_t) ((data->width - (right - left)) / 2 - left);
+  *offset_y = (int16_t) ((data->height - (bottom - top)) / 2 - top);
+}
 
-    bool all_frames_fit = true;
-    for(int j = 0; j < ((int) data->frame_count + (int) data->has_background); j++) {
-      if (i == j) {
-        continue;
-      }
-      if (
-        current_frame_offset_x - data->frames[j].offset_x < 0 ||
-        data->frames[j].width + current_frame_offset_x - data->frames[j].offset_x > data->width ||
-        current_frame_offset_y - data->frames[j].offset_y < 0 ||
-        data->frames[j].height + current_frame_offset_y - data->frames[j].offset_y > data->height
-      ) {
-        all_frames_fit = false;
-        break;
+// Draws a frame's lines into surface with the frame's anchor at
+// (anchor_x, anchor_y). Spans are clipped to the surface.
+static void decodeFrame(const AnimationData * data, const AnimationFrameData &frame, SDL_Surface * surface, int anchor_x, int anchor_y) {
+  const uint8_t * line = data->source.data() + frame.data_offset;
+  const uint32_t * colors = data->pallet->colors;
+  int left = anchor_x - frame.offset_x;
+  int top = anchor_y - frame.offset_y;
+
+  for(int y = 0; y < frame.line_count; y++) {
+    int row = top + y;
+    bool row_visible = row >= 0 && row < surface->h;
+    uint32_t * pixels = row_visible ? (uint32_t *) ((uint8_t *) surface->pixels + (ptrdiff_t) row * surface->pitch) : nullptr;
+    int x = left;
+    uint8_t instruction_count = *line++;
+    for(int instruction = 0; instruction < instruction_count; instruction++) {
+      x += line[0];
+      int color_count = line[1];
+      const uint8_t * indices = line + 2;
+      line += 2 + color_count;
+
+      int start = std::max(x, 0);
+      int end = std::min(x + color_count, surface->w);
+      if (row_visible && start < end) {
+        if (frame.is_shadow) {
+          std::fill(pixels + start, pixels + end, 0xFF000000u);
+        } else {
+          for(int p = start; p < end; p++) {
+            pixels[p] = colors[indices[p - x]];
+          }
+        }
       }
-    }
-    if (all_frames_fit) {
-      *offset_x = current_frame_offset_x;
-      *offset_y = current_frame_offset_y;
-      return;
+      x += color_count;
     }
   }
-  SDL_Log("Failed to set offset to use");
 }
 
-
-void Animation::loadSurfaces(std::string direction_string, AnimationData * data) {
+bool AnimationFrames::loadSurfaces(FrameSet &set, AnimationData * data) {
   if (data == nullptr || data->frame_count == 0) {
     SDL_Log("No frames in animation data");
-    return;
+    return false;
+  }
+  if (data->pallet == nullptr) {
+    SDL_Log("No pallet for animation data");
+    return false;
   }
   this->frame_time_in_ms = data->frame_time_in_ms;
   this->has_background = data->has_background;
@@ -389,33 +228,21 @@ void Animation::loadSurfaces(std::string direction_string, AnimationData * data)
   assert(data->width > 0);
   assert(data->height > 0);
 
-  // TODO: Determine offset
   int16_t offset_x = 0;
   int16_t offset_y = 0;
   calculateOffset(data, &offset_x, &offset_y);
 
-  this->surfaces[direction_string] = std::vector<SDL_Surface *>();
+  std::vector<SDL_Surface *> &surfaces = set.surfaces;
+  surfaces.clear();
+  surfaces.reserve(data->frame_count + data->has_background);
   for(int i = 0; i < ((int) data->frame_count + (int) data->has_background); i++) {
-    this->surfaces[direction_string].push_back(SDL_CreateRGBSurfaceWithFormat(0, data->width, data->height, 0, SDL_PIXELFORMAT_RGBA32));
-    for(int y = 0; y < data->frames[i].height; y++) {
-      int x = offset_x - data->frames[i].offset_x;
-      for(int instruction = 0; instruction < data->frames[i].lines[y].instruction_count; instruction++) {
-        x += data->frames[i].lines[y].instructions[instruction].offset;
-        for(int p = 0; p < data->frames[i].lines[y].instructions[instruction].color_count; p++, x++) {
-          if (x < 0 || x >= data->width || y < 0 || y >= data->height) {
-              SDL_Log("Failure to draw within the bounds. %i,%i does not fit in a %i,%i rectangle", x, y, data->width, data->height);
-    return; // [PATCH] Prevent crash on invalid bounds
-              break;
-            }
-            if (data->frames[i].is_shadow) {
-              ((uint32_t *) this->surfaces[direction_string][i]->pixels)[data->width * (y + offset_y - data->frames[i].offset_y) + x] = 0xFF000000;
-            } else {
-              ((uint32_t *) this->surfaces[direction_string][i]->pixels)[data->width * (y + offset_y - data->frames[i].offset_y) + x] = data->pallet->colors[data->frames[i].lines[y].instructions[instruction].colors[p]];
-            }
-        }
-      }
+    SDL_Surface * surface = SDL_CreateRGBSurfaceWithFormat(0, data->width, data->height, 0, SDL_PIXELFORMAT_RGBA32);
+    if (surface == nullptr) {
+      SDL_Log("Could not create animation surface: %s", SDL_GetError());
+      continue;
     }
+    decodeFrame(data, data->frames[i], surface, offset_x, offset_y);
+    surfaces.push_back(surface);
   }
-  assert(!this->surfaces[direction_string].empty());
-  free(data);
+  return !surfaces.empty();
 }
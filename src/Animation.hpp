@@ -1,6 +1,8 @@
 #ifndef ANIMATION_HPP
 #define ANIMATION_HPP
 
+#include <array>
+#include <memory>
 #include <string>
 #include <unordered_map>
 #include <vector>
@@ -12,33 +14,64 @@
 #include "PalletManager.hpp"
 #include "Pallet.hpp"
 #include "AnimationData.hpp"
+#include "TextureAtlas.hpp"
+#include "RenderBatch.hpp"
 
+// Decoded frames of one .ani file, one frame set per direction in the file:
+// surfaces until the set is first drawn, regions of the texture atlas after.
+// Shared by every Animation playing the file, so they are decoded and
+// uploaded once. Which set, mirrored or not, stands in for each
+// CompassDirection is worked out once here, so drawing never looks a
+// direction up by name.
+class AnimationFrames {
+public:
+    AnimationFrames(std::unordered_map<std::string, AnimationData *> * data);
+    ~AnimationFrames();
+
+private:
+    friend class Animation;
+
+    struct FrameSet {
+        std::vector<SDL_Surface *> surfaces;
+        std::vector<TextureRegion> textures;
+    };
+
+    struct DirectionSlot {
+        int set = -1; // Into sets, -1 if no frames can stand in for the direction
+        SDL_RendererFlip flip = SDL_FLIP_NONE;
+    };
+
+    static const int DIRECTION_COUNT = 10; // Values of CompassDirection
+
+    uint32_t frame_time_in_ms = 0;
+    bool has_background = 0;
+
+    std::vector<FrameSet> sets;
+    std::array<DirectionSlot, DIRECTION_COUNT> directions;
+    TextureAtlas * atlas = nullptr; // Where textures came from
+
+    bool loadSurfaces(FrameSet &set, AnimationData * data);
+};
+
+// One playing instance of an animation: which frame it is on and since when.
+// Cheap to create; the frames themselves are shared. Frames are uploaded to
+// atlas and drawn through batch.
 class Animation {
 public:
-    Animation(std::unordered_map<std::string, AnimationData *> * data);
-    ~Animation();
+    Animation(std::shared_ptr<AnimationFrames> frames, TextureAtlas * atlas, RenderBatch * batch);
 
     void draw(SDL_Renderer * renderer, int x, int y, CompassDirection direction=CompassDirection::N);
     void draw(SDL_Renderer * renderer, SDL_Rect * draw_rect, CompassDirection direction=CompassDirection::N);
 
     void queryTexture(CompassDirection direction, int * w, int * h);
 private:
+    std::shared_ptr<AnimationFrames> frames;
+    TextureAtlas * atlas;
+    RenderBatch * batch;
+
     int current_frame = 0;
     CompassDirection last_direction = CompassDirection::N;
-    SDL_RendererFlip renderer_flip = SDL_FLIP_NONE;
     uint32_t frame_start_time = 0;
-
-    uint32_t frame_time_in_ms = 0;
-    bool has_background = 0;
-
-    std::unordered_map<std::string, std::vector<SDL_Surface *>> surfaces;
-    std::unordered_map<std::string, std::vector<SDL_Texture *>> textures;
-
-    template <typename T>
-    std::string convertCompassDirectionToExistingAnimationString(CompassDirection direction, std::unordered_map<std::string, T> &animation_map);
-    std::string convertCompassDirectionToString(CompassDirection direction);  // TODO: Figure out if this should be here
-
-    void loadSurfaces(std::string direction_string, AnimationData * data);
 };
 
 #endif // ANIMATION_HPP
\ No newline at end of file
@@ -2,19 +2,10 @@
 #define ANIMATION_DATA_HPP
 
 #include <cstdint>
+#include <memory>
 
 #include "Pallet.hpp"
-
-typedef struct {
-    uint8_t offset;
-    uint8_t color_count;
-    uint8_t * colors;
-} AnimationDrawInstruction;
-
-typedef struct {
-    uint8_t instruction_count;
-    AnimationDrawInstruction * instructions;
-} AnimationLineData;
+#include "MemberData.hpp"
 
 typedef struct {
     uint32_t size;
@@ -24,17 +15,30 @@ typedef struct {
     int16_t offset_x;
     uint16_t mystery_bytes;
     bool is_shadow;
-    AnimationLineData * lines;
+    uint32_t data_offset; // Where the frame's lines start in AnimationData::source
+    uint16_t line_count;  // Lines present, fewer than height if the file is cut short
 } AnimationFrameData;
 
-typedef struct {
-    uint16_t width;
-    uint16_t height;
-    uint8_t has_background;
-    uint32_t frame_time_in_ms;
-    Pallet * pallet;
-    uint32_t frame_count;
-    AnimationFrameData * frames;
-} AnimationData;
+// One direction of an animation, parsed in place. The file's draw commands are
+// not copied: each frame points at its lines in source, stored back to back,
+// where a line reads
+//
+//   instruction_count, then instruction_count times:
+//     offset, color_count, color_count palette indices
+//
+// Only the frame table is allocated, and line_count only covers lines that
+// are complete, so they can be decoded without further bounds checks.
+struct AnimationData {
+    uint16_t width = 0;
+    uint16_t height = 0;
+    uint8_t has_background = 0;
+    uint32_t frame_time_in_ms = 0;
+    Pallet * pallet = nullptr;
+    uint32_t frame_count = 0;          // Not counting the background frame
+    AnimationFrameData * frames = nullptr; // frame_count + has_background, in arena
+
+    MemberData source;
+    std::unique_ptr<AnimationFrameData[]> arena;
+};
 
-#endif  // ANIMATION_DATA_HPP
\ No newline at end of file
+#endif  // ANIMATION_DATA_HPP
@@ -0,0 +1,39 @@
+#ifndef BINARY_FORMAT_HPP
+#define BINARY_FORMAT_HPP
+
+#include <cstddef>
+#include <cstdint>
+
+// Little-endian readers for the game's file formats, and the parts of the zip
+// layout the engine reads without libzip. Shared so unity builds, which put
+// several source files in one, see each of them once.
+
+inline uint16_t readLE16(const uint8_t * data) {
+  return (uint16_t) (data[0] | (data[1] << 8));
+}
+
+inline uint32_t readLE32(const uint8_t * data) {
+  return (uint32_t) data[0] | ((uint32_t) data[1] << 8) | ((uint32_t) data[2] << 16) | ((uint32_t) data[3] << 24);
+}
+
+inline constexpr uint32_t ZIP_EOCD_SIGNATURE = 0x06054b50;
+inline constexpr size_t ZIP_EOCD_SIZE = 22;
+inline constexpr size_t ZIP_MAX_COMMENT = 0xffff;
+
+// End of central directory record in the last size bytes of an archive,
+// searched backwards past a comment; nullptr if there is none
+inline const uint8_t * findZipEndOfCentralDirectory(const uint8_t * tail, size_t size) {
+  if (size < ZIP_EOCD_SIZE) {
+    return nullptr;
+  }
+  size_t search_start = size - ZIP_EOCD_SIZE;
+  size_t search_end = size > ZIP_EOCD_SIZE + ZIP_MAX_COMMENT ? size - ZIP_EOCD_SIZE - ZIP_MAX_COMMENT : 0;
+  for (size_t offset = search_start + 1; offset-- > search_end;) {
+    if (readLE32(tail + offset) == ZIP_EOCD_SIGNATURE) {
+      return tail + offset;
+    }
+  }
+  return nullptr;
+}
+
+#endif // BINARY_FORMAT_HPP
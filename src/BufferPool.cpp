@@ -0,0 +1,89 @@
+#include "BufferPool.hpp"
+
+#include <utility>
+
+static size_t sizeClass(size_t size, size_t * rounded) {
+  size_t size_class = 0;
+  size_t class_size = BufferPool::MIN_POOLED_SIZE;
+  while (class_size < size) {
+    class_size <<= 1;
+    size_class++;
+  }
+  *rounded = class_size;
+  return size_class;
+}
+
+BufferPool::Buffer::Buffer(Buffer &&other) noexcept
+  : bytes(std::exchange(other.bytes, nullptr)), size(std::exchange(other.size, 0)) {}
+
+BufferPool::Buffer &BufferPool::Buffer::operator=(Buffer &&other) noexcept {
+  if (this != &other) {
+    if (this->bytes) {
+      BufferPool::instance().release(this->bytes, this->size);
+    }
+    this->bytes = std::exchange(other.bytes, nullptr);
+    this->size = std::exchange(other.size, 0);
+  }
+  return *this;
+}
+
+BufferPool::Buffer::~Buffer() {
+  if (this->bytes) {
+    BufferPool::instance().release(this->bytes, this->size);
+  }
+}
+
+BufferPool &BufferPool::instance() {
+  static BufferPool pool;
+  return pool;
+}
+
+BufferPool::~BufferPool() {
+  for (std::vector<uint8_t *> &buffers : this->idle) {
+    for (uint8_t * bytes : buffers) {
+      delete[] bytes;
+    }
+  }
+}
+
+BufferPool::Buffer BufferPool::acquire(size_t size) {
+  Buffer buffer;
+  if (size > MAX_POOLED_SIZE) {
+    buffer.bytes = new uint8_t[size];
+    buffer.size = size;
+    return buffer;
+  }
+
+  size_t rounded = 0;
+  size_t size_class = sizeClass(size, &rounded);
+  {
+    std::lock_guard<std::mutex> guard(this->mutex);
+    if (size_class < this->idle.size() && !this->idle[size_class].empty()) {
+      buffer.bytes = this->idle[size_class].back();
+      this->idle[size_class].pop_back();
+      this->idle_bytes -= rounded;
+    }
+  }
+  if (!buffer.bytes) {
+    buffer.bytes = new uint8_t[rounded];
+  }
+  buffer.size = rounded;
+  return buffer;
+}
+
+void BufferPool::release(uint8_t * bytes, size_t size) {
+  if (size <= MAX_POOLED_SIZE) {
+    size_t rounded = 0;
+    size_t size_class = sizeClass(size, &rounded);
+    std::lock_guard<std::mutex> guard(this->mutex);
+    if (rounded == size && this->idle_bytes + size <= MAX_IDLE_BYTES) {
+      if (this->idle.size() <= size_class) {
+        this->idle.resize(size_class + 1);
+      }
+      this->idle[size_class].push_back(bytes);
+      this->idle_bytes += size;
+      return;
+    }
+  }
+  delete[] bytes;
+}
@@ -0,0 +1,53 @@
+#ifndef BUFFER_POOL_HPP
+#define BUFFER_POOL_HPP
+
+#include <cstddef>
+#include <cstdint>
+#include <mutex>
+#include <vector>
+
+// Reusable byte buffers for inflating archive members. Sizes are rounded up
+// to a power of two so a freed buffer fits the next member of similar size;
+// buffers above MAX_POOLED_SIZE are allocated and freed directly.
+class BufferPool {
+public:
+  class Buffer {
+  public:
+    Buffer() = default;
+    Buffer(Buffer &&other) noexcept;
+    Buffer &operator=(Buffer &&other) noexcept;
+    Buffer(const Buffer &) = delete;
+    Buffer &operator=(const Buffer &) = delete;
+    ~Buffer();
+
+    uint8_t * data() const { return this->bytes; }
+    size_t capacity() const { return this->size; }
+
+  private:
+    friend class BufferPool;
+    uint8_t * bytes = nullptr;
+    size_t size = 0;
+  };
+
+  static BufferPool &instance();
+
+  ~BufferPool();
+
+  Buffer acquire(size_t size);
+
+  static const size_t MIN_POOLED_SIZE = 4096;
+  static const size_t MAX_POOLED_SIZE = 16 * 1024 * 1024;
+  // Free buffers kept in total, the rest are released
+  static const size_t MAX_IDLE_BYTES = 32 * 1024 * 1024;
+
+private:
+  BufferPool() = default;
+
+  void release(uint8_t * bytes, size_t size);
+
+  std::mutex mutex;
+  std::vector<std::vector<uint8_t *>> idle; // Per power of two size class
+  size_t idle_bytes = 0;
+};
+
+#endif // BUFFER_POOL_HPP
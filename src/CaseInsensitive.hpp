@@ -0,0 +1,44 @@
+#ifndef CASE_INSENSITIVE_HPP
+#define CASE_INSENSITIVE_HPP
+
+#include <cstddef>
+#include <cstdint>
+#include <string_view>
+
+// ASCII case-insensitive hash and equality for unordered containers. Both are
+// transparent, so a map keyed by std::string can be searched with a
+// std::string_view or const char * without building a lowercase copy.
+struct CaseInsensitiveHash {
+  using is_transparent = void;
+
+  size_t operator()(std::string_view value) const {
+    uint64_t hash = 14695981039346656037ull; // FNV-1a
+    for (char character : value) {
+      hash ^= (uint8_t) lower(character);
+      hash *= 1099511628211ull;
+    }
+    return (size_t) hash;
+  }
+
+  static char lower(char character) {
+    return (character >= 'A' && character <= 'Z') ? character - 'A' + 'a' : character;
+  }
+};
+
+struct CaseInsensitiveEqual {
+  using is_transparent = void;
+
+  bool operator()(std::string_view left, std::string_view right) const {
+    if (left.size() != right.size()) {
+      return false;
+    }
+    for (size_t i = 0; i < left.size(); i++) {
+      if (CaseInsensitiveHash::lower(left[i]) != CaseInsensitiveHash::lower(right[i])) {
+        return false;
+      }
+    }
+    return true;
+  }
+};
+
+#endif // CASE_INSENSITIVE_HPP
@@ -82,4 +82,10 @@ SDL_Rect Config::getProgressPosition() {
   rect.h = reader->getInt("UI", "progressBottom", 0) - rect.y;
 
   return rect;
-}
\ No newline at end of file
+}
+
+size_t Config::getTextureBudget() {
+  // In MB, for images kept on the GPU after nothing shows them anymore
+  int budget_mb = reader->getInt("user", "textureBudget", 64);
+  return (size_t) (budget_mb > 0 ? budget_mb : 0) * 1024 * 1024;
+}
@@ -22,6 +22,7 @@ public:
   std::string getResDllName();
   SDL_Color getProgressColor();
   SDL_Rect getProgressPosition();
+  size_t getTextureBudget();
 private:
   IniReader * reader = NULL;
 };
@@ -1,32 +1,234 @@
 #include "FontManager.hpp"
 #include <SDL2/SDL.h>
 #include "Utils.hpp"
-#include <sstream>
 
-FontManager::FontManager() {}
+FontManager::FontManager() {
+  this->stats.budget = DEFAULT_BUDGET;
+}
 FontManager::~FontManager() {
   this->clearCache();
-  for (auto f : this->fonts) if (f.second) TTF_CloseFont(f.second);
+  this->atlases.clear();
+  for (auto f : this->open_fonts) if (f.second) TTF_CloseFont(f.second);
   TTF_Quit();
 }
 void FontManager::clearCache() {
     for (auto& entry : texture_cache) if (entry.second.texture) SDL_DestroyTexture(entry.second.texture);
     texture_cache.clear();
+    recency.clear();
+    stats.textures = 0;
+    stats.bytes = 0;
+}
+size_t FontManager::hashText(int font, uint32_t color, std::string_view text) {
+  uint64_t hash = 14695981039346656037ull; // FNV-1a
+  for (char character : text) {
+    hash ^= (uint8_t) character;
+    hash *= 1099511628211ull;
+  }
+  hash ^= ((uint64_t) (uint32_t) font << 32) | color;
+  hash *= 1099511628211ull;
+  return (size_t) (hash ^ (hash >> 32));
 }
 SDL_Texture * FontManager::getStringTexture(SDL_Renderer * renderer, const int font, const std::string &string, SDL_Color color) {
-  this->loadFont(font);
-  std::stringstream ss; ss << font << "_" << string << "_" << (int)color.r << "_" << (int)color.g << "_" << (int)color.b << "_" << (int)color.a;
-  std::string key = ss.str();
-  
-  if (texture_cache.count(key)) return texture_cache[key].texture;
+  uint32_t packed_color = ((uint32_t) color.r << 24) | ((uint32_t) color.g << 16) | ((uint32_t) color.b << 8) | color.a;
+  TextKeyView view = {font, packed_color, string, hashText(font, packed_color, string)};
 
+  auto cached = texture_cache.find(view);
+  if (cached != texture_cache.end()) {
+    stats.hits++;
+    cached->second.last_used_frame = frame;
+    recency.splice(recency.end(), recency, cached->second.recency);
+    return cached->second.texture;
+  }
+  stats.misses++;
+
+  this->loadFont(font);
+  if (!this->fonts[font]) return NULL;
   SDL_Surface * surface = TTF_RenderUTF8_Blended(this->fonts[font], string.c_str(), color);
   if (!surface) return NULL;
+  size_t bytes = (size_t) surface->w * surface->h * 4;
   SDL_Texture * texture = SDL_CreateTextureFromSurface(renderer, surface);
   SDL_FreeSurface(surface);
-  if (texture) { CachedTexture ct; ct.texture = texture; texture_cache[key] = ct; }
+  if (!texture) return NULL;
+
+  auto added = texture_cache.emplace(TextKey{font, packed_color, string, view.hash}, CachedTexture()).first;
+  added->second.texture = texture;
+  added->second.bytes = bytes;
+  added->second.last_used_frame = frame;
+  added->second.recency = recency.insert(recency.end(), &added->first);
+  stats.textures++;
+  stats.bytes += bytes;
+  this->evict();
   return texture;
 }
+SDL_Point FontManager::drawText(SDL_Renderer * renderer, const int font, std::string_view text, int x, int y, SDL_Color color, int wrap_width, TextAlign align) {
+  GlyphAtlas * atlas = this->getAtlas(font);
+  if (!atlas) return {0, 0};
+  SDL_Point size = this->layoutText(atlas, text, wrap_width);
+  SDL_Texture * texture = atlas->getTexture(renderer);
+  if (!texture) return size;
+
+  float scale_x = 1.0f / atlas->getWidth();
+  float scale_y = 1.0f / atlas->getHeight();
+  vertices.clear();
+  indices.clear();
+  int line_y = y;
+  for (const TextLine &line : lines) {
+    int line_x = x;
+    if (align == TextAlign::CENTER) line_x -= line.width / 2;
+    else if (align == TextAlign::RIGHT) line_x -= line.width;
+
+    int pen = 0;
+    uint32_t previous = 0;
+    size_t position = line.start;
+    while (position < line.end) {
+      uint32_t codepoint = nextCodepoint(text, position);
+      if (codepoint == '\r') continue;
+      const GlyphAtlas::Glyph * glyph = atlas->getGlyph(codepoint);
+      pen += atlas->getKerning(previous, codepoint);
+      previous = codepoint;
+      const SDL_Rect &source = glyph->source;
+      if (source.w > 0) {
+        float left = (float) (line_x + pen + glyph->offset_x);
+        float top = (float) (line_y + glyph->offset_y);
+        float u = source.x * scale_x, v = source.y * scale_y;
+        float u2 = (source.x + source.w) * scale_x, v2 = (source.y + source.h) * scale_y;
+        int first = (int) vertices.size();
+        vertices.push_back({{left, top}, color, {u, v}});
+        vertices.push_back({{left + source.w, top}, color, {u2, v}});
+        vertices.push_back({{left, top + source.h}, color, {u, v2}});
+        vertices.push_back({{left + source.w, top + source.h}, color, {u2, v2}});
+        // Split along the top-left to bottom-right diagonal, which the
+        // software renderer recognizes and draws as a plain copy
+        for (int corner : {0, 1, 3, 0, 3, 2}) indices.push_back(first + corner);
+      }
+      pen += glyph->advance;
+    }
+    line_y += atlas->getLineSkip();
+  }
+  if (!indices.empty()) {
+    SDL_RenderGeometry(renderer, texture, vertices.data(), (int) vertices.size(), indices.data(), (int) indices.size());
+  }
+  return size;
+}
+SDL_Point FontManager::measureText(const int font, std::string_view text, int wrap_width) {
+  GlyphAtlas * atlas = this->getAtlas(font);
+  if (!atlas) return {0, 0};
+  return this->layoutText(atlas, text, wrap_width);
+}
+SDL_Point FontManager::layoutText(GlyphAtlas * atlas, std::string_view text, int wrap_width) {
+  // Fills lines, measuring with the same advances and kerning drawText uses.
+  // A wrapped line ends before the last space that fits, or before the glyph
+  // that does not fit when the line is one word.
+  lines.clear();
+  size_t start = 0;
+  size_t position = 0;
+  int pen = 0;
+  uint32_t previous = 0;
+  size_t space = std::string_view::npos; // Last space on the line
+  size_t after_space = 0;
+  int width_before_space = 0;
+  int width_after_space = 0;
+  while (position < text.size()) {
+    size_t at = position;
+    uint32_t codepoint = nextCodepoint(text, position);
+    if (codepoint == '\n') {
+      lines.push_back({start, at, pen});
+      start = position;
+      pen = 0;
+      previous = 0;
+      space = std::string_view::npos;
+      continue;
+    }
+    if (codepoint == '\r') continue;
+    const GlyphAtlas::Glyph * glyph = atlas->getGlyph(codepoint);
+    int advance = atlas->getKerning(previous, codepoint) + glyph->advance;
+    if (wrap_width > 0 && codepoint != ' ' && at > start && pen + advance > wrap_width) {
+      if (space != std::string_view::npos) {
+        lines.push_back({start, space, width_before_space});
+        start = after_space;
+        pen -= width_after_space;
+      } else {
+        lines.push_back({start, at, pen});
+        start = at;
+        pen = 0;
+        advance = glyph->advance;
+      }
+      space = std::string_view::npos;
+    }
+    if (codepoint == ' ') {
+      space = at;
+      after_space = position;
+      width_before_space = pen;
+      width_after_space = pen + advance;
+    }
+    pen += advance;
+    previous = codepoint;
+  }
+  lines.push_back({start, text.size(), pen});
+
+  SDL_Point size = {0, atlas->getLineHeight() + (int) (lines.size() - 1) * atlas->getLineSkip()};
+  for (const TextLine &line : lines) {
+    if (line.width > size.x) size.x = line.width;
+  }
+  return size;
+}
+uint32_t FontManager::nextCodepoint(std::string_view text, size_t &position) {
+  // UTF-8; a byte that does not start a valid sequence is taken as Latin-1
+  uint8_t lead = (uint8_t) text[position];
+  size_t length = lead >= 0xF0 ? 4 : lead >= 0xE0 ? 3 : lead >= 0xC0 ? 2 : 1;
+  if (length == 1 || position + length > text.size()) {
+    position++;
+    return lead;
+  }
+  uint32_t codepoint = lead & (0x7F >> length);
+  for (size_t i = 1; i < length; i++) {
+    uint8_t next = (uint8_t) text[position + i];
+    if ((next & 0xC0) != 0x80) {
+      position++;
+      return lead;
+    }
+    codepoint = (codepoint << 6) | (next & 0x3F);
+  }
+  position += length;
+  return codepoint;
+}
+GlyphAtlas * FontManager::getAtlas(const int font) {
+  this->loadFont(font);
+  TTF_Font * ttf = this->fonts[font];
+  if (!ttf) return nullptr;
+  std::unique_ptr<GlyphAtlas> &atlas = atlases[ttf];
+  if (!atlas) atlas.reset(new GlyphAtlas(ttf));
+  return atlas.get();
+}
+FontManager::Stats FontManager::getStats() const {
+  Stats current = stats;
+  for (auto &atlas : atlases) {
+    current.glyphs_rasterized += atlas.second->getRasterized();
+    current.atlas_uploads += atlas.second->getUploads();
+  }
+  return current;
+}
+void FontManager::beginFrame() {
+  frame++;
+  this->evict();
+}
+void FontManager::setBudget(size_t budget) {
+  stats.budget = budget;
+  this->evict();
+}
+void FontManager::evict() {
+  // Oldest first; once one was used this frame, so were all after it
+  while (stats.bytes > stats.budget && !recency.empty()) {
+    auto oldest = texture_cache.find(*recency.front());
+    if (oldest->second.last_used_frame == frame) return;
+    SDL_DestroyTexture(oldest->second.texture);
+    stats.bytes -= oldest->second.bytes;
+    stats.textures--;
+    stats.evictions++;
+    recency.pop_front();
+    texture_cache.erase(oldest);
+  }
+}
 void FontManager::loadFont(const int font) {
   if (this->fonts.contains(font)) return;
   int size = 14; std::string file = "Aileron-Regular.otf";
@@ -35,5 +237,9 @@ void FontManager::loadFont(const int font) {
     case 7108: file = "Aileron-Bold.otf"; size = 16; break;
     case 4736: case 14004: case 11520: case 11522: case 14000: file = "Aileron-Black.otf"; size = 12; break;
   }
-  this->fonts[font] = TTF_OpenFont(Utils::fixPath("fonts/" + file).c_str(), size);
+  auto opened = this->open_fonts.find({file, size});
+  if (opened == this->open_fonts.end()) {
+    opened = this->open_fonts.emplace(std::make_pair(file, size), TTF_OpenFont(Utils::fixPath("fonts/" + file).c_str(), size)).first;
+  }
+  this->fonts[font] = opened->second;
 }
\ No newline at end of file
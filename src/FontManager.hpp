@@ -1,19 +1,121 @@
 #ifndef FONT_MANAGER_HPP
 #define FONT_MANAGER_HPP
+#include <cstdint>
+#include <list>
+#include <map>
+#include <memory>
 #include <unordered_map>
 #include <string>
+#include <string_view>
+#include <vector>
 #include "SDL_ttf.h"
+#include "GlyphAtlas.hpp"
 
+// Rendered strings are cached by font, color and text. Lookups hash the text
+// once and search without building a key, so a cache hit allocates nothing.
+// Cached textures are owned here: callers fetch them every frame instead of
+// keeping them, because a texture not used in the current frame can be
+// destroyed once the cache is over its byte budget (least recently used
+// first). Textures used this frame are never evicted.
+//
+// drawText does not go through that cache: it draws from a glyph atlas per
+// font, so any string made of glyphs drawn before costs no rasterizing and
+// no texture upload, just one batch of quads. The engine's own UI draws all
+// its text that way; getStringTexture is kept for outside callers that need
+// a whole string as one texture.
 class FontManager {
 public:
+  struct Stats {
+    uint64_t hits = 0;
+    uint64_t misses = 0;
+    uint64_t evictions = 0;
+    size_t textures = 0;
+    size_t bytes = 0;
+    size_t budget = 0;
+    // Glyph atlases
+    uint64_t glyphs_rasterized = 0;
+    uint64_t atlas_uploads = 0;
+  };
+
+  // Where x is on each line of drawn text
+  enum class TextAlign {
+    LEFT,
+    CENTER,
+    RIGHT,
+  };
+
+  static const size_t DEFAULT_BUDGET = 16 * 1024 * 1024;
+
   FontManager();
   ~FontManager();
   SDL_Texture * getStringTexture(SDL_Renderer * renderer, const int font, const std::string &string, SDL_Color color);
+  // Draws UTF-8 text with its first line's top at y and returns its size.
+  // Lines break at '\n' and, when wrap_width is above 0, between words so
+  // that no line is wider than wrap_width unless a single word is.
+  SDL_Point drawText(SDL_Renderer * renderer, const int font, std::string_view text, int x, int y, SDL_Color color, int wrap_width = 0, TextAlign align = TextAlign::LEFT);
+  // Size drawText would return
+  SDL_Point measureText(const int font, std::string_view text, int wrap_width = 0);
+  // Call once per frame before drawing; textures from earlier frames become evictable
+  void beginFrame();
+  void setBudget(size_t budget);
+  Stats getStats() const;
 private:
+  struct TextKeyView {
+    int font;
+    uint32_t color;
+    std::string_view text;
+    size_t hash;
+  };
+  struct TextKey {
+    int font;
+    uint32_t color;
+    std::string text;
+    size_t hash;
+  };
+  struct TextKeyHash {
+    using is_transparent = void;
+    size_t operator()(const TextKey &key) const { return key.hash; }
+    size_t operator()(const TextKeyView &key) const { return key.hash; }
+  };
+  struct TextKeyEqual {
+    using is_transparent = void;
+    template <typename L, typename R>
+    bool operator()(const L &left, const R &right) const {
+      return left.hash == right.hash && left.font == right.font && left.color == right.color && std::string_view(left.text) == std::string_view(right.text);
+    }
+  };
+  struct CachedTexture {
+    SDL_Texture * texture = nullptr;
+    size_t bytes = 0;
+    uint64_t last_used_frame = 0;
+    std::list<const TextKey *>::iterator recency;
+  };
+
+  struct TextLine {
+    size_t start;
+    size_t end;
+    int width;
+  };
+
   std::unordered_map<int, TTF_Font *> fonts;
-  struct CachedTexture { SDL_Texture* texture; int width; int height; };
-  std::unordered_map<std::string, CachedTexture> texture_cache;
+  std::map<std::pair<std::string, int>, TTF_Font *> open_fonts; // By file and size, shared by font ids
+  std::unordered_map<TTF_Font *, std::unique_ptr<GlyphAtlas>> atlases;
+  std::unordered_map<TextKey, CachedTexture, TextKeyHash, TextKeyEqual> texture_cache;
+  std::list<const TextKey *> recency; // Keys of texture_cache, least recently used first
+  uint64_t frame = 1;
+  Stats stats;
+
+  // Reused by every drawText so drawing allocates nothing once they are big enough
+  std::vector<TextLine> lines;
+  std::vector<SDL_Vertex> vertices;
+  std::vector<int> indices;
+
+  static size_t hashText(int font, uint32_t color, std::string_view text);
+  static uint32_t nextCodepoint(std::string_view text, size_t &position);
   void loadFont(const int font);
+  GlyphAtlas * getAtlas(const int font);
+  SDL_Point layoutText(GlyphAtlas * atlas, std::string_view text, int wrap_width);
+  void evict();
   void clearCache();
 };
-#endif
\ No newline at end of file
+#endif
@@ -0,0 +1,168 @@
+#include "GlyphAtlas.hpp"
+
+#include <algorithm>
+
+// Empty pixels left around each glyph so filtering never picks up a neighbour
+static const int PADDING = 1;
+
+GlyphAtlas::GlyphAtlas(TTF_Font * font) : font(font) {
+  this->line_height = TTF_FontHeight(font);
+  this->line_skip = TTF_FontLineSkip(font);
+  this->kerning_enabled = TTF_GetFontKerning(font) != 0;
+  this->pixels = SDL_CreateRGBSurfaceWithFormat(0, MIN_SIZE, MIN_SIZE, 32, SDL_PIXELFORMAT_ARGB8888);
+  if (this->pixels == nullptr) {
+    SDL_LogError(SDL_LOG_CATEGORY_APPLICATION, "Could not create glyph atlas: %s", SDL_GetError());
+  }
+}
+
+GlyphAtlas::~GlyphAtlas() {
+  if (this->texture) {
+    SDL_DestroyTexture(this->texture);
+  }
+  SDL_FreeSurface(this->pixels);
+}
+
+const GlyphAtlas::Glyph * GlyphAtlas::getGlyph(uint32_t codepoint) {
+  if (codepoint < this->ascii.size() && this->ascii[codepoint]) {
+    return this->ascii[codepoint];
+  }
+  auto found = this->glyphs.find(codepoint);
+  if (found != this->glyphs.end()) {
+    return &found->second;
+  }
+  return this->addGlyph(codepoint);
+}
+
+int GlyphAtlas::getKerning(uint32_t previous, uint32_t codepoint) {
+  if (!this->kerning_enabled || previous == 0) {
+    return 0;
+  }
+  uint64_t pair = ((uint64_t) previous << 32) | codepoint;
+  auto found = this->kerning.find(pair);
+  if (found != this->kerning.end()) {
+    return found->second;
+  }
+  int kerning = TTF_GetFontKerningSizeGlyphs32(this->font, previous, codepoint);
+  this->kerning.emplace(pair, kerning);
+  return kerning;
+}
+
+SDL_Texture * GlyphAtlas::getTexture(SDL_Renderer * renderer) {
+  if (this->pixels == nullptr) {
+    return nullptr;
+  }
+  if (this->texture && this->renderer != renderer) {
+    SDL_DestroyTexture(this->texture);
+    this->texture = nullptr;
+  }
+  if (this->texture == nullptr) {
+    this->texture = SDL_CreateTexture(renderer, SDL_PIXELFORMAT_ARGB8888, SDL_TEXTUREACCESS_STATIC, this->pixels->w, this->pixels->h);
+    if (this->texture == nullptr) {
+      return nullptr;
+    }
+    this->renderer = renderer;
+    SDL_SetTextureBlendMode(this->texture, SDL_BLENDMODE_BLEND);
+    this->dirty = {0, 0, this->pixels->w, this->pixels->h};
+  }
+  if (this->dirty.w > 0 && this->dirty.h > 0) {
+    const uint8_t * first = (const uint8_t *) this->pixels->pixels + this->dirty.y * this->pixels->pitch + this->dirty.x * 4;
+    SDL_UpdateTexture(this->texture, &this->dirty, first, this->pixels->pitch);
+    this->dirty = {0, 0, 0, 0};
+    this->uploads++;
+  }
+  return this->texture;
+}
+
+const GlyphAtlas::Glyph * GlyphAtlas::addGlyph(uint32_t codepoint) {
+  Glyph &glyph = this->glyphs[codepoint];
+  if (codepoint < this->ascii.size()) {
+    this->ascii[codepoint] = &glyph;
+  }
+
+  int min_x = 0, max_x = 0, min_y = 0, max_y = 0, advance = 0;
+  if (TTF_GlyphMetrics32(this->font, codepoint, &min_x, &max_x, &min_y, &max_y, &advance) != 0) {
+    return &glyph;
+  }
+  glyph.advance = advance;
+  if (max_x <= min_x || this->pixels == nullptr) {
+    return &glyph; // Nothing to draw, like a space
+  }
+
+  // Rendered the way TTF_RenderUTF8_Blended lays out a one glyph string: the
+  // surface starts at the pen unless the glyph reaches left of it, and at the
+  // line top unless the glyph reaches above the ascent
+  SDL_Surface * surface = TTF_RenderGlyph32_Blended(this->font, codepoint, {255, 255, 255, 255});
+  if (surface == nullptr) {
+    return &glyph;
+  }
+  this->rasterized++;
+  SDL_Rect rect;
+  if (this->place(surface->w, surface->h, rect)) {
+    SDL_SetSurfaceBlendMode(surface, SDL_BLENDMODE_NONE);
+    SDL_BlitSurface(surface, NULL, this->pixels, &rect);
+    glyph.source = rect;
+    glyph.offset_x = std::min(0, min_x);
+    glyph.offset_y = std::min(0, TTF_FontAscent(this->font) - max_y);
+    if (this->dirty.w > 0 && this->dirty.h > 0) {
+      SDL_UnionRect(&this->dirty, &rect, &this->dirty);
+    } else {
+      this->dirty = rect;
+    }
+  } else if (!this->full) {
+    this->full = true;
+    SDL_LogWarn(SDL_LOG_CATEGORY_APPLICATION, "Glyph atlas is full, skipping glyph %u", codepoint);
+  }
+  SDL_FreeSurface(surface);
+  return &glyph;
+}
+
+bool GlyphAtlas::place(int width, int height, SDL_Rect &rect) {
+  if (width > MAX_SIZE || height > MAX_SIZE) {
+    return false;
+  }
+  while (true) {
+    if (this->shelf_x > 0 && this->shelf_x + width > this->pixels->w) {
+      // Start a new shelf below the current one
+      this->shelf_y += this->shelf_height + PADDING;
+      this->shelf_x = 0;
+      this->shelf_height = 0;
+    }
+    if (this->shelf_x + width <= this->pixels->w && this->shelf_y + height <= this->pixels->h) {
+      break;
+    }
+    if (!this->grow()) {
+      return false;
+    }
+  }
+  rect = {this->shelf_x, this->shelf_y, width, height};
+  this->shelf_x += width + PADDING;
+  this->shelf_height = std::max(this->shelf_height, height);
+  return true;
+}
+
+bool GlyphAtlas::grow() {
+  int width = this->pixels->w;
+  int height = this->pixels->h;
+  if (width <= height && width < MAX_SIZE) {
+    width *= 2;
+  } else if (height < MAX_SIZE) {
+    height *= 2;
+  } else {
+    return false;
+  }
+
+  SDL_Surface * grown = SDL_CreateRGBSurfaceWithFormat(0, width, height, 32, SDL_PIXELFORMAT_ARGB8888);
+  if (grown == nullptr) {
+    return false;
+  }
+  // Glyphs keep their place, only the texture coordinates change
+  SDL_SetSurfaceBlendMode(this->pixels, SDL_BLENDMODE_NONE);
+  SDL_BlitSurface(this->pixels, NULL, grown, NULL);
+  SDL_FreeSurface(this->pixels);
+  this->pixels = grown;
+  if (this->texture) {
+    SDL_DestroyTexture(this->texture);
+    this->texture = nullptr;
+  }
+  return true;
+}
@@ -0,0 +1,73 @@
+#ifndef GLYPH_ATLAS_HPP
+#define GLYPH_ATLAS_HPP
+
+#include <array>
+#include <cstdint>
+#include <unordered_map>
+
+#include <SDL2/SDL.h>
+#include "SDL_ttf.h"
+
+// Every glyph of one font that has been drawn so far, rasterized once in
+// white and packed into shelves of a single texture. Text is drawn as quads
+// from that texture with the color given per vertex, so a string made of
+// glyphs already here needs no rasterizing and no upload. The atlas grows
+// when full, up to MAX_SIZE square; glyphs that do not fit are skipped.
+class GlyphAtlas {
+public:
+  struct Glyph {
+    SDL_Rect source = {0, 0, 0, 0}; // Empty for glyphs with nothing to draw
+    int offset_x = 0;               // From the pen position to source's left edge
+    int offset_y = 0;               // From the line top to source's top edge
+    int advance = 0;
+  };
+
+  static const int MIN_SIZE = 256;
+  static const int MAX_SIZE = 2048;
+
+  GlyphAtlas(TTF_Font * font);
+  ~GlyphAtlas();
+
+  // Rasterizes the glyph on first use. Never nullptr: a glyph that cannot be
+  // drawn comes back with an empty source
+  const Glyph * getGlyph(uint32_t codepoint);
+  int getKerning(uint32_t previous, uint32_t codepoint);
+  int getLineHeight() const { return this->line_height; }
+  int getLineSkip() const { return this->line_skip; }
+
+  // The atlas texture for renderer with every glyph rasterized so far uploaded
+  SDL_Texture * getTexture(SDL_Renderer * renderer);
+  int getWidth() const { return this->pixels ? this->pixels->w : 0; }
+  int getHeight() const { return this->pixels ? this->pixels->h : 0; }
+  uint64_t getRasterized() const { return this->rasterized; }
+  uint64_t getUploads() const { return this->uploads; }
+
+private:
+  TTF_Font * font;
+  int line_height = 0;
+  int line_skip = 0;
+  bool kerning_enabled = false;
+
+  SDL_Surface * pixels = nullptr; // Atlas kept in memory to upload from and grow
+  SDL_Texture * texture = nullptr;
+  SDL_Renderer * renderer = nullptr;
+  SDL_Rect dirty = {0, 0, 0, 0};  // Changed since the last upload
+  bool full = false;
+
+  int shelf_x = 0;
+  int shelf_y = 0;
+  int shelf_height = 0;
+
+  std::unordered_map<uint32_t, Glyph> glyphs;
+  std::array<const Glyph *, 128> ascii = {}; // Shortcut into glyphs
+  std::unordered_map<uint64_t, int> kerning;
+
+  uint64_t rasterized = 0;
+  uint64_t uploads = 0;
+
+  const Glyph * addGlyph(uint32_t codepoint);
+  bool place(int width, int height, SDL_Rect &rect);
+  bool grow();
+};
+
+#endif // GLYPH_ATLAS_HPP
@@ -20,7 +20,8 @@ IniReader::IniReader(const std::string &filename) {
   free(buffer);
 }
 
-IniReader::IniReader(void *buffer, size_t size) { load(std::string((char *) buffer, size)); }
+IniReader::IniReader(void *buffer, size_t size) { load(std::string_view((char *) buffer, size)); }
+IniReader::IniReader(std::span<const uint8_t> content) { load(std::string_view((const char *) content.data(), content.size())); }
 IniReader::~IniReader() {}
 
 std::string IniReader::get(const std::string &section, const std::string &key, const std::string &default_value) {
@@ -71,13 +72,17 @@ bool IniReader::isList(const std::string &section, const std::string &key) {
   return !get(section, key).empty() && get(section, key).find(";") != std::string::npos;
 }
 
-void IniReader::load(std::string file_content) {
+void IniReader::load(std::string_view file_content) {
   if (file_content.empty()) return;
   std::string current_section = "";
-  std::stringstream ss(file_content);
   std::string line;
+  size_t position = 0;
   
-  while (std::getline(ss, line)) {
+  while (position < file_content.size()) {
+    size_t line_end = file_content.find('\n', position);
+    if (line_end == std::string_view::npos) line_end = file_content.size();
+    line.assign(file_content.substr(position, line_end - position));
+    position = line_end + 1;
     line.erase(std::remove(line.begin(), line.end(), '\r'), line.end());
     size_t first = line.find_first_not_of(" \t");
     if (first == std::string::npos) continue;
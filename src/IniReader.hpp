@@ -5,11 +5,14 @@
 #include <string>
 #include <map>
 #include <cstdint>
+#include <span>
+#include <string_view>
 
 class IniReader {
 public:
   IniReader(const std::string &filename);
   IniReader(void * buffer, size_t size);
+  IniReader(std::span<const uint8_t> content);
   ~IniReader();
 
   std::string get(const std::string &section, const std::string &key, const std::string &default_value = "");
@@ -28,7 +31,7 @@ public:
 private:
   std::map<std::string, std::map<std::string, std::string>> content;
 
-  void load(std::string file_content);
+  void load(std::string_view file_content);
 };
 
 #endif // INI_READER_HPP
\ No newline at end of file
@@ -0,0 +1,262 @@
+#include "MappedArchive.hpp"
+
+#include <mutex>
+
+#ifdef _WIN32
+#define WIN32_LEAN_AND_MEAN
+#define NOMINMAX
+#include <windows.h>
+#else
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
+#include <zlib.h>
+#include <SDL2/SDL.h>
+
+#include "BinaryFormat.hpp"
+
+static const uint32_t CENTRAL_SIGNATURE = 0x02014b50;
+static const uint32_t LOCAL_SIGNATURE = 0x04034b50;
+static const size_t CENTRAL_SIZE = 46;
+static const size_t LOCAL_SIZE = 30;
+
+static const uint16_t METHOD_STORE = 0;
+static const uint16_t METHOD_DEFLATE = 8;
+static const uint16_t FLAG_ENCRYPTED = 0x0001;
+
+// Open mappings, shared between threads
+namespace {
+  struct MappingCache {
+    std::mutex mutex;
+    std::unordered_map<std::string, std::pair<std::shared_ptr<MappedArchive>, uint64_t>> archives;
+    size_t mapped_bytes = 0;
+    // The engine is a 32 bit build, leave it room besides the mappings
+    size_t max_mapped_bytes = 256 * 1024 * 1024;
+    uint64_t clock = 0;
+
+    void evict() {
+      while (this->mapped_bytes > this->max_mapped_bytes && this->archives.size() > 1) {
+        auto oldest = this->archives.begin();
+        for (auto it = this->archives.begin(); it != this->archives.end(); ++it) {
+          if (it->second.second < oldest->second.second) {
+            oldest = it;
+          }
+        }
+        this->mapped_bytes -= oldest->second.first->getMappedSize();
+        this->archives.erase(oldest);
+      }
+    }
+  };
+
+  MappingCache &mappingCache() {
+    static MappingCache cache;
+    return cache;
+  }
+}
+
+std::shared_ptr<MappedArchive> MappedArchive::open(const std::string &path) {
+  MappingCache &cache = mappingCache();
+  {
+    std::lock_guard<std::mutex> guard(cache.mutex);
+    auto cached = cache.archives.find(path);
+    if (cached != cache.archives.end()) {
+      cached->second.second = ++cache.clock;
+      return cached->second.first;
+    }
+  }
+
+  // Map and parse outside the lock; if two threads race, one mapping wins
+  std::shared_ptr<MappedArchive> archive(new MappedArchive());
+  if (!archive->map(path) || !archive->parse()) {
+    return nullptr;
+  }
+
+  std::lock_guard<std::mutex> guard(cache.mutex);
+  auto inserted = cache.archives.emplace(path, std::make_pair(archive, ++cache.clock));
+  if (!inserted.second) {
+    return inserted.first->second.first;
+  }
+  cache.mapped_bytes += archive->getMappedSize();
+  cache.evict();
+  return archive;
+}
+
+void MappedArchive::setMaxMappedBytes(size_t max_bytes) {
+  MappingCache &cache = mappingCache();
+  std::lock_guard<std::mutex> guard(cache.mutex);
+  cache.max_mapped_bytes = max_bytes;
+  cache.evict();
+}
+
+void MappedArchive::closeAll() {
+  MappingCache &cache = mappingCache();
+  std::lock_guard<std::mutex> guard(cache.mutex);
+  cache.archives.clear();
+  cache.mapped_bytes = 0;
+}
+
+MappedArchive::~MappedArchive() {
+  if (this->mapped == nullptr) {
+    return;
+  }
+#ifdef _WIN32
+  UnmapViewOfFile(this->mapped);
+#else
+  munmap((void *) this->mapped, this->mapped_size);
+#endif
+}
+
+bool MappedArchive::map(const std::string &path) {
+#ifdef _WIN32
+  HANDLE file = CreateFileA(path.c_str(), GENERIC_READ, FILE_SHARE_READ, NULL, OPEN_EXISTING, FILE_ATTRIBUTE_NORMAL, NULL);
+  if (file == INVALID_HANDLE_VALUE) {
+    return false;
+  }
+  LARGE_INTEGER file_size;
+  if (!GetFileSizeEx(file, &file_size) || file_size.QuadPart < (LONGLONG) ZIP_EOCD_SIZE || (uint64_t) file_size.QuadPart > SIZE_MAX) {
+    CloseHandle(file);
+    return false;
+  }
+  HANDLE mapping = CreateFileMappingA(file, NULL, PAGE_READONLY, 0, 0, NULL);
+  CloseHandle(file);
+  if (mapping == NULL) {
+    return false;
+  }
+  // The view keeps the mapping object alive
+  this->mapped = (const uint8_t *) MapViewOfFile(mapping, FILE_MAP_READ, 0, 0, 0);
+  CloseHandle(mapping);
+  if (this->mapped == nullptr) {
+    return false;
+  }
+  this->mapped_size = (size_t) file_size.QuadPart;
+#else
+  int fd = ::open(path.c_str(), O_RDONLY);
+  if (fd < 0) {
+    return false;
+  }
+  struct stat file_stat;
+  if (fstat(fd, &file_stat) != 0 || file_stat.st_size < (off_t) ZIP_EOCD_SIZE) {
+    close(fd);
+    return false;
+  }
+  void * view = mmap(NULL, (size_t) file_stat.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+  close(fd);
+  if (view == MAP_FAILED) {
+    return false;
+  }
+  this->mapped = (const uint8_t *) view;
+  this->mapped_size = (size_t) file_stat.st_size;
+#endif
+  return true;
+}
+
+bool MappedArchive::parse() {
+  const uint8_t * eocd = findZipEndOfCentralDirectory(this->mapped, this->mapped_size);
+  if (eocd == nullptr) {
+    return false;
+  }
+
+  uint16_t count = readLE16(eocd + 10);
+  uint32_t directory_size = readLE32(eocd + 12);
+  uint32_t directory_offset = readLE32(eocd + 16);
+  if (count == 0xffff || directory_offset == 0xffffffff || (uint64_t) directory_offset + directory_size > this->mapped_size) {
+    return false; // zip64 or broken
+  }
+
+  this->members.reserve(count);
+  this->member_index.reserve(count);
+  const uint8_t * record = this->mapped + directory_offset;
+  const uint8_t * directory_end = record + directory_size;
+  for (uint32_t i = 0; i < count; i++) {
+    if (record + CENTRAL_SIZE > directory_end || readLE32(record) != CENTRAL_SIGNATURE) {
+      return false;
+    }
+    uint16_t name_length = readLE16(record + 28);
+    uint16_t extra_length = readLE16(record + 30);
+    uint16_t comment_length = readLE16(record + 32);
+    if (record + CENTRAL_SIZE + name_length + extra_length + comment_length > directory_end) {
+      return false;
+    }
+
+    Member member;
+    member.flags = readLE16(record + 8);
+    member.compression = readLE16(record + 10);
+    member.compressed_size = readLE32(record + 20);
+    member.size = readLE32(record + 24);
+    member.local_offset = readLE32(record + 42);
+    member.name = std::string_view((const char *) record + CENTRAL_SIZE, name_length);
+    this->members.push_back(member);
+    // First of several names that differ in case wins, like libzip lookups
+    this->member_index.emplace(member.name, i);
+
+    record += CENTRAL_SIZE + name_length + extra_length + comment_length;
+  }
+  return true;
+}
+
+int64_t MappedArchive::locate(std::string_view name) const {
+  auto member = this->member_index.find(name);
+  return member != this->member_index.end() ? (int64_t) member->second : -1;
+}
+
+const uint8_t * MappedArchive::getRawData(uint64_t index) const {
+  if (index >= this->members.size()) {
+    return nullptr;
+  }
+  const Member &member = this->members[index];
+  if (member.flags & FLAG_ENCRYPTED) {
+    return nullptr;
+  }
+
+  // The data starts after the local header, whose name and extra field
+  // lengths can differ from the central directory's
+  uint64_t header = member.local_offset;
+  if (header + LOCAL_SIZE > this->mapped_size || readLE32(this->mapped + header) != LOCAL_SIGNATURE) {
+    return nullptr;
+  }
+  uint64_t data_offset = header + LOCAL_SIZE + readLE16(this->mapped + header + 26) + readLE16(this->mapped + header + 28);
+  if (data_offset + member.compressed_size > this->mapped_size) {
+    return nullptr;
+  }
+  return this->mapped + data_offset;
+}
+
+MemberData MappedArchive::read(uint64_t index) const {
+  const uint8_t * data = this->getRawData(index);
+  if (data == nullptr) {
+    return MemberData();
+  }
+  const Member &member = this->members[index];
+
+  if (member.compression == METHOD_STORE) {
+    if (member.compressed_size != member.size) {
+      return MemberData();
+    }
+    return MemberData(this->shared_from_this(), data, member.size);
+  }
+
+  if (member.compression != METHOD_DEFLATE) {
+    return MemberData();
+  }
+
+  BufferPool::Buffer buffer = BufferPool::instance().acquire(member.size > 0 ? member.size : 1);
+  z_stream stream = {};
+  if (inflateInit2(&stream, -MAX_WBITS) != Z_OK) {
+    return MemberData();
+  }
+  stream.next_in = (Bytef *) data;
+  stream.avail_in = member.compressed_size;
+  stream.next_out = buffer.data();
+  stream.avail_out = member.size;
+  int result = inflate(&stream, Z_FINISH);
+  uLong inflated = stream.total_out;
+  inflateEnd(&stream);
+  if (result != Z_STREAM_END || inflated != member.size) {
+    SDL_Log("Could not inflate %.*s (zlib %i)", (int) member.name.size(), member.name.data(), result);
+    return MemberData();
+  }
+  return MemberData(std::move(buffer), member.size);
+}
@@ -0,0 +1,66 @@
+#ifndef MAPPED_ARCHIVE_HPP
+#define MAPPED_ARCHIVE_HPP
+
+#include <cstdint>
+#include <memory>
+#include <string>
+#include <string_view>
+#include <unordered_map>
+#include <vector>
+
+#include "CaseInsensitive.hpp"
+#include "MemberData.hpp"
+
+// A ZTD mapped into memory with its central directory parsed by hand.
+// Member numbers follow the central directory order, the same numbering
+// libzip uses, so ResourceIndex entries work with either reader.
+//
+// Stored members are returned as views into the mapping, deflated members
+// are inflated into pooled buffers. Reads never change the archive, so any
+// number of threads can read at once. Archives that use features this reader
+// does not handle (zip64, encryption, other compression methods) fail to open
+// or read, and ZtdFile falls back to libzip for them.
+class MappedArchive : public std::enable_shared_from_this<MappedArchive> {
+public:
+  struct Member {
+    std::string_view name; // Points into the mapping
+    uint32_t local_offset;
+    uint32_t compressed_size;
+    uint32_t size;
+    uint16_t compression;
+    uint16_t flags;
+  };
+
+  // Shared, cached mapping of path or nullptr. Mappings are dropped least
+  // recently used first once their total size passes the limit; readers that
+  // still hold one keep it alive.
+  static std::shared_ptr<MappedArchive> open(const std::string &path);
+  static void setMaxMappedBytes(size_t max_bytes);
+  static void closeAll();
+
+  ~MappedArchive();
+
+  const std::vector<Member> &getMembers() const { return this->members; }
+  // Member number for this name (any case), or -1
+  int64_t locate(std::string_view name) const;
+  // Invalid MemberData if the member cannot be read
+  MemberData read(uint64_t index) const;
+  // Start of the member's data as stored (compressed_size bytes), or nullptr
+  // if it is encrypted or lies outside the file
+  const uint8_t * getRawData(uint64_t index) const;
+
+  size_t getMappedSize() const { return this->mapped_size; }
+
+private:
+  MappedArchive() = default;
+
+  bool map(const std::string &path);
+  bool parse();
+
+  const uint8_t * mapped = nullptr;
+  size_t mapped_size = 0;
+  std::vector<Member> members;
+  std::unordered_map<std::string_view, uint32_t, CaseInsensitiveHash, CaseInsensitiveEqual> member_index;
+};
+
+#endif // MAPPED_ARCHIVE_HPP
@@ -0,0 +1,39 @@
+#ifndef MEMBER_DATA_HPP
+#define MEMBER_DATA_HPP
+
+#include <cstdint>
+#include <memory>
+#include <span>
+
+#include "BufferPool.hpp"
+
+class MappedArchive;
+
+// Contents of one archive member, read-only. Stored members point straight
+// into the archive mapping (kept alive by this object), deflated members own
+// a pooled buffer. Only valid while the MemberData lives.
+class MemberData {
+public:
+  MemberData() = default;
+  MemberData(std::shared_ptr<const MappedArchive> archive, const uint8_t * data, size_t size)
+    : archive(std::move(archive)), pointer(data), length(size), valid(true) {}
+  MemberData(BufferPool::Buffer buffer, size_t size)
+    : buffer(std::move(buffer)), length(size), valid(true) { this->pointer = this->buffer.data(); }
+
+  MemberData(MemberData &&) = default;
+  MemberData &operator=(MemberData &&) = default;
+
+  const uint8_t * data() const { return this->pointer; }
+  size_t size() const { return this->length; }
+  std::span<const uint8_t> span() const { return std::span<const uint8_t>(this->pointer, this->length); }
+  explicit operator bool() const { return this->valid; }
+
+private:
+  std::shared_ptr<const MappedArchive> archive;
+  BufferPool::Buffer buffer;
+  const uint8_t * pointer = nullptr;
+  size_t length = 0;
+  bool valid = false;
+};
+
+#endif // MEMBER_DATA_HPP
@@ -1,5 +1,8 @@
 #include "PalletManager.hpp"
 
+#include <algorithm>
+#include <cstring>
+
 #include "ZtdFile.hpp"
 
 PalletManager::PalletManager() {
@@ -62,17 +65,20 @@ void PalletManager::loadPalletMap(std::atomic<float> * progress, float progress_
 
 void PalletManager::loadPallet(const std::string &file_name) {
     Pallet pallet;
-    int pallet_file_size = 0;
-    void * pallet_file_content = ZtdFile::getFileContent(this->pallet_files_map[file_name], file_name, &pallet_file_size);
-    if (pallet_file_content == nullptr) {
+    MemberData pallet_data = ZtdFile::getFileData(this->pallet_files_map[file_name], file_name);
+    if (!pallet_data || pallet_data.size() < sizeof(uint32_t)) {
       SDL_Log("Could not load pallet %s from %s, returning", file_name.c_str(), this->pallet_files_map[file_name].c_str());
       return;
     }
-    SDL_RWops * pallet_rw = SDL_RWFromMem(pallet_file_content, pallet_file_size);
 
-    pallet.color_count =  SDL_ReadLE32(pallet_rw);
-    SDL_RWread(pallet_rw, pallet.colors, sizeof(uint32_t), (size_t) pallet.color_count);
-    SDL_RWclose(pallet_rw);
+    // Little endian color count, then that many 32 bit colors
+    const uint8_t * data = pallet_data.data();
+    uint32_t stored_count = (uint32_t) data[0] | ((uint32_t) data[1] << 8) | ((uint32_t) data[2] << 16) | ((uint32_t) data[3] << 24);
+    size_t available = (pallet_data.size() - sizeof(uint32_t)) / sizeof(uint32_t);
+    // Clamped so a bad count cannot overrun the 256 color table
+    pallet.color_count = (uint32_t) std::min<size_t>({stored_count, available, sizeof(pallet.colors) / sizeof(pallet.colors[0])});
+    memset(pallet.colors, 0, sizeof(pallet.colors));
+    memcpy(pallet.colors, data + sizeof(uint32_t), pallet.color_count * sizeof(uint32_t));
 
     this->pallet_map[file_name] = pallet;
-}
\ No newline at end of file
+}
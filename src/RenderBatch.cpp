@@ -0,0 +1,57 @@
+#include "RenderBatch.hpp"
+
+#include <utility>
+
+void RenderBatch::copy(SDL_Renderer * renderer, const TextureRegion &region, const SDL_Rect * dest_rect, SDL_RendererFlip flip) {
+  if (!region || dest_rect->w <= 0 || dest_rect->h <= 0) {
+    return;
+  }
+  if (region.texture != this->texture || renderer != this->renderer) {
+    this->flush();
+    int width = 0;
+    int height = 0;
+    SDL_QueryTexture(region.texture, NULL, NULL, &width, &height);
+    this->renderer = renderer;
+    this->texture = region.texture;
+    this->scale_x = 1.0f / width;
+    this->scale_y = 1.0f / height;
+  }
+  this->stats.copies++;
+
+  float left = (float) dest_rect->x;
+  float top = (float) dest_rect->y;
+  float right = (float) (dest_rect->x + dest_rect->w);
+  float bottom = (float) (dest_rect->y + dest_rect->h);
+  float u = region.rect.x * this->scale_x;
+  float v = region.rect.y * this->scale_y;
+  float u2 = (region.rect.x + region.rect.w) * this->scale_x;
+  float v2 = (region.rect.y + region.rect.h) * this->scale_y;
+  if (flip & SDL_FLIP_HORIZONTAL) {
+    std::swap(u, u2);
+  }
+  if (flip & SDL_FLIP_VERTICAL) {
+    std::swap(v, v2);
+  }
+
+  SDL_Color white = {255, 255, 255, 255};
+  int first = (int) this->vertices.size();
+  this->vertices.push_back({{left, top}, white, {u, v}});
+  this->vertices.push_back({{right, top}, white, {u2, v}});
+  this->vertices.push_back({{left, bottom}, white, {u, v2}});
+  this->vertices.push_back({{right, bottom}, white, {u2, v2}});
+  // Split along the top-left to bottom-right diagonal, which the software
+  // renderer recognizes and draws as a plain copy
+  for (int corner : {0, 1, 3, 0, 3, 2}) {
+    this->indices.push_back(first + corner);
+  }
+}
+
+void RenderBatch::flush() {
+  if (!this->indices.empty()) {
+    SDL_RenderGeometry(this->renderer, this->texture, this->vertices.data(), (int) this->vertices.size(), this->indices.data(), (int) this->indices.size());
+    this->stats.draws++;
+  }
+  this->vertices.clear();
+  this->indices.clear();
+  this->texture = nullptr;
+}
@@ -0,0 +1,37 @@
+#ifndef RENDER_BATCH_HPP
+#define RENDER_BATCH_HPP
+
+#include <cstdint>
+#include <vector>
+
+#include <SDL2/SDL.h>
+
+#include "TextureAtlas.hpp"
+
+// Collects copies from one texture and draws them together as a single
+// SDL_RenderGeometry call, so consecutive images from the same atlas page
+// cost one draw. Queued copies are drawn when a copy from another texture
+// comes in or on flush(); anything drawn some other way has to flush first
+// to keep the order things appear in.
+class RenderBatch {
+public:
+  struct Stats {
+    uint64_t copies = 0;
+    uint64_t draws = 0;
+  };
+
+  void copy(SDL_Renderer * renderer, const TextureRegion &region, const SDL_Rect * dest_rect, SDL_RendererFlip flip = SDL_FLIP_NONE);
+  void flush();
+  Stats getStats() const { return this->stats; }
+
+private:
+  SDL_Renderer * renderer = nullptr;
+  SDL_Texture * texture = nullptr;
+  float scale_x = 0.0f;
+  float scale_y = 0.0f;
+  std::vector<SDL_Vertex> vertices;
+  std::vector<int> indices;
+  Stats stats;
+};
+
+#endif // RENDER_BATCH_HPP
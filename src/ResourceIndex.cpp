@@ -0,0 +1,165 @@
+#include "ResourceIndex.hpp"
+
+#include <functional>
+#include <iterator>
+
+uint16_t ResourceIndex::addArchive(const std::string &path) {
+  this->archives.push_back(path);
+  return (uint16_t) (this->archives.size() - 1);
+}
+
+bool ResourceIndex::add(uint16_t archive, std::string_view name, uint32_t zip_index, uint32_t size, uint16_t compression) {
+  if (name.size() > UINT16_MAX) {
+    return false;
+  }
+  // Keep the table at most half full so probe runs stay short
+  if ((this->entries.size() + 1) * 2 > this->slots.size()) {
+    this->grow();
+  }
+
+  size_t slot = this->findSlot(name);
+  if (this->slots[slot] != 0) {
+    return false;
+  }
+
+  Entry entry;
+  entry.name_offset = (uint32_t) this->names.size();
+  entry.name_length = (uint16_t) name.size();
+  entry.archive = archive;
+  entry.zip_index = zip_index;
+  entry.size = size;
+  entry.compression = compression;
+  this->names.append(name);
+  this->entries.push_back(entry);
+  this->slots[slot] = (uint32_t) this->entries.size();
+
+  uint32_t number = (uint32_t) this->entries.size();
+  this->addStem(number, entry.name_length, 0);
+  for (uint16_t rank = 1; rank < std::size(RESOLVE_EXTENSIONS); rank++) {
+    std::string_view extension = RESOLVE_EXTENSIONS[rank];
+    if (name.size() > extension.size() && name.ends_with(extension)) {
+      this->addStem(number, (uint16_t) (name.size() - extension.size()), rank);
+    }
+  }
+  return true;
+}
+
+const ResourceIndex::Entry * ResourceIndex::find(std::string_view name) const {
+  if (this->slots.empty()) {
+    return nullptr;
+  }
+  uint32_t number = this->slots[this->findSlot(name)];
+  return number != 0 ? &this->entries[number - 1] : nullptr;
+}
+
+const ResourceIndex::Entry * ResourceIndex::resolve(std::string_view stem) const {
+  if (this->stems.empty()) {
+    return nullptr;
+  }
+  const Stem &found = this->stems[this->findStemSlot(stem)];
+  return found.entry != 0 ? &this->entries[found.entry - 1] : nullptr;
+}
+
+ResourceHandle ResourceIndex::getHandle(const Entry * entry) const {
+  ResourceHandle handle;
+  if (entry) {
+    handle.entry = (uint32_t) (entry - this->entries.data()) + 1;
+    handle.generation = this->generation;
+  }
+  return handle;
+}
+
+const ResourceIndex::Entry * ResourceIndex::get(ResourceHandle handle) const {
+  if (!handle || handle.generation != this->generation || handle.entry > this->entries.size()) {
+    return nullptr;
+  }
+  return &this->entries[handle.entry - 1];
+}
+
+std::string_view ResourceIndex::getName(const Entry &entry) const {
+  return std::string_view(this->names.data() + entry.name_offset, entry.name_length);
+}
+
+const std::string &ResourceIndex::getArchivePath(const Entry &entry) const {
+  return this->archives[entry.archive];
+}
+
+size_t ResourceIndex::memoryUsage() const {
+  size_t usage = this->entries.capacity() * sizeof(Entry) + this->names.capacity() + this->slots.capacity() * sizeof(uint32_t) + this->stems.capacity() * sizeof(Stem);
+  for (const std::string &archive : this->archives) {
+    usage += sizeof(std::string) + archive.capacity();
+  }
+  return usage;
+}
+
+void ResourceIndex::clear() {
+  this->archives.clear();
+  this->entries.clear();
+  this->names.clear();
+  this->slots.clear();
+  this->stems.clear();
+  this->stem_count = 0;
+  this->generation++;
+}
+
+// Slot holding name, or the empty slot where it would go
+size_t ResourceIndex::findSlot(std::string_view name) const {
+  size_t mask = this->slots.size() - 1;
+  size_t slot = std::hash<std::string_view>{}(name) & mask;
+  while (uint32_t number = this->slots[slot]) {
+    if (this->getName(this->entries[number - 1]) == name) {
+      break;
+    }
+    slot = (slot + 1) & mask;
+  }
+  return slot;
+}
+
+void ResourceIndex::grow() {
+  size_t capacity = this->slots.empty() ? 1024 : this->slots.size() * 2;
+  this->slots.assign(capacity, 0);
+  for (uint32_t number = 1; number <= this->entries.size(); number++) {
+    this->slots[this->findSlot(this->getName(this->entries[number - 1]))] = number;
+  }
+}
+
+std::string_view ResourceIndex::getStem(const Stem &stem) const {
+  return std::string_view(this->names.data() + this->entries[stem.entry - 1].name_offset, stem.length);
+}
+
+// Slot holding stem, or the empty slot where it would go
+size_t ResourceIndex::findStemSlot(std::string_view stem) const {
+  size_t mask = this->stems.size() - 1;
+  size_t slot = std::hash<std::string_view>{}(stem) & mask;
+  while (this->stems[slot].entry != 0) {
+    if (this->getStem(this->stems[slot]) == stem) {
+      break;
+    }
+    slot = (slot + 1) & mask;
+  }
+  return slot;
+}
+
+// Names are unique, so two entries never share a stem at the same rank
+void ResourceIndex::addStem(uint32_t number, uint16_t length, uint16_t rank) {
+  if ((this->stem_count + 1) * 2 > this->stems.size()) {
+    this->growStems();
+  }
+  Stem &slot = this->stems[this->findStemSlot(std::string_view(this->names.data() + this->entries[number - 1].name_offset, length))];
+  if (slot.entry == 0) {
+    slot = {number, length, rank};
+    this->stem_count++;
+  } else if (rank < slot.rank) {
+    slot = {number, length, rank};
+  }
+}
+
+void ResourceIndex::growStems() {
+  std::vector<Stem> old = std::move(this->stems);
+  this->stems.assign(old.empty() ? 2048 : old.size() * 2, Stem{0, 0, 0});
+  for (const Stem &stem : old) {
+    if (stem.entry != 0) {
+      this->stems[this->findStemSlot(this->getStem(stem))] = stem;
+    }
+  }
+}
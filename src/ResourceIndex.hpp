@@ -0,0 +1,90 @@
+#ifndef RESOURCE_INDEX_HPP
+#define RESOURCE_INDEX_HPP
+
+#include <cstdint>
+#include <string>
+#include <string_view>
+#include <vector>
+
+// A resolved resource that can be kept and used again without another lookup.
+// Only valid for the index generation it came from.
+struct ResourceHandle {
+  uint32_t entry = 0; // Entry number + 1, 0 is unresolved
+  uint32_t generation = 0;
+
+  explicit operator bool() const { return this->entry != 0; }
+};
+
+// Every member of every ZTD, keyed by its normalized name (lowercase, forward
+// slashes). Archive paths are stored once in an archive table, names are
+// packed into one arena, and the lookup table is an open-addressing array of
+// entry numbers, so an entry costs a 20 byte record, its name and a few
+// bytes of table slots instead of two heap strings and a hash node.
+//
+// A second table maps stems to their best entry: "ui/foo" resolves to the
+// first of "ui/foo", "ui/foo.ini", "ui/foo.lyt", ... "ui/foo/" that exists, in
+// RESOLVE_EXTENSIONS order, with one probe. Stems point into the name arena.
+class ResourceIndex {
+public:
+  struct Entry {
+    uint32_t name_offset;
+    uint16_t name_length;
+    uint16_t archive;
+    uint32_t zip_index;
+    uint32_t size;        // Uncompressed
+    uint16_t compression; // ZIP_CM_* method
+  };
+
+  uint16_t addArchive(const std::string &path);
+  // Returns false if the name is already indexed (the first archive wins)
+  bool add(uint16_t archive, std::string_view name, uint32_t zip_index, uint32_t size, uint16_t compression);
+
+  // Exact name
+  const Entry * find(std::string_view name) const;
+  bool contains(std::string_view name) const { return this->find(name) != nullptr; }
+  // Name with or without one of RESOLVE_EXTENSIONS
+  const Entry * resolve(std::string_view stem) const;
+
+  ResourceHandle getHandle(const Entry * entry) const;
+  const Entry * get(ResourceHandle handle) const;
+
+  std::string_view getName(const Entry &entry) const;
+  const std::string &getArchivePath(const Entry &entry) const;
+  const std::vector<Entry> &getEntries() const { return this->entries; }
+  size_t size() const { return this->entries.size(); }
+  size_t archiveCount() const { return this->archives.size(); }
+  size_t memoryUsage() const;
+  // Changes whenever the index is cleared; handles and cached misses from
+  // another generation are stale
+  uint32_t getGeneration() const { return this->generation; }
+
+  void clear();
+
+  static constexpr const char * RESOLVE_EXTENSIONS[] = {
+    "", ".ini", ".lyt", ".uca", ".ucb", ".ai", ".txt", ".ani", ".tga", ".bmp", ".png", ".pal", ".wav", "/"
+  };
+
+private:
+  struct Stem {
+    uint32_t entry;  // Entry number + 1, 0 is empty
+    uint16_t length; // Stem is the first length bytes of the entry's name
+    uint16_t rank;   // Position of the extension in RESOLVE_EXTENSIONS
+  };
+
+  std::vector<std::string> archives;
+  std::vector<Entry> entries;
+  std::string names;
+  std::vector<uint32_t> slots; // Entry number + 1, 0 is empty
+  std::vector<Stem> stems;
+  size_t stem_count = 0;
+  uint32_t generation = 1;
+
+  size_t findSlot(std::string_view name) const;
+  size_t findStemSlot(std::string_view stem) const;
+  std::string_view getStem(const Stem &stem) const;
+  void addStem(uint32_t number, uint16_t length, uint16_t rank);
+  void grow();
+  void growStems();
+};
+
+#endif // RESOURCE_INDEX_HPP
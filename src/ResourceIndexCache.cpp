@@ -0,0 +1,173 @@
+#include "ResourceIndexCache.hpp"
+
+#include <algorithm>
+#include <cstring>
+#include <filesystem>
+#include <fstream>
+
+#include <SDL2/SDL.h>
+
+#include "BinaryFormat.hpp"
+
+// The cache is only ever read on the machine that wrote it, so values are
+// stored in native byte order
+static const char CACHE_MAGIC[8] = {'Z', 'T', '1', 'R', 'I', 'D', 'X', '\0'};
+static const uint32_t CACHE_VERSION = 1;
+
+template <typename T>
+static void writeValue(std::ofstream &out, T value) {
+  out.write((const char *) &value, sizeof(T));
+}
+
+static void writeString(std::ofstream &out, const std::string &value) {
+  writeValue<uint16_t>(out, (uint16_t) value.size());
+  out.write(value.data(), value.size());
+}
+
+template <typename T>
+static bool readValue(std::ifstream &in, T &value) {
+  return (bool) in.read((char *) &value, sizeof(T));
+}
+
+static bool readString(std::ifstream &in, std::string &value) {
+  uint16_t length = 0;
+  if (!readValue(in, length)) {
+    return false;
+  }
+  value.resize(length);
+  return (bool) in.read(value.data(), length);
+}
+
+bool ResourceIndexCache::readStamp(Archive &archive) {
+  std::error_code error;
+  archive.size = std::filesystem::file_size(archive.path, error);
+  if (error) {
+    return false;
+  }
+  archive.mtime = std::filesystem::last_write_time(archive.path, error).time_since_epoch().count();
+  if (error || archive.size < ZIP_EOCD_SIZE) {
+    return false;
+  }
+
+  // The end of central directory record is the last 22 bytes unless the
+  // archive has a comment, so read only as much of the tail as needed
+  std::ifstream file(archive.path, std::ios::binary);
+  size_t tail_size = ZIP_EOCD_SIZE;
+  std::vector<uint8_t> tail;
+  while (true) {
+    tail.resize(tail_size);
+    file.seekg((std::streamoff) (archive.size - tail_size));
+    if (!file.read((char *) tail.data(), tail_size)) {
+      return false;
+    }
+    const uint8_t * eocd = findZipEndOfCentralDirectory(tail.data(), tail_size);
+    if (eocd) {
+      archive.cd_size = readLE32(eocd + 12);
+      archive.cd_offset = readLE32(eocd + 16);
+      return true;
+    }
+    size_t max_tail = (size_t) std::min<uint64_t>(archive.size, ZIP_EOCD_SIZE + ZIP_MAX_COMMENT);
+    if (tail_size == max_tail) {
+      return false;
+    }
+    tail_size = max_tail;
+  }
+}
+
+bool ResourceIndexCache::load(const std::string &cache_file) {
+  this->archives.clear();
+  std::ifstream in(cache_file, std::ios::binary);
+  if (!in) {
+    return false;
+  }
+
+  char magic[sizeof(CACHE_MAGIC)];
+  uint32_t version = 0;
+  uint32_t archive_count = 0;
+  if (!in.read(magic, sizeof(magic)) || memcmp(magic, CACHE_MAGIC, sizeof(magic)) != 0 ||
+      !readValue(in, version) || version != CACHE_VERSION || !readValue(in, archive_count)) {
+    SDL_Log("Ignoring resource index cache %s, unknown format", cache_file.c_str());
+    return false;
+  }
+
+  for (uint32_t i = 0; i < archive_count; i++) {
+    Archive archive;
+    uint32_t member_count = 0;
+    if (!readString(in, archive.path) || !readValue(in, archive.size) || !readValue(in, archive.mtime) ||
+        !readValue(in, archive.cd_offset) || !readValue(in, archive.cd_size) || !readValue(in, member_count)) {
+      break;
+    }
+    archive.members.resize(member_count);
+    bool complete = true;
+    for (Member &member : archive.members) {
+      if (!readString(in, member.name) || !readValue(in, member.index) || !readValue(in, member.size) || !readValue(in, member.compression)) {
+        complete = false;
+        break;
+      }
+    }
+    if (!complete) {
+      break;
+    }
+    std::string path = archive.path;
+    this->archives[path] = std::move(archive);
+  }
+  return true;
+}
+
+bool ResourceIndexCache::save(const std::string &cache_file, const std::vector<Archive> &archives) {
+  std::string temp_file = cache_file + ".tmp";
+  {
+    std::ofstream out(temp_file, std::ios::binary | std::ios::trunc);
+    if (!out) {
+      SDL_Log("Could not write resource index cache %s", temp_file.c_str());
+      return false;
+    }
+    out.write(CACHE_MAGIC, sizeof(CACHE_MAGIC));
+    writeValue<uint32_t>(out, CACHE_VERSION);
+    uint32_t archive_count = (uint32_t) std::count_if(archives.begin(), archives.end(), [](const Archive &archive) { return !archive.members.empty(); });
+    writeValue<uint32_t>(out, archive_count);
+    for (const Archive &archive : archives) {
+      if (archive.members.empty()) {
+        continue; // Failed or empty listing, scan again next time
+      }
+      writeString(out, archive.path);
+      writeValue(out, archive.size);
+      writeValue(out, archive.mtime);
+      writeValue(out, archive.cd_offset);
+      writeValue(out, archive.cd_size);
+      writeValue<uint32_t>(out, (uint32_t) archive.members.size());
+      for (const Member &member : archive.members) {
+        writeString(out, member.name);
+        writeValue(out, member.index);
+        writeValue(out, member.size);
+        writeValue(out, member.compression);
+      }
+    }
+    if (!out) {
+      SDL_Log("Could not write resource index cache %s", temp_file.c_str());
+      return false;
+    }
+  }
+
+  std::error_code error;
+  std::filesystem::rename(temp_file, cache_file, error);
+  if (error) {
+    SDL_Log("Could not replace resource index cache %s: %s", cache_file.c_str(), error.message().c_str());
+    std::filesystem::remove(temp_file, error);
+    return false;
+  }
+  return true;
+}
+
+ResourceIndexCache::Archive * ResourceIndexCache::find(const Archive &stamp) {
+  auto cached = this->archives.find(stamp.path);
+  if (cached == this->archives.end()) {
+    return nullptr;
+  }
+  Archive &archive = cached->second;
+  if (archive.size != stamp.size || archive.mtime != stamp.mtime ||
+      archive.cd_offset != stamp.cd_offset || archive.cd_size != stamp.cd_size) {
+    return nullptr;
+  }
+  return &archive;
+}
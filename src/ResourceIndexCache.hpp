@@ -0,0 +1,47 @@
+#ifndef RESOURCE_INDEX_CACHE_HPP
+#define RESOURCE_INDEX_CACHE_HPP
+
+#include <cstdint>
+#include <string>
+#include <unordered_map>
+#include <vector>
+
+// Member lists of the scanned ZTD archives, saved between runs so unchanged
+// archives do not have to be opened at startup. An archive's cached list is
+// used only if its size, modification time and central directory position
+// (read from the end of central directory record) are unchanged.
+class ResourceIndexCache {
+public:
+  struct Member {
+    std::string name; // Normalized
+    uint32_t index;
+    uint32_t size;
+    uint16_t compression;
+  };
+
+  struct Archive {
+    std::string path;
+    uint64_t size = 0;
+    int64_t mtime = 0;
+    uint64_t cd_offset = 0;
+    uint32_t cd_size = 0;
+    std::vector<Member> members;
+  };
+
+  // Fills in size, mtime and the central directory position of archive.path
+  static bool readStamp(Archive &archive);
+
+  bool load(const std::string &cache_file);
+  // Archives without members are left out: their listing may have failed
+  bool save(const std::string &cache_file, const std::vector<Archive> &archives);
+
+  // Cached archive with the same path and stamp, or nullptr. Its members may
+  // be moved out.
+  Archive * find(const Archive &stamp);
+  size_t size() const { return this->archives.size(); }
+
+private:
+  std::unordered_map<std::string, Archive> archives;
+};
+
+#endif // RESOURCE_INDEX_CACHE_HPP
@@ -3,14 +3,44 @@
 #include <string>
 #include <vector>
 #include <algorithm>
+#include <thread>
+#include <unordered_set>
 #include <SDL2/SDL.h>
 #include "ZtdFile.hpp"
 #include "Utils.hpp"
 #include "FontManager.hpp"
 #include "Expansion.hpp"
+#include "ResourceIndexCache.hpp"
 
-ResourceManager::ResourceManager(Config * config) : config(config) {}
+// Saved member lists of the scanned archives, next to the executable
+static const char * RESOURCE_INDEX_CACHE_FILE = "resource_index.cache";
+// Archive scanning is mostly waiting on the disk, more threads stop helping
+static const size_t RESOURCE_SCAN_THREADS = 8;
+
+ResourceManager::ResourceManager(Config * config) : config(config), texture_cache(&texture_atlas, config->getTextureBudget()) {}
 ResourceManager::~ResourceManager() {
+  if (!missing_resources.empty() || !missing_animations.empty()) {
+    SDL_Log("Missing resources requested this session:");
+    for (auto &missing : missing_resources) {
+      SDL_Log("  %s (%u times)", missing.first.c_str(), missing.second);
+    }
+    for (auto &missing : missing_animations) {
+      SDL_Log("  animation %s (%u times)", missing.first.c_str(), missing.second);
+    }
+  }
+  TextureCache::Stats textures = texture_cache.getStats();
+  SDL_Log("Texture cache: %llu hits, %llu misses, %llu evicted, %zu textures (%zu KB) still cached",
+          (unsigned long long) textures.hits, (unsigned long long) textures.misses, (unsigned long long) textures.evictions,
+          textures.textures, textures.bytes / 1024);
+  FontManager::Stats text = font_manager.getStats();
+  SDL_Log("Text cache: %llu hits, %llu misses, %llu evicted, %zu textures (%zu KB) cached",
+          (unsigned long long) text.hits, (unsigned long long) text.misses, (unsigned long long) text.evictions,
+          text.textures, text.bytes / 1024);
+  SDL_Log("Glyph atlases: %llu glyphs rasterized, %llu uploads",
+          (unsigned long long) text.glyphs_rasterized, (unsigned long long) text.atlas_uploads);
+  RenderBatch::Stats draws = render_batch.getStats();
+  SDL_Log("Batched drawing: %llu copies in %llu draw calls",
+          (unsigned long long) draws.copies, (unsigned long long) draws.draws);
   Mix_HaltMusic();
   if (this->intro_music != nullptr){ Mix_FreeMusic(this->intro_music); }
 }
@@ -47,27 +77,32 @@ std::string fixDoubleName(const std::string& input) {
     return path;
 }
 
-// Check if a path is a directory (ends with / in the resource map)
+// Check if a path is a directory (ends with / in the resource index)
 bool ResourceManager::isDirectory(const std::string& path) {
     std::string with_slash = path + "/";
-    return resource_map.count(with_slash) > 0;
+    return resource_index.contains(with_slash);
 }
 
-std::string ResourceManager::getResourceLocation(const std::string &resource_name_raw) {
-  std::string base_name = fixDoubleName(resource_name_raw);
+void ResourceManager::checkMissingGeneration() {
+  if (missing_generation != resource_index.getGeneration()) {
+    missing_resources.clear();
+    missing_animations.clear();
+    missing_generation = resource_index.getGeneration();
+  }
+}
 
-  std::vector<std::string> extensions = { "", ".ini", ".lyt", ".uca", ".ucb", ".ai", ".txt", ".ani", ".tga", ".bmp", ".png", ".pal", ".wav" };
+const ResourceIndex::Entry * ResourceManager::findResource(const std::string &resource_name_raw) {
+  std::string base_name = fixDoubleName(resource_name_raw);
 
-  for (const auto& ext : extensions) {
-      std::string try_name = base_name + ext;
-      if (this->resource_map.count(try_name)) {
-          return this->resource_map[try_name];
-      }
+  checkMissingGeneration();
+  auto missing = missing_resources.find(base_name);
+  if (missing != missing_resources.end()) {
+      missing->second++;
+      return nullptr;
   }
 
-  std::string with_slash = base_name + "/";
-  if (this->resource_map.count(with_slash)) {
-      return this->resource_map[with_slash];
+  if (const ResourceIndex::Entry * entry = this->resource_index.resolve(base_name)) {
+      return entry;
   }
 
   bool suppress = (base_name.find("textbck") != std::string::npos) ||
@@ -75,30 +110,34 @@ std::string ResourceManager::getResourceLocation(const std::string &resource_nam
                   (base_name.find("backdrop") != std::string::npos);
   
   if (!suppress) {
-      SDL_Log("Resource not found: %s", base_name.c_str());
+      SDL_Log("Resource not found: %s (further requests are not logged)", base_name.c_str());
   }
+  missing_resources.emplace(base_name, 1);
   
-  return "";
+  return nullptr;
 }
 
-std::string ResourceManager::findActualResourceKey(const std::string &base_name) {
-  std::vector<std::string> extensions = { "", ".ini", ".lyt", ".uca", ".ucb", ".ai", ".txt", ".ani", ".tga", ".bmp", ".png", ".pal", ".wav" };
-  
-  for (const auto& ext : extensions) {
-      std::string try_name = base_name + ext;
-      if (this->resource_map.count(try_name)) {
-          return try_name;
-      }
-  }
-  return base_name;
+// Entry behind a handle if it is a file (not a directory)
+const ResourceIndex::Entry * ResourceManager::getFileEntry(ResourceHandle handle) {
+  const ResourceIndex::Entry * entry = resource_index.get(handle);
+  if (!entry || resource_index.getName(*entry).back() == '/') return nullptr;
+  return entry;
+}
+
+ResourceHandle ResourceManager::resolve(const std::string &name_raw) {
+  return resource_index.getHandle(findResource(name_raw));
 }
 
 void ResourceManager::load_resource_map(std::atomic<float> * progress, float progress_goal) {
   if (resource_map_loaded) return;
   SDL_Log("Loading resource map...");
   std::vector<std::string> resource_paths = config->getResourcePaths();
-  float step = (progress_goal - *progress) / (float) resource_paths.size();
-  
+
+  // Archives in precedence order: resource paths as configured, then the
+  // directory order within each path. An archive reached through two paths
+  // is only listed the first time, so no two workers share a cache entry.
+  std::vector<ResourceIndexCache::Archive> archives;
+  std::unordered_set<std::string> listed;
   for (std::string path : resource_paths) {
     path = Utils::fixPath(path);
     if (path.empty()) continue;
@@ -106,22 +145,84 @@ void ResourceManager::load_resource_map(std::atomic<float> * progress, float pro
     try {
       for (std::filesystem::directory_entry archive : std::filesystem::directory_iterator(path)) {
         if (Utils::getFileExtension(archive.path().string()) != "ZTD") continue;
-        
-        for (std::string file_raw : ZtdFile::getFileList(archive.path().string())) {
-          std::string file = normalizePath(file_raw);
-          if (resource_map.count(file) == 0) {
-            resource_map[file] = archive.path().string();
-          }
-        }
+        std::error_code error;
+        std::filesystem::path canonical = std::filesystem::weakly_canonical(archive.path(), error);
+        if (!listed.insert(error ? archive.path().string() : canonical.string()).second) continue;
+        archives.emplace_back();
+        archives.back().path = archive.path().string();
       }
     } catch (std::exception& e) {
       SDL_Log("Warning: Could not scan path %s: %s", path.c_str(), e.what());
     }
-    *progress = (*progress + step < progress_goal) ? *progress + step : progress_goal;
+  }
+
+  std::string cache_file = Utils::getExecutableDirectory() + RESOURCE_INDEX_CACHE_FILE;
+  ResourceIndexCache cache;
+  cache.load(cache_file);
+
+  // Read or scan every archive on a few threads; each one only touches its
+  // own slot in archives. Merging happens afterwards in order.
+  float start = *progress;
+  float step = archives.empty() ? 0 : (progress_goal - start) / (float) archives.size();
+  std::atomic<size_t> next_archive = 0;
+  std::atomic<size_t> done = 0;
+  std::atomic<size_t> scanned = 0;
+  std::atomic<size_t> cacheable = 0;
+  std::atomic<size_t> new_entries = 0;
+  auto worker = [&]() {
+    for (size_t i = next_archive++; i < archives.size(); i = next_archive++) {
+      ResourceIndexCache::Archive &archive = archives[i];
+      ResourceIndexCache::Archive * cached = ResourceIndexCache::readStamp(archive) ? cache.find(archive) : nullptr;
+      if (cached) {
+        archive.members = std::move(cached->members);
+      } else {
+        for (const ZtdFile::FileInfo &file : ZtdFile::getFileInfoList(archive.path)) {
+          archive.members.push_back({normalizePath(file.name), file.index, file.size, file.compression});
+        }
+        scanned++;
+      }
+      if (!archive.members.empty()) {
+        cacheable++;
+        new_entries += !cached;
+      }
+
+      // Workers finish out of order, only ever move the bar forward
+      float goal = std::min(start + step * (float) ++done, progress_goal);
+      float current = *progress;
+      while (current < goal && !progress->compare_exchange_weak(current, goal)) {}
+    }
+  };
+
+  size_t thread_count = std::min<size_t>({std::max(1u, std::thread::hardware_concurrency()), RESOURCE_SCAN_THREADS, archives.size()});
+  std::vector<std::thread> threads;
+  for (size_t i = 1; i < thread_count; i++) {
+    threads.emplace_back(worker);
+  }
+  worker();
+  for (std::thread &thread : threads) {
+    thread.join();
+  }
+
+  for (const ResourceIndexCache::Archive &archive : archives) {
+    uint16_t archive_id = resource_index.addArchive(archive.path);
+    for (const ResourceIndexCache::Member &member : archive.members) {
+      resource_index.add(archive_id, member.name, member.index, member.size, member.compression);
+    }
+  }
+  *progress = progress_goal;
+
+  // Archives that listed no members (failed to open, or empty) are not
+  // cached, so they are tried again next time without forcing a rewrite
+  if (new_entries > 0 || cacheable != cache.size()) {
+    cache.save(cache_file, archives);
   }
   
   resource_map_loaded = true;
-  SDL_Log("Loading resource map done. Total files indexed: %zu", resource_map.size());
+  // Anything looked up before the index was filled may exist now
+  missing_resources.clear();
+  missing_animations.clear();
+  SDL_Log("Loading resource map done. Total files indexed: %zu in %zu archives (%zu scanned, %zu from cache, %zu KB)",
+          resource_index.size(), resource_index.archiveCount(), scanned.load(), archives.size() - scanned, resource_index.memoryUsage() / 1024);
 }
 
 void ResourceManager::load_string_map(std::atomic<float> * progress, float progress_goal) {
@@ -153,9 +254,10 @@ void ResourceManager::load_string_map(std::atomic<float> * progress, float progr
 }
 
 void ResourceManager::load_pallet_map(std::atomic<float> * progress, float progress_goal) {
-  for (auto file : resource_map) {
-    if(Utils::getFileExtension(file.first) == "PAL") {
-      pallet_manager.addPalletFileToMap(file.first, file.second);
+  for (const ResourceIndex::Entry &entry : resource_index.getEntries()) {
+    std::string name = std::string(resource_index.getName(entry));
+    if(Utils::getFileExtension(name) == "PAL") {
+      pallet_manager.addPalletFileToMap(name, resource_index.getArchivePath(entry));
     }
   }
   pallet_manager.loadPalletMap(progress, progress_goal);
@@ -173,32 +275,60 @@ void ResourceManager::load_all(std::atomic<float> * progress, std::atomic<bool>
 }
 
 void * ResourceManager::getFileContent(const std::string &name_raw, int *size) { 
-    std::string name = fixDoubleName(name_raw);
-    std::string actual_key = findActualResourceKey(name);
-    std::string loc = getResourceLocation(name);
-    if (loc.empty()) return nullptr;
-    return ZtdFile::getFileContent(loc, actual_key, size);
+    return getFileContent(resolve(name_raw), size);
 }
 
-SDL_Texture * ResourceManager::getTexture(SDL_Renderer * r, const std::string &name_raw) {
-  std::string name = fixDoubleName(name_raw);
-  std::string actual_key = findActualResourceKey(name);
-  std::string loc = getResourceLocation(name);
-  if (loc.empty()) return nullptr;
+void * ResourceManager::getFileContent(ResourceHandle handle, int *size) { 
+    const ResourceIndex::Entry * entry = getFileEntry(handle);
+    if (!entry) return nullptr;
+    return ZtdFile::getFileContent(resource_index.getArchivePath(*entry), std::string(resource_index.getName(*entry)), size, entry->zip_index);
+}
+
+TextureRegion ResourceManager::getTexture(SDL_Renderer * r, const std::string &name_raw) {
+  return getTexture(r, resolve(name_raw));
+}
+
+TextureRegion ResourceManager::getTexture(SDL_Renderer * r, ResourceHandle handle) {
+  const ResourceIndex::Entry * entry = getFileEntry(handle);
+  if (!entry) return {};
+  if (TextureRegion cached = texture_cache.acquire(r, handle.entry, handle.generation)) return cached;
   
-  SDL_Surface * s = ZtdFile::getImageSurface(loc, actual_key);
-  if (!s) return nullptr;
-  SDL_Texture * t = SDL_CreateTextureFromSurface(r, s);
+  SDL_Surface * s = ZtdFile::getImageSurface(resource_index.getArchivePath(*entry), std::string(resource_index.getName(*entry)), entry->zip_index);
+  if (!s) return {};
+  TextureRegion t = texture_atlas.add(r, s);
   SDL_FreeSurface(s);
-  return t;
+  if (!t) return {};
+  return texture_cache.add(r, handle.entry, handle.generation, t);
+}
+
+void ResourceManager::releaseTexture(const TextureRegion &texture) {
+  texture_cache.release(texture);
+}
+
+void ResourceManager::drawTexture(SDL_Renderer * r, const TextureRegion &texture, const SDL_Rect * dest_rect, SDL_RendererFlip flip) {
+  render_batch.copy(r, texture, dest_rect, flip);
+}
+
+void ResourceManager::flushDraws() {
+  render_batch.flush();
+}
+
+RenderBatch::Stats ResourceManager::getDrawStats() const {
+  return render_batch.getStats();
+}
+
+void ResourceManager::releaseUnusedTextures() {
+  texture_cache.releaseUnused();
+}
+
+TextureCache::Stats ResourceManager::getTextureStats() const {
+  return texture_cache.getStats();
 }
 
 Mix_Music * ResourceManager::getMusic(const std::string &name_raw) { 
-    std::string name = fixDoubleName(name_raw);
-    std::string actual_key = findActualResourceKey(name);
-    std::string loc = getResourceLocation(name);
-    if (loc.empty()) return nullptr;
-    return ZtdFile::getMusic(loc, actual_key); 
+    const ResourceIndex::Entry * entry = getFileEntry(resolve(name_raw));
+    if (!entry) return nullptr;
+    return ZtdFile::getMusic(resource_index.getArchivePath(*entry), std::string(resource_index.getName(*entry)), entry->zip_index); 
 }
 
 IniReader * ResourceManager::getIniReader(const std::string &name_raw) { 
@@ -208,41 +338,84 @@ IniReader * ResourceManager::getIniReader(const std::string &name_raw) {
     // Using (void*)"" cast to fix C2665 error
     if (isDirectory(name)) return new IniReader((void*)"", 0);
     
-    std::string actual_key = findActualResourceKey(name);
-    std::string loc = getResourceLocation(name);
-    
-    if (loc.empty() || actual_key.back() == '/') return new IniReader((void*)"", 0);
-    
-    return ZtdFile::getIniReader(loc, actual_key); 
+    return getIniReader(resolve(name));
+}
+
+IniReader * ResourceManager::getIniReader(ResourceHandle handle) { 
+    const ResourceIndex::Entry * entry = getFileEntry(handle);
+    if (!entry) return new IniReader((void*)"", 0);
+    return ZtdFile::getIniReader(resource_index.getArchivePath(*entry), std::string(resource_index.getName(*entry)), entry->zip_index); 
 }
 
-Animation *ResourceManager::getAnimation(const std::string &name_raw) {
+Animation *ResourceManager::getAnimation(const std::string &name_raw, ResourceHandle * resolved) {
   std::string name = fixDoubleName(name_raw);
-  std::string loc = getResourceLocation(name);
-  
-  if (!loc.empty()) { 
-      std::string actual_key = findActualResourceKey(name);
-      Animation* a = AniFile::getAnimation(&pallet_manager, loc, actual_key); 
-      if(a) return a; 
-  }
-  
-  std::string name_ani = name + ".ani";
-  loc = getResourceLocation(name_ani);
-  if (!loc.empty()) { 
-      Animation* a = AniFile::getAnimation(&pallet_manager, loc, name_ani); 
-      if(a) return a; 
+
+  // Also covers names that resolve but do not load as an animation
+  checkMissingGeneration();
+  auto missing = missing_animations.find(name);
+  if (missing != missing_animations.end()) {
+      missing->second++;
+      return nullptr;
   }
-  
-  // Try looking inside if it's a directory
+
   std::string dir_ani = name + "/" + name.substr(name.find_last_of('/') + 1) + ".ani";
-  loc = getResourceLocation(dir_ani);
-  if (!loc.empty()) {
-      Animation* a = AniFile::getAnimation(&pallet_manager, loc, dir_ani);
-      if (a) return a;
+  
+  // The name itself, its .ani file, or the .ani file inside its directory
+  for (const std::string &candidate : { name, name + ".ani", dir_ani }) {
+      ResourceHandle handle = resolve(candidate);
+      if (Animation * a = getAnimation(handle)) {
+          if (resolved) *resolved = handle;
+          return a;
+      }
   }
+  SDL_Log("Animation not found: %s", name.c_str());
+  missing_animations.emplace(name, 1);
   return nullptr;
 }
 
+Animation *ResourceManager::getAnimation(ResourceHandle handle) {
+  const ResourceIndex::Entry * entry = getFileEntry(handle);
+  if (!entry) return nullptr;
+
+  if (animation_generation != resource_index.getGeneration()) {
+    animation_cache.clear();
+    animation_generation = resource_index.getGeneration();
+  }
+  auto cached = animation_cache.find(handle.entry);
+  if (cached != animation_cache.end()) {
+    cached->second.last_used = ++animation_clock;
+    return new Animation(cached->second.frames, &texture_atlas, &render_batch);
+  }
+
+  AnimationFrames * frames = AniFile::getAnimationFrames(&pallet_manager, resource_index.getArchivePath(*entry), std::string(resource_index.getName(*entry)));
+  if (!frames) return nullptr;
+  CachedAnimation &added = animation_cache[handle.entry];
+  added.frames = std::shared_ptr<AnimationFrames>(frames);
+  added.last_used = ++animation_clock;
+  Animation * animation = new Animation(added.frames, &texture_atlas, &render_batch);
+  trimAnimationCache(MAX_UNUSED_ANIMATIONS);
+  return animation;
+}
+
+void ResourceManager::releaseUnusedAnimations() {
+  trimAnimationCache(0);
+}
+
+void ResourceManager::trimAnimationCache(size_t max_unused) {
+  // Only the cache holds a reference to unused frames
+  std::vector<std::pair<uint64_t, uint32_t>> unused;
+  for (auto &cached : animation_cache) {
+    if (cached.second.frames.use_count() == 1) {
+      unused.emplace_back(cached.second.last_used, cached.first);
+    }
+  }
+  if (unused.size() <= max_unused) return;
+  std::sort(unused.begin(), unused.end());
+  for (size_t i = 0; i < unused.size() - max_unused; i++) {
+    animation_cache.erase(unused[i].second);
+  }
+}
+
 SDL_Cursor * ResourceManager::getCursor(uint32_t id) {
   try {
     PeFile pe(config->getResDllName());
@@ -273,6 +446,23 @@ SDL_Texture *ResourceManager::getStringTexture(SDL_Renderer * r, const int f, co
   return font_manager.getStringTexture(r, f, s, c);
 }
 
+SDL_Point ResourceManager::drawText(SDL_Renderer * r, const int f, std::string_view s, int x, int y, SDL_Color c, int wrap_width, FontManager::TextAlign align) {
+  render_batch.flush();
+  return font_manager.drawText(r, f, s, x, y, c, wrap_width, align);
+}
+
+SDL_Point ResourceManager::measureText(const int f, std::string_view s, int wrap_width) {
+  return font_manager.measureText(f, s, wrap_width);
+}
+
+void ResourceManager::beginFrame() {
+  font_manager.beginFrame();
+}
+
+FontManager::Stats ResourceManager::getTextStats() const {
+  return font_manager.getStats();
+}
+
 std::string ResourceManager::getString(uint32_t id) { 
   if (string_map.count(id)) return string_map[id];
   return "";
@@ -5,6 +5,7 @@
 #include <string>
 #include <atomic>
 #include <cstdint>
+#include <memory>
 
 #include "SDL_ttf.h"
 
@@ -17,6 +18,10 @@
 #include "FontManager.hpp"
 #include "Pallet.hpp"
 #include "PalletManager.hpp"
+#include "ResourceIndex.hpp"
+#include "TextureCache.hpp"
+#include "TextureAtlas.hpp"
+#include "RenderBatch.hpp"
 
 
 class ResourceManager {
@@ -26,24 +31,80 @@ public:
 
   void load_all(std::atomic<float> * progress, std::atomic<bool> * is_done);
 
+  // Resolve a name once and keep the handle to skip the lookup next time
+  ResourceHandle resolve(const std::string &file_name);
+
   void * getFileContent(const std::string &file_name, int * size);
-  SDL_Texture * getTexture(SDL_Renderer * renderer, const std::string &file_name);
+  void * getFileContent(ResourceHandle handle, int * size);
+  // Shared, cached textures, small ones packed into atlas pages; give them
+  // back with releaseTexture instead of destroying them
+  TextureRegion getTexture(SDL_Renderer * renderer, const std::string &file_name);
+  TextureRegion getTexture(SDL_Renderer * renderer, ResourceHandle handle);
+  void releaseTexture(const TextureRegion &texture);
+  // Queues a copy of texture, batched with the copies before it from the same
+  // atlas page. Drawing anything without going through the resource manager
+  // has to call flushDraws first, as does presenting the frame.
+  void drawTexture(SDL_Renderer * renderer, const TextureRegion &texture, const SDL_Rect * dest_rect, SDL_RendererFlip flip = SDL_FLIP_NONE);
+  void flushDraws();
+  RenderBatch::Stats getDrawStats() const;
+  // Destroys cached textures nothing uses; like releaseUnusedAnimations, call
+  // before the renderer goes away
+  void releaseUnusedTextures();
+  TextureCache::Stats getTextureStats() const;
   SDL_Cursor * getCursor(uint32_t cursor_id);
   Mix_Music * getMusic(const std::string &file_name);
   IniReader * getIniReader(const std::string &file_name);
-  Animation * getAnimation(const std::string &file_name);
+  IniReader * getIniReader(ResourceHandle handle);
+  // A new Animation the caller deletes; its decoded frames are shared with
+  // every other Animation of the same file. resolved is set to the .ani file
+  // the animation was loaded from.
+  Animation * getAnimation(const std::string &file_name, ResourceHandle * resolved = nullptr);
+  Animation * getAnimation(ResourceHandle handle);
+  // Drops cached animation frames not used by any Animation. Call with
+  // everything else released before the renderer goes away.
+  void releaseUnusedAnimations();
   SDL_Texture * getLoadTexture(SDL_Renderer * renderer);
+  // Owned by the font manager and only valid for the frame it was fetched in
   SDL_Texture * getStringTexture(SDL_Renderer * renderer, const int font, const std::string &string, SDL_Color color);
+  // Text drawn from the font manager's glyph atlases, see FontManager::drawText
+  SDL_Point drawText(SDL_Renderer * renderer, const int font, std::string_view text, int x, int y, SDL_Color color, int wrap_width = 0, FontManager::TextAlign align = FontManager::TextAlign::LEFT);
+  SDL_Point measureText(const int font, std::string_view text, int wrap_width = 0);
+  void beginFrame();
+  FontManager::Stats getTextStats() const;
   std::string getString(uint32_t string_id);
 
 private:
-  std::unordered_map<std::string, std::string> resource_map;
+  // Before everything holding textures from it
+  TextureAtlas texture_atlas;
+  RenderBatch render_batch;
+
+  ResourceIndex resource_index;
   std::unordered_map<uint32_t, std::string> string_map;
-  std::unordered_map<std::string, Animation *> animation_map;
+  // Decoded animations by index entry. Frames in use by an Animation always
+  // stay; up to MAX_UNUSED_ANIMATIONS others are kept, least recently used
+  // dropped first, so going back to a layout does not decode them again.
+  struct CachedAnimation {
+    std::shared_ptr<AnimationFrames> frames;
+    uint64_t last_used = 0;
+  };
+  static const size_t MAX_UNUSED_ANIMATIONS = 32;
+  std::unordered_map<uint32_t, CachedAnimation> animation_cache;
+  uint64_t animation_clock = 0;
+  uint32_t animation_generation = 0;
+  void trimAnimationCache(size_t max_unused);
   std::unordered_map<std::string, Pallet *> pallet_map;
   bool resource_map_loaded = false;
 
-  std::string getResourceLocation(const std::string &resoure_name);
+  // Names that resolved to nothing, with how often they were asked for, so a
+  // missing resource costs one probe and is logged once. Dropped when the
+  // index generation changes.
+  std::unordered_map<std::string, uint32_t> missing_resources;
+  std::unordered_map<std::string, uint32_t> missing_animations;
+  uint32_t missing_generation = 0;
+  void checkMissingGeneration();
+
+  const ResourceIndex::Entry * findResource(const std::string &resource_name);
+  const ResourceIndex::Entry * getFileEntry(ResourceHandle handle);
 
   void load_resource_map(std::atomic<float> * progress, float progress_goal);
   void load_string_map(std::atomic<float> * progress, float progress_goal);
@@ -54,10 +115,10 @@ private:
 
   Config * config;
   FontManager font_manager;
+  TextureCache texture_cache;
   PalletManager pallet_manager;
 
   // [PATCH] New helper methods for handling missing files/directories
-  std::string findActualResourceKey(const std::string &base_name);
   bool isDirectory(const std::string& path);
 };
 
@@ -1,4 +1,4 @@
-#ifndef PE_RESOURCE_LOADER_HPP
+#ifndef TEXT_MANAGER_HPP
 #define TEXT_MANAGER_HPP
 
 #include <string>
@@ -0,0 +1,120 @@
+#include "TextureAtlas.hpp"
+
+#include <algorithm>
+
+TextureAtlas::~TextureAtlas() {
+  for (Page &page : this->pages) {
+    if (page.texture) {
+      SDL_DestroyTexture(page.texture);
+    }
+  }
+}
+
+TextureRegion TextureAtlas::add(SDL_Renderer * renderer, SDL_Surface * surface) {
+  if (surface == nullptr || surface->w <= 0 || surface->h <= 0) {
+    return {};
+  }
+  if (surface->w > MAX_IMAGE_SIZE || surface->h > MAX_IMAGE_SIZE) {
+    SDL_Texture * texture = SDL_CreateTextureFromSurface(renderer, surface);
+    if (texture == nullptr) {
+      return {};
+    }
+    this->stats.standalone++;
+    return {texture, {0, 0, surface->w, surface->h}, -1};
+  }
+
+  SDL_Surface * converted = nullptr;
+  if (surface->format->format != SDL_PIXELFORMAT_RGBA32) {
+    converted = SDL_ConvertSurfaceFormat(surface, SDL_PIXELFORMAT_RGBA32, 0);
+    if (converted == nullptr) {
+      return {};
+    }
+    surface = converted;
+  }
+
+  SDL_Rect rect;
+  int found = -1;
+  for (int i = 0; i < (int) this->pages.size() && found < 0; i++) {
+    Page &page = this->pages[i];
+    if (page.texture && page.renderer == renderer && this->place(page, surface->w, surface->h, rect)) {
+      found = i;
+    }
+  }
+  if (found < 0) {
+    found = this->newPage(renderer);
+    if (found >= 0) {
+      this->place(this->pages[found], surface->w, surface->h, rect);
+    }
+  }
+  if (found >= 0) {
+    SDL_UpdateTexture(this->pages[found].texture, &rect, surface->pixels, surface->pitch);
+  }
+  SDL_FreeSurface(converted);
+  if (found < 0) {
+    return {};
+  }
+
+  Page &page = this->pages[found];
+  page.regions++;
+  this->stats.regions++;
+  return {page.texture, rect, found};
+}
+
+void TextureAtlas::release(const TextureRegion &region) {
+  if (region.texture == nullptr) {
+    return;
+  }
+  if (region.page < 0) {
+    SDL_DestroyTexture(region.texture);
+    this->stats.standalone--;
+    return;
+  }
+  Page &page = this->pages[region.page];
+  this->stats.regions--;
+  if (--page.regions == 0) {
+    SDL_DestroyTexture(page.texture);
+    page = Page();
+    this->stats.pages--;
+  }
+}
+
+bool TextureAtlas::place(Page &page, int width, int height, SDL_Rect &rect) {
+  int x = page.shelf_x;
+  int y = page.shelf_y;
+  int shelf_height = page.shelf_height;
+  if (x + width > PAGE_SIZE) {
+    // Start a new shelf below the current one
+    y += shelf_height + PADDING;
+    x = 0;
+    shelf_height = 0;
+  }
+  if (y + height > PAGE_SIZE) {
+    return false;
+  }
+  rect = {x, y, width, height};
+  page.shelf_x = x + width + PADDING;
+  page.shelf_y = y;
+  page.shelf_height = std::max(shelf_height, height);
+  return true;
+}
+
+int TextureAtlas::newPage(SDL_Renderer * renderer) {
+  SDL_Texture * texture = SDL_CreateTexture(renderer, SDL_PIXELFORMAT_RGBA32, SDL_TEXTUREACCESS_STATIC, PAGE_SIZE, PAGE_SIZE);
+  if (texture == nullptr) {
+    SDL_LogError(SDL_LOG_CATEGORY_APPLICATION, "Could not create atlas page: %s", SDL_GetError());
+    return -1;
+  }
+  SDL_SetTextureBlendMode(texture, SDL_BLENDMODE_BLEND);
+  // Padding has to be transparent, and textures start out undefined
+  std::vector<uint32_t> clear((size_t) PAGE_SIZE * PAGE_SIZE, 0);
+  SDL_UpdateTexture(texture, NULL, clear.data(), PAGE_SIZE * 4);
+
+  auto unused = std::find_if(this->pages.begin(), this->pages.end(), [](const Page &page) { return page.texture == nullptr; });
+  if (unused == this->pages.end()) {
+    unused = this->pages.insert(this->pages.end(), Page());
+  }
+  unused->renderer = renderer;
+  unused->texture = texture;
+  this->stats.pages++;
+  return (int) (unused - this->pages.begin());
+}
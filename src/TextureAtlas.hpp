@@ -0,0 +1,67 @@
+#ifndef TEXTURE_ATLAS_HPP
+#define TEXTURE_ATLAS_HPP
+
+#include <cstddef>
+#include <vector>
+
+#include <SDL2/SDL.h>
+
+// Part of a texture holding one image. Images from the atlas share their
+// texture with others on the same page; page is -1 for an image too big for
+// a page, which has its texture to itself.
+struct TextureRegion {
+  SDL_Texture * texture = nullptr;
+  SDL_Rect rect = {0, 0, 0, 0};
+  int page = -1;
+
+  explicit operator bool() const { return this->texture != nullptr; }
+};
+
+// Packs small images (animation frames, UI pieces) into shared page
+// textures, so drawing many of them in a row needs no texture switch and
+// can be batched. Images are placed on shelves: left to right in rows as
+// tall as the tallest image in them, which suits frames of one animation
+// having the same size. Space is not reused image by image; a page is
+// destroyed once every image on it has been released.
+class TextureAtlas {
+public:
+  struct Stats {
+    size_t pages = 0;
+    size_t regions = 0;    // On pages
+    size_t standalone = 0; // Too big for a page
+  };
+
+  static const int PAGE_SIZE = 1024;
+  static const int MAX_IMAGE_SIZE = 256;
+
+  TextureAtlas() = default;
+  ~TextureAtlas();
+  TextureAtlas(const TextureAtlas &) = delete;
+  TextureAtlas & operator=(const TextureAtlas &) = delete;
+
+  // Uploads surface, which stays the caller's. Empty region on failure.
+  TextureRegion add(SDL_Renderer * renderer, SDL_Surface * surface);
+  void release(const TextureRegion &region);
+  Stats getStats() const { return this->stats; }
+
+private:
+  // Empty pixels left between images so scaled draws never pick up a neighbour
+  static const int PADDING = 1;
+
+  struct Page {
+    SDL_Renderer * renderer = nullptr;
+    SDL_Texture * texture = nullptr; // nullptr once released, for reuse
+    int shelf_x = 0;
+    int shelf_y = 0;
+    int shelf_height = 0;
+    size_t regions = 0;
+  };
+
+  std::vector<Page> pages;
+  Stats stats;
+
+  bool place(Page &page, int width, int height, SDL_Rect &rect);
+  int newPage(SDL_Renderer * renderer);
+};
+
+#endif // TEXTURE_ATLAS_HPP
@@ -0,0 +1,95 @@
+#include "TextureCache.hpp"
+
+TextureCache::TextureCache(TextureAtlas * atlas, size_t budget) : atlas(atlas) {
+  this->stats.budget = budget;
+}
+
+TextureCache::~TextureCache() {
+  for (auto &cached : this->entries) {
+    this->atlas->release(cached.second.region);
+  }
+}
+
+TextureRegion TextureCache::acquire(SDL_Renderer * renderer, uint32_t resource, uint32_t generation) {
+  auto cached = this->entries.find({renderer, resource, generation});
+  if (cached == this->entries.end()) {
+    this->stats.misses++;
+    return {};
+  }
+  this->stats.hits++;
+  cached->second.references++;
+  cached->second.last_used = ++this->clock;
+  return cached->second.region;
+}
+
+TextureRegion TextureCache::add(SDL_Renderer * renderer, uint32_t resource, uint32_t generation, const TextureRegion &region) {
+  Key key = {renderer, resource, generation};
+  Entry &entry = this->entries[key];
+  if (entry.region) {
+    // Someone else cached it first, keep theirs
+    entry.references++;
+    entry.last_used = ++this->clock;
+    this->atlas->release(region);
+    return entry.region;
+  }
+  entry.region = region;
+  entry.bytes = (size_t) region.rect.w * region.rect.h * 4;
+  entry.references = 1;
+  entry.last_used = ++this->clock;
+  this->keys[locate(region)] = key;
+  this->stats.textures++;
+  this->stats.bytes += entry.bytes;
+  this->evict(this->stats.budget);
+  return region;
+}
+
+void TextureCache::release(const TextureRegion &region) {
+  if (!region) {
+    return;
+  }
+  auto key = this->keys.find(locate(region));
+  if (key == this->keys.end()) {
+    this->atlas->release(region);
+    return;
+  }
+  Entry &entry = this->entries[key->second];
+  if (entry.references > 0) {
+    entry.references--;
+  }
+  if (entry.references == 0) {
+    this->evict(this->stats.budget);
+  }
+}
+
+void TextureCache::setBudget(size_t budget) {
+  this->stats.budget = budget;
+  this->evict(budget);
+}
+
+void TextureCache::releaseUnused() {
+  this->evict(0);
+}
+
+TextureCache::Stats TextureCache::getStats() const {
+  return this->stats;
+}
+
+void TextureCache::evict(size_t budget) {
+  while (this->stats.bytes > budget) {
+    auto oldest = this->entries.end();
+    for (auto it = this->entries.begin(); it != this->entries.end(); ++it) {
+      if (it->second.references == 0 && (oldest == this->entries.end() || it->second.last_used < oldest->second.last_used)) {
+        oldest = it;
+      }
+    }
+    if (oldest == this->entries.end()) {
+      return; // Everything left is in use
+    }
+    this->stats.bytes -= oldest->second.bytes;
+    this->stats.textures--;
+    this->stats.evictions++;
+    this->keys.erase(locate(oldest->second.region));
+    this->atlas->release(oldest->second.region);
+    this->entries.erase(oldest);
+  }
+}
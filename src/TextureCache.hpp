@@ -0,0 +1,100 @@
+#ifndef TEXTURE_CACHE_HPP
+#define TEXTURE_CACHE_HPP
+
+#include <cstddef>
+#include <cstdint>
+#include <functional>
+#include <unordered_map>
+
+#include <SDL2/SDL.h>
+
+#include "TextureAtlas.hpp"
+
+// Textures decoded from archive images, shared by everything that shows the
+// same image on the same renderer. Each acquire/add takes a reference that
+// release gives back; a texture is only destroyed once nothing references
+// it, least recently used first, when the cached textures take more than the
+// budget. Referenced textures are never evicted, so the budget can be
+// exceeded while they are all in use.
+class TextureCache {
+public:
+  struct Stats {
+    uint64_t hits = 0;
+    uint64_t misses = 0;
+    uint64_t evictions = 0;
+    size_t textures = 0;
+    size_t bytes = 0;
+    size_t budget = 0;
+  };
+
+  static const size_t DEFAULT_BUDGET = 64 * 1024 * 1024;
+
+  // Textures are regions of atlas, which they are given back to
+  TextureCache(TextureAtlas * atlas, size_t budget = DEFAULT_BUDGET);
+  ~TextureCache();
+
+  // Referenced texture cached for (renderer, resource, generation), or empty
+  TextureRegion acquire(SDL_Renderer * renderer, uint32_t resource, uint32_t generation);
+  // Caches a new texture with one reference taken and returns the texture to
+  // use, which is an earlier one if the key was cached meanwhile
+  TextureRegion add(SDL_Renderer * renderer, uint32_t resource, uint32_t generation, const TextureRegion &region);
+  // Gives back a reference; textures not from this cache go back to the atlas
+  void release(const TextureRegion &region);
+
+  void setBudget(size_t budget);
+  // Destroys every texture nothing references
+  void releaseUnused();
+  Stats getStats() const;
+
+private:
+  struct Key {
+    SDL_Renderer * renderer;
+    uint32_t resource;
+    uint32_t generation;
+
+    bool operator==(const Key &other) const {
+      return this->renderer == other.renderer && this->resource == other.resource && this->generation == other.generation;
+    }
+  };
+
+  struct KeyHash {
+    size_t operator()(const Key &key) const {
+      return std::hash<const void *>()(key.renderer) ^ ((size_t) key.resource * 0x9E3779B1u) ^ ((size_t) key.generation << 20);
+    }
+  };
+
+  // Where a region is, which is unique while it is cached
+  struct Location {
+    SDL_Texture * texture;
+    int x;
+    int y;
+
+    bool operator==(const Location &other) const {
+      return this->texture == other.texture && this->x == other.x && this->y == other.y;
+    }
+  };
+
+  struct LocationHash {
+    size_t operator()(const Location &location) const {
+      return std::hash<const void *>()(location.texture) ^ ((size_t) location.x * 0x9E3779B1u) ^ ((size_t) location.y << 16);
+    }
+  };
+
+  struct Entry {
+    TextureRegion region;
+    size_t bytes = 0;
+    int references = 0;
+    uint64_t last_used = 0;
+  };
+
+  TextureAtlas * atlas;
+  std::unordered_map<Key, Entry, KeyHash> entries;
+  std::unordered_map<Location, Key, LocationHash> keys;
+  uint64_t clock = 0;
+  Stats stats;
+
+  void evict(size_t budget);
+  static Location locate(const TextureRegion &region) { return {region.texture, region.rect.x, region.rect.y}; }
+};
+
+#endif // TEXTURE_CACHE_HPP
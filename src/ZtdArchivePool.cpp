@@ -0,0 +1,173 @@
+#include "ZtdArchivePool.hpp"
+
+#include <SDL2/SDL.h>
+
+ZtdArchivePool::Handle::Handle(ZtdArchivePool * pool, Entry * entry)
+  : pool(pool), entry(entry), lock(entry->mutex) {}
+
+ZtdArchivePool::Handle::Handle(Handle &&other) noexcept
+  : pool(other.pool), entry(other.entry), lock(std::move(other.lock)) {
+  other.pool = nullptr;
+  other.entry = nullptr;
+}
+
+ZtdArchivePool::Handle &ZtdArchivePool::Handle::operator=(Handle &&other) noexcept {
+  if (this != &other) {
+    this->release();
+    this->pool = other.pool;
+    this->entry = other.entry;
+    this->lock = std::move(other.lock);
+    other.pool = nullptr;
+    other.entry = nullptr;
+  }
+  return *this;
+}
+
+ZtdArchivePool::Handle::~Handle() {
+  this->release();
+}
+
+void ZtdArchivePool::Handle::release() {
+  if (this->entry == nullptr) {
+    return;
+  }
+  if (this->lock.owns_lock()) {
+    this->lock.unlock();
+  }
+  this->pool->checkin(this->entry);
+  this->pool = nullptr;
+  this->entry = nullptr;
+}
+
+zip_int64_t ZtdArchivePool::Handle::locate(std::string_view name) const {
+  if (this->entry == nullptr) {
+    return -1;
+  }
+  auto member = this->entry->members.find(name);
+  return member != this->entry->members.end() ? (zip_int64_t) member->second : -1;
+}
+
+ZtdArchivePool &ZtdArchivePool::instance() {
+  static ZtdArchivePool pool;
+  return pool;
+}
+
+ZtdArchivePool::~ZtdArchivePool() {
+  this->closeAll();
+}
+
+ZtdArchivePool::Handle ZtdArchivePool::checkout(const std::string &ztd_file, int * error) {
+  Entry * entry = nullptr;
+  {
+    std::lock_guard<std::mutex> guard(this->mutex);
+    std::unique_ptr<Entry> &slot = this->entries[ztd_file];
+    if (!slot) {
+      slot = std::make_unique<Entry>();
+      slot->path = ztd_file;
+    }
+    entry = slot.get();
+    entry->users++;
+    entry->last_used = ++this->clock;
+  }
+
+  // Opening happens under the archive's own lock only, so a slow first open
+  // does not hold up reads from archives that are already open
+  Handle handle(this, entry);
+  if (entry->archive == nullptr) {
+    int open_error = 0;
+    entry->archive = zip_open(ztd_file.c_str(), ZIP_RDONLY, &open_error);
+    if (entry->archive == nullptr) {
+      if (error) {
+        *error = open_error;
+      }
+      return Handle();
+    }
+
+    // Names that differ only in case keep the first entry, as the old linear
+    // search did
+    zip_int64_t count = zip_get_num_entries(entry->archive, 0);
+    entry->members.reserve(count > 0 ? (size_t) count : 0);
+    for (zip_int64_t index = 0; index < count; index++) {
+      if (const char * name = zip_get_name(entry->archive, index, 0)) {
+        entry->members.emplace(name, (zip_uint64_t) index);
+      }
+    }
+
+    std::lock_guard<std::mutex> guard(this->mutex);
+    entry->open = true;
+    this->evict();
+  }
+  if (error) {
+    *error = 0;
+  }
+  return handle;
+}
+
+void ZtdArchivePool::checkin(Entry * entry) {
+  std::lock_guard<std::mutex> guard(this->mutex);
+  entry->users--;
+  if (entry->users == 0 && !entry->open) {
+    // Failed open, try again on the next checkout
+    this->entries.erase(entry->path);
+    return;
+  }
+  this->evict();
+}
+
+void ZtdArchivePool::evict() {
+  size_t open = 0;
+  for (auto &item : this->entries) {
+    if (item.second->open) {
+      open++;
+    }
+  }
+
+  while (open > this->max_open) {
+    Entry * oldest = nullptr;
+    for (auto &item : this->entries) {
+      Entry * entry = item.second.get();
+      if (entry->users == 0 && entry->open && (oldest == nullptr || entry->last_used < oldest->last_used)) {
+        oldest = entry;
+      }
+    }
+    if (oldest == nullptr) {
+      return; // Everything over the limit is checked out right now
+    }
+    zip_discard(oldest->archive);
+    this->entries.erase(oldest->path);
+    open--;
+  }
+}
+
+void ZtdArchivePool::setMaxOpen(size_t max_open) {
+  std::lock_guard<std::mutex> guard(this->mutex);
+  this->max_open = max_open > 0 ? max_open : 1;
+  this->evict();
+}
+
+size_t ZtdArchivePool::openCount() {
+  std::lock_guard<std::mutex> guard(this->mutex);
+  size_t open = 0;
+  for (auto &item : this->entries) {
+    if (item.second->open) {
+      open++;
+    }
+  }
+  return open;
+}
+
+void ZtdArchivePool::closeAll() {
+  std::lock_guard<std::mutex> guard(this->mutex);
+  for (auto it = this->entries.begin(); it != this->entries.end();) {
+    Entry * entry = it->second.get();
+    if (entry->users > 0) {
+      SDL_Log("Archive %s is still in use, not closing it", entry->path.c_str());
+      ++it;
+      continue;
+    }
+    if (entry->open) {
+      zip_discard(entry->archive);
+    }
+    it = this->entries.erase(it);
+  }
+}
@@ -0,0 +1,87 @@
+#ifndef ZTD_ARCHIVE_POOL_HPP
+#define ZTD_ARCHIVE_POOL_HPP
+
+#include <cstdint>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <string_view>
+#include <unordered_map>
+
+#include <zip.h>
+
+#include "CaseInsensitive.hpp"
+
+// Keeps ZTD archives open so their central directory is parsed once instead of
+// on every read. A zip_t is not safe to read from two threads at once, so a
+// checkout locks the archive until the Handle goes away; other archives stay
+// available to other threads meanwhile. Unused archives are closed least
+// recently used first when more than max_open are open.
+//
+// Opening an archive also indexes its member names once, so a lookup by name
+// is a hash probe instead of a walk over every entry.
+class ZtdArchivePool {
+private:
+  using MemberIndex = std::unordered_map<std::string, zip_uint64_t, CaseInsensitiveHash, CaseInsensitiveEqual>;
+
+  struct Entry {
+    std::string path;
+    zip_t * archive = nullptr; // Guarded by mutex, like members
+    MemberIndex members;
+    std::mutex mutex;
+    bool open = false;         // Guarded by the pool mutex, mirrors archive != nullptr
+    int users = 0;
+    uint64_t last_used = 0;
+  };
+
+public:
+  class Handle {
+  public:
+    Handle() = default;
+    Handle(Handle &&other) noexcept;
+    Handle &operator=(Handle &&other) noexcept;
+    Handle(const Handle &) = delete;
+    Handle &operator=(const Handle &) = delete;
+    ~Handle();
+
+    zip_t * get() const { return this->entry ? this->entry->archive : nullptr; }
+    explicit operator bool() const { return this->get() != nullptr; }
+
+    // Index of the member with this name (any case), or -1
+    zip_int64_t locate(std::string_view name) const;
+
+  private:
+    friend class ZtdArchivePool;
+    Handle(ZtdArchivePool * pool, Entry * entry);
+    void release();
+
+    ZtdArchivePool * pool = nullptr;
+    Entry * entry = nullptr;
+    std::unique_lock<std::mutex> lock;
+  };
+
+  static ZtdArchivePool &instance();
+
+  ~ZtdArchivePool();
+
+  // Returns an empty Handle and sets error (libzip error code) if the archive
+  // cannot be opened
+  Handle checkout(const std::string &ztd_file, int * error = nullptr);
+
+  void setMaxOpen(size_t max_open);
+  size_t openCount();
+  void closeAll();
+
+private:
+  ZtdArchivePool() = default;
+
+  void checkin(Entry * entry);
+  void evict();
+
+  std::mutex mutex;
+  std::unordered_map<std::string, std::unique_ptr<Entry>> entries;
+  size_t max_open = 64;
+  uint64_t clock = 0;
+};
+
+#endif // ZTD_ARCHIVE_POOL_HPP
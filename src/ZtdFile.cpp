@@ -2,65 +2,116 @@
 
 #include <zip.h>
 #include <stdlib.h>
+#include <string.h>
 
 #include "SDL_image.h"
 
 #include "Utils.hpp"
+#include "ZtdArchivePool.hpp"
+#include "MappedArchive.hpp"
+#include "ZtdStream.hpp"
 
 std::vector<std::string> ZtdFile::getFileList(const std::string &ztd_file) {
   std::vector<std::string> files = std::vector<std::string>();
 
-  if(zip_t * file = zip_open(ztd_file.c_str(), 0, NULL)) {
-    size_t index = 0;
+  if(ZtdArchivePool::Handle file = ZtdArchivePool::instance().checkout(ztd_file)) {
+    zip_int64_t count = zip_get_num_entries(file.get(), 0);
+    files.reserve(count > 0 ? (size_t) count : 0);
+    for (zip_int64_t index = 0; index < count; index++) {
+      if (const char * name = zip_get_name(file.get(), index, 0)) {
+        files.push_back(std::string(name));
+      }
+    }
+  }
+  return files;
+}
+
+std::vector<ZtdFile::FileInfo> ZtdFile::getFileInfoList(const std::string &ztd_file) {
+  std::vector<FileInfo> files = std::vector<FileInfo>();
+
+  if (std::shared_ptr<MappedArchive> archive = MappedArchive::open(ztd_file)) {
+    const std::vector<MappedArchive::Member> &members = archive->getMembers();
+    files.reserve(members.size());
+    for (size_t index = 0; index < members.size(); index++) {
+      files.push_back({std::string(members[index].name), (uint32_t) index, members[index].size, members[index].compression});
+    }
+    return files;
+  }
+
+  if(ZtdArchivePool::Handle file = ZtdArchivePool::instance().checkout(ztd_file)) {
+    zip_int64_t count = zip_get_num_entries(file.get(), 0);
+    files.reserve(count > 0 ? (size_t) count : 0);
     struct zip_stat finfo;
     zip_stat_init(&finfo);
-    while ((zip_stat_index(file, index, 0, &finfo)) == 0) {
-      files.push_back(std::string(finfo.name));
-      index++;
+    for (zip_int64_t index = 0; index < count; index++) {
+      if (zip_stat_index(file.get(), index, 0, &finfo) == 0) {
+        files.push_back({std::string(finfo.name), (uint32_t) index, (uint32_t) finfo.size, (uint16_t) finfo.comp_method});
+      }
     }
-    zip_close(file);
   }
   return files;
 }
 
-void * ZtdFile::getFileContent(const std::string &ztd_file, const std::string &file_name, int * size) {
-  void * content = NULL;
+MemberData ZtdFile::getFileData(const std::string &ztd_file, const std::string &file_name, int64_t index) {
+  if (std::shared_ptr<MappedArchive> archive = MappedArchive::open(ztd_file)) {
+    if (index < 0) {
+      index = archive->locate(file_name);
+    }
+    if (index < 0) {
+      return MemberData();
+    }
+    if (MemberData data = archive->read(index)) {
+      return data;
+    }
+    // Not something the mapped reader handles, let libzip try
+  }
+
   int error = 0;
-  if(zip_t * file = zip_open(ztd_file.c_str(), 0, &error)) {
-    int index = 0;
+  if(ZtdArchivePool::Handle file = ZtdArchivePool::instance().checkout(ztd_file, &error)) {
+    if (index < 0) {
+      index = file.locate(file_name);
+    }
     struct zip_stat finfo;
     zip_stat_init(&finfo);
-    while ((zip_stat_index(file, index, 0, &finfo)) == 0) {
-      if(Utils::string_to_lower(std::string(finfo.name)) == Utils::string_to_lower(file_name)) {
-        content = calloc(finfo.size + 1, sizeof(uint8_t));
-        zip_file_t * fd = zip_fopen_index(file, index, 0);
-        zip_fread(fd, content, finfo.size);
+    if (index >= 0 && zip_stat_index(file.get(), index, 0, &finfo) == 0) {
+      BufferPool::Buffer buffer = BufferPool::instance().acquire(finfo.size > 0 ? finfo.size : 1);
+      zip_file_t * fd = zip_fopen_index(file.get(), index, 0);
+      zip_int64_t read = fd ? zip_fread(fd, buffer.data(), finfo.size) : -1;
+      if (fd) {
         zip_fclose(fd);
-        if (size) {
-          *size =  finfo.size;
-        }
-        break;
       }
-      index++;
+      if (read == (zip_int64_t) finfo.size) {
+        return MemberData(std::move(buffer), finfo.size);
+      }
     }
-    zip_close(file);
   }
   if (error != 0) {
     SDL_Log("Could not open file %s, got error %i", ztd_file.c_str(), error);
     exit(1);
   }
+  return MemberData();
+}
+
+void * ZtdFile::getFileContent(const std::string &ztd_file, const std::string &file_name, int * size, int64_t index) {
+  MemberData data = ZtdFile::getFileData(ztd_file, file_name, index);
+  if (!data) {
+    return NULL;
+  }
+  void * content = calloc(data.size() + 1, sizeof(uint8_t));
+  memcpy(content, data.data(), data.size());
+  if (size) {
+    *size = (int) data.size();
+  }
   return content;
 }
 
-SDL_Surface * ZtdFile::getImageSurfaceBmp(const std::string &ztd_file, const std::string &file_name) {
+SDL_Surface * ZtdFile::getImageSurfaceBmp(const std::string &ztd_file, const std::string &file_name, int64_t index) {
   SDL_Surface * surface = NULL;
-  int file_size = 0;
 
-  void * file_content = ZtdFile::getFileContent(ztd_file, file_name, &file_size);
-  if (file_content) {
-    SDL_RWops * rw = SDL_RWFromMem(file_content, file_size);
+  MemberData file_data = ZtdFile::getFileData(ztd_file, file_name, index);
+  if (file_data) {
+    SDL_RWops * rw = SDL_RWFromConstMem(file_data.data(), (int) file_data.size());
     surface = IMG_LoadTyped_RW(rw, 1, "BMP");
-    free(file_content);
   } else {
     SDL_Log("Could not load content of file %s in %s", file_name.c_str(), ztd_file.c_str());
     return nullptr; // [PATCH] Don't crash on missing files
@@ -69,15 +120,13 @@ SDL_Surface * ZtdFile::getImageSurfaceBmp(const std::string &ztd_file, const std
   return surface;
 }
 
-SDL_Surface * ZtdFile::getImageSurfaceTga(const std::string &ztd_file, const std::string &file_name) {
+SDL_Surface * ZtdFile::getImageSurfaceTga(const std::string &ztd_file, const std::string &file_name, int64_t index) {
   SDL_Surface * surface = NULL;
-  int file_size = 0;
 
-  void * file_content = ZtdFile::getFileContent(ztd_file, file_name, &file_size);
-  if (file_content) {
-    SDL_RWops * rw = SDL_RWFromMem(file_content, file_size);
+  MemberData file_data = ZtdFile::getFileData(ztd_file, file_name, index);
+  if (file_data) {
+    SDL_RWops * rw = SDL_RWFromConstMem(file_data.data(), (int) file_data.size());
     surface = IMG_LoadTyped_RW(rw, 1, "TGA");
-    free(file_content);
   } else {
     SDL_Log("Could not load content of file %s in %s", file_name.c_str(), ztd_file.c_str());
     return nullptr; // [PATCH] Don't crash on missing files
@@ -86,15 +135,13 @@ SDL_Surface * ZtdFile::getImageSurfaceTga(const std::string &ztd_file, const std
   return surface;
 }
 
-SDL_Surface * ZtdFile::getImageSurfaceZt1(const std::string &ztd_file, const std::string &file_name) {
+SDL_Surface * ZtdFile::getImageSurfaceZt1(const std::string &ztd_file, const std::string &file_name, int64_t index) {
   SDL_Surface * surface = NULL;
-  int file_size = 0;
 
-  void * file_content = ZtdFile::getFileContent(ztd_file, file_name, &file_size);
-  if (file_content) {
-    SDL_RWops * rw = SDL_RWFromMem(file_content, file_size);
+  MemberData file_data = ZtdFile::getFileData(ztd_file, file_name, index);
+  if (file_data) {
+    SDL_RWops * rw = SDL_RWFromConstMem(file_data.data(), (int) file_data.size());
     surface = IMG_Load_RW(rw, 1);
-    free(file_content);
   } else {
     SDL_Log("Could not load content of file %s in %s", file_name.c_str(), ztd_file.empty() ? "unknown ztd file" : ztd_file.c_str());
     return nullptr; // [PATCH] Don't crash on missing files
@@ -103,17 +150,17 @@ SDL_Surface * ZtdFile::getImageSurfaceZt1(const std::string &ztd_file, const std
   return surface;
 }
 
-SDL_Surface * ZtdFile::getImageSurface(const std::string &ztd_file, const std::string &file_name) {
+SDL_Surface * ZtdFile::getImageSurface(const std::string &ztd_file, const std::string &file_name, int64_t index) {
   SDL_Surface * surface = nullptr;
 
   std::string file_extension = Utils::getFileExtension(file_name);
   if(file_extension == "BMP"){
-    surface = ZtdFile::getImageSurfaceBmp(ztd_file, file_name);
+    surface = ZtdFile::getImageSurfaceBmp(ztd_file, file_name, index);
   } else if (file_extension == "TGA") {
-    surface = ZtdFile::getImageSurfaceTga(ztd_file, file_name);
+    surface = ZtdFile::getImageSurfaceTga(ztd_file, file_name, index);
   } else if (file_extension.empty()){
     SDL_Log("Encountered Zoo Tycoon format image file %s", file_name.c_str());
-    surface = ZtdFile::getImageSurfaceZt1(ztd_file, file_name);
+    surface = ZtdFile::getImageSurfaceZt1(ztd_file, file_name, index);
   } else {
     SDL_Log("Unkown image file extension %s for file %s, returning nullptr", file_extension.c_str(), file_name.c_str());
   }
@@ -121,14 +168,12 @@ SDL_Surface * ZtdFile::getImageSurface(const std::string &ztd_file, const std::s
   return surface;
 }
 
-Mix_Music * ZtdFile::getMusic(const std::string &ztd_file, const std::string &file_name) {
+Mix_Music * ZtdFile::getMusic(const std::string &ztd_file, const std::string &file_name, int64_t index) {
   Mix_Music * music = NULL;
-  int file_size = 0;
-  Mix_MusicType music_type = MUS_WAV;
 
-  void * file_content = ZtdFile::getFileContent(ztd_file, file_name, &file_size);
-  if (file_content) {
-    SDL_RWops * rw = SDL_RWFromMem(file_content, file_size);
+  // Streamed from the archive for as long as it plays; Mix_FreeMusic closes it
+  SDL_RWops * rw = ZtdStream::open(ztd_file, file_name, index);
+  if (rw) {
     music = Mix_LoadMUSType_RW(rw, MUS_WAV, 1);
   } else {
     SDL_Log("Could not load content of file %s in %s", file_name.c_str(), ztd_file.c_str());
@@ -138,17 +183,13 @@ Mix_Music * ZtdFile::getMusic(const std::string &ztd_file, const std::string &fi
   return music;
 }
 
-IniReader * ZtdFile::getIniReader(const std::string &ztd_file, const std::string &file_name)
+IniReader * ZtdFile::getIniReader(const std::string &ztd_file, const std::string &file_name, int64_t index)
 {
-  int file_size = 0;
-  void * file_content = ZtdFile::getFileContent(ztd_file, file_name, &file_size);
-  if (file_content) {
-    return new IniReader(file_content, file_size);
+  MemberData file_data = ZtdFile::getFileData(ztd_file, file_name, index);
+  if (file_data) {
+    return new IniReader(file_data.span());
   } else {
     SDL_Log("Could not load content of file %s in %s", file_name.c_str(), ztd_file.c_str());
     return nullptr; // [PATCH] Don't crash on missing files
   }
-
-  SDL_LogCritical(SDL_LOG_CATEGORY_APPLICATION, "Could not load ini file %s", file_name.c_str());
-  exit(8);
 }
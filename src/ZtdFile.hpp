@@ -3,23 +3,41 @@
 
 #include <vector>
 #include <string>
+#include <cstdint>
 
 #include <SDL.h>
 #include "SDL_mixer.h"
 
 #include "IniReader.hpp"
+#include "MemberData.hpp"
 
+// index is the member's position in the archive when the caller already knows
+// it (ResourceIndex); -1 looks the member up by file_name instead.
+//
+// Archives are read through MappedArchive; libzip (ZtdArchivePool) handles
+// whatever that cannot. getFileData is the copy-free way to read a member,
+// getFileContent returns a malloc'd copy the caller frees. Music is streamed
+// (ZtdStream) rather than loaded.
 class ZtdFile {
 public:
+    struct FileInfo {
+        std::string name;
+        uint32_t index;
+        uint32_t size;
+        uint16_t compression;
+    };
+
     static std::vector<std::string> getFileList(const std::string &ztd_file);
-    static void * getFileContent(const std::string &ztd_file, const std::string &file_name, int * size);
-    static SDL_Surface * getImageSurface(const std::string &ztd_file, const std::string &file_name);
-    static Mix_Music * getMusic(const std::string &ztd_file, const std::string &file_name);
-    static IniReader * getIniReader(const std::string &ztd_file, const std::string &file_name);
+    static std::vector<FileInfo> getFileInfoList(const std::string &ztd_file);
+    static MemberData getFileData(const std::string &ztd_file, const std::string &file_name, int64_t index = -1);
+    static void * getFileContent(const std::string &ztd_file, const std::string &file_name, int * size, int64_t index = -1);
+    static SDL_Surface * getImageSurface(const std::string &ztd_file, const std::string &file_name, int64_t index = -1);
+    static Mix_Music * getMusic(const std::string &ztd_file, const std::string &file_name, int64_t index = -1);
+    static IniReader * getIniReader(const std::string &ztd_file, const std::string &file_name, int64_t index = -1);
 private:
-    static SDL_Surface * getImageSurfaceBmp(const std::string &ztd_file, const std::string &file_name);
-    static SDL_Surface * getImageSurfaceTga(const std::string &ztd_file, const std::string &file_name);
-    static SDL_Surface * getImageSurfaceZt1(const std::string &ztd_file, const std::string &file_name);
+    static SDL_Surface * getImageSurfaceBmp(const std::string &ztd_file, const std::string &file_name, int64_t index);
+    static SDL_Surface * getImageSurfaceTga(const std::string &ztd_file, const std::string &file_name, int64_t index);
+    static SDL_Surface * getImageSurfaceZt1(const std::string &ztd_file, const std::string &file_name, int64_t index);
 };
 
 #endif // ZTD_FILE_HPP
\ No newline at end of file
@@ -0,0 +1,265 @@
+#include "ZtdStream.hpp"
+
+#include <algorithm>
+#include <memory>
+#include <string.h>
+
+#include <zip.h>
+#include <zlib.h>
+
+#include "MappedArchive.hpp"
+
+namespace {
+  // One open member. read() continues from position; skipTo() moves without
+  // reading when the member allows it.
+  class Stream {
+  public:
+    virtual ~Stream() = default;
+
+    virtual size_t read(void * out, size_t bytes) = 0;
+    virtual bool rewind() = 0;
+    virtual bool skipTo(Sint64 target) { (void) target; return false; }
+
+    Sint64 seek(Sint64 target) {
+      target = std::clamp<Sint64>(target, 0, this->size);
+      if (target == this->position || this->skipTo(target)) {
+        return this->position = target;
+      }
+      if (target < this->position && !this->rewind()) {
+        return -1;
+      }
+      uint8_t scratch[4096];
+      while (this->position < target) {
+        size_t step = (size_t) std::min<Sint64>(target - this->position, sizeof(scratch));
+        if (this->read(scratch, step) != step) {
+          return -1;
+        }
+      }
+      return this->position;
+    }
+
+    Sint64 size = 0;
+    Sint64 position = 0;
+  };
+
+  class MappedStream : public Stream {
+  public:
+    MappedStream(std::shared_ptr<MappedArchive> archive, const uint8_t * data, const MappedArchive::Member &member)
+      : archive(std::move(archive)), data(data), compressed_size(member.compressed_size), deflated(member.compression == ZIP_CM_DEFLATE) {
+      this->size = member.size;
+    }
+
+    ~MappedStream() {
+      if (this->inflating) {
+        inflateEnd(&this->stream);
+      }
+    }
+
+    bool start() {
+      if (!this->deflated) {
+        return true;
+      }
+      this->inflating = inflateInit2(&this->stream, -MAX_WBITS) == Z_OK;
+      return this->inflating && this->rewind();
+    }
+
+    size_t read(void * out, size_t bytes) override {
+      bytes = (size_t) std::min<Sint64>(bytes, this->size - this->position);
+      if (!this->deflated) {
+        memcpy(out, this->data + this->position, bytes);
+        this->position += bytes;
+        return bytes;
+      }
+
+      this->stream.next_out = (Bytef *) out;
+      this->stream.avail_out = (uInt) bytes;
+      while (this->stream.avail_out > 0) {
+        int result = inflate(&this->stream, Z_NO_FLUSH);
+        if (result == Z_STREAM_END) {
+          break;
+        }
+        if (result != Z_OK) {
+          SDL_SetError("zlib error %i while streaming", result);
+          break;
+        }
+      }
+      size_t inflated = bytes - this->stream.avail_out;
+      this->position += inflated;
+      return inflated;
+    }
+
+    bool rewind() override {
+      if (this->deflated) {
+        if (inflateReset(&this->stream) != Z_OK) {
+          return false;
+        }
+        this->stream.next_in = (Bytef *) this->data;
+        this->stream.avail_in = this->compressed_size;
+      }
+      this->position = 0;
+      return true;
+    }
+
+    bool skipTo(Sint64 target) override {
+      if (this->deflated) {
+        return false;
+      }
+      this->position = target;
+      return true;
+    }
+
+  private:
+    std::shared_ptr<MappedArchive> archive; // Keeps data mapped
+    const uint8_t * data;
+    uint32_t compressed_size;
+    bool deflated;
+    bool inflating = false;
+    z_stream stream = {};
+  };
+
+  class ZipStream : public Stream {
+  public:
+    ~ZipStream() {
+      if (this->file) {
+        zip_fclose(this->file);
+      }
+      if (this->archive) {
+        zip_discard(this->archive);
+      }
+    }
+
+    bool start(const std::string &ztd_file, const std::string &file_name, int64_t index) {
+      int error = 0;
+      this->archive = zip_open(ztd_file.c_str(), ZIP_RDONLY, &error);
+      if (this->archive == nullptr) {
+        SDL_SetError("Could not open %s, got error %i", ztd_file.c_str(), error);
+        return false;
+      }
+      if (index < 0) {
+        index = zip_name_locate(this->archive, file_name.c_str(), ZIP_FL_NOCASE);
+      }
+      struct zip_stat finfo;
+      zip_stat_init(&finfo);
+      if (index < 0 || zip_stat_index(this->archive, index, 0, &finfo) != 0) {
+        SDL_SetError("No member %s in %s", file_name.c_str(), ztd_file.c_str());
+        return false;
+      }
+      this->index = (zip_uint64_t) index;
+      this->size = (Sint64) finfo.size;
+      return this->rewind();
+    }
+
+    size_t read(void * out, size_t bytes) override {
+      bytes = (size_t) std::min<Sint64>(bytes, this->size - this->position);
+      zip_int64_t read = bytes > 0 ? zip_fread(this->file, out, bytes) : 0;
+      if (read < 0) {
+        SDL_SetError("%s", zip_strerror(this->archive));
+        return 0;
+      }
+      this->position += read;
+      return (size_t) read;
+    }
+
+    bool rewind() override {
+      if (this->file) {
+        zip_fclose(this->file);
+      }
+      this->file = zip_fopen_index(this->archive, this->index, 0);
+      this->position = 0;
+      return this->file != nullptr;
+    }
+
+    bool skipTo(Sint64 target) override {
+      if (zip_file_is_seekable(this->file) != 1 || zip_fseek(this->file, target, SEEK_SET) != 0) {
+        return false;
+      }
+      this->position = target;
+      return true;
+    }
+
+  private:
+    zip_t * archive = nullptr;
+    zip_file_t * file = nullptr;
+    zip_uint64_t index = 0;
+  };
+
+  Stream * streamOf(SDL_RWops * rw) {
+    return (Stream *) rw->hidden.unknown.data1;
+  }
+
+  Sint64 SDLCALL streamSize(SDL_RWops * rw) {
+    return streamOf(rw)->size;
+  }
+
+  Sint64 SDLCALL streamSeek(SDL_RWops * rw, Sint64 offset, int whence) {
+    Stream * stream = streamOf(rw);
+    switch (whence) {
+      case RW_SEEK_SET: return stream->seek(offset);
+      case RW_SEEK_CUR: return stream->seek(stream->position + offset);
+      case RW_SEEK_END: return stream->seek(stream->size + offset);
+      default: return SDL_SetError("Unknown seek origin %i", whence);
+    }
+  }
+
+  size_t SDLCALL streamRead(SDL_RWops * rw, void * ptr, size_t size, size_t maxnum) {
+    if (size == 0) {
+      return 0;
+    }
+    return streamOf(rw)->read(ptr, size * maxnum) / size;
+  }
+
+  size_t SDLCALL streamWrite(SDL_RWops * rw, const void * ptr, size_t size, size_t num) {
+    (void) rw; (void) ptr; (void) size; (void) num;
+    SDL_SetError("Archive streams are read-only");
+    return 0;
+  }
+
+  int SDLCALL streamClose(SDL_RWops * rw) {
+    delete streamOf(rw);
+    SDL_FreeRW(rw);
+    return 0;
+  }
+}
+
+SDL_RWops * ZtdStream::open(const std::string &ztd_file, const std::string &file_name, int64_t index) {
+  std::unique_ptr<Stream> stream;
+
+  if (std::shared_ptr<MappedArchive> archive = MappedArchive::open(ztd_file)) {
+    if (index < 0) {
+      index = archive->locate(file_name);
+    }
+    if (index < 0 || (size_t) index >= archive->getMembers().size()) {
+      return nullptr;
+    }
+    const MappedArchive::Member &member = archive->getMembers()[index];
+    const uint8_t * data = archive->getRawData(index);
+    bool readable = (member.compression == ZIP_CM_STORE && member.compressed_size == member.size) || member.compression == ZIP_CM_DEFLATE;
+    if (data && readable) {
+      std::unique_ptr<MappedStream> mapped(new MappedStream(std::move(archive), data, member));
+      if (mapped->start()) {
+        stream = std::move(mapped);
+      }
+    }
+  }
+
+  if (!stream) {
+    std::unique_ptr<ZipStream> zipped(new ZipStream());
+    if (!zipped->start(ztd_file, file_name, index)) {
+      return nullptr;
+    }
+    stream = std::move(zipped);
+  }
+
+  SDL_RWops * rw = SDL_AllocRW();
+  if (rw == nullptr) {
+    return nullptr;
+  }
+  rw->type = SDL_RWOPS_UNKNOWN;
+  rw->size = streamSize;
+  rw->seek = streamSeek;
+  rw->read = streamRead;
+  rw->write = streamWrite;
+  rw->close = streamClose;
+  rw->hidden.unknown.data1 = stream.release();
+  return rw;
+}
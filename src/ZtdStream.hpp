@@ -0,0 +1,25 @@
+#ifndef ZTD_STREAM_HPP
+#define ZTD_STREAM_HPP
+
+#include <cstdint>
+#include <string>
+
+#include <SDL2/SDL.h>
+
+// Read-only SDL_RWops over one archive member, for assets that are consumed
+// sequentially (music) and should not be loaded whole. Stored members read
+// straight from the archive mapping; deflated members are inflated as they
+// are read, through zlib's 32KB window. Seeking forward skips ahead, seeking
+// backwards in a deflated member restarts it from the beginning, which is
+// cheap for the usual case of a loop going back to the start of the data.
+//
+// Archives the mapped reader cannot handle are streamed through their own
+// libzip handle, so a long-playing stream never holds a ZtdArchivePool lock.
+class ZtdStream {
+public:
+  // nullptr if the member cannot be opened. Closing the RWops (or handing it
+  // to SDL with freesrc set) releases everything.
+  static SDL_RWops * open(const std::string &ztd_file, const std::string &file_name, int64_t index = -1);
+};
+
+#endif // ZTD_STREAM_HPP
@@ -1,4 +1,6 @@
-#define SDL_MAIN_HANDLED  // Tell SDL we handle our own main()
+#ifndef SDL_MAIN_HANDLED
+#define SDL_MAIN_HANDLED  // Tell SDL we handle our own main() (also set in CMakeLists.txt for PCH/unity builds)
+#endif
 
 #include <SDL2/SDL.h>
 
@@ -178,6 +180,7 @@ int main(int argc, char *argv[]) {
   UiAction action = UiAction::NONE;
   while (running > 0) {
     window.clear();
+    resource_manager.beginFrame();
     inputs = input_manager.getInputs();
     for (Input input : inputs) {
       if (input.event == InputEvent::QUIT) {
@@ -250,6 +253,7 @@ int main(int argc, char *argv[]) {
         break;
     }
     layout->draw(window.renderer, NULL);
+    resource_manager.flushDraws();
 
     window.present();
   }
@@ -257,6 +261,9 @@ int main(int argc, char *argv[]) {
   // Cleanup
   delete g_scenarioManager;
   delete layout;
+  // Cached textures go before the renderer does
+  resource_manager.releaseUnusedAnimations();
+  resource_manager.releaseUnusedTextures();
 
   return 0;
 }
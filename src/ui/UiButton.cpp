@@ -2,6 +2,20 @@
 
 #include "../CompassDirection.hpp"
 
+// Colors are three list entries (r, g, b) in the layout
+static SDL_Color getColor(IniReader * ini_reader, const std::string &name, const std::string &key) {
+  std::vector<std::string> color_values = ini_reader->getList(name, key);
+  if (color_values.size() != 3) {
+    return {0, 0, 0, 255};
+  }
+  return {
+    (uint8_t) std::stoi(color_values[0]),
+    (uint8_t) std::stoi(color_values[1]),
+    (uint8_t) std::stoi(color_values[2]),
+    255,
+  };
+}
+
 UiButton::UiButton(IniReader * ini_reader, ResourceManager * resource_manager, std::string name) {
   this->ini_reader = ini_reader;
   this->resource_manager = resource_manager;
@@ -12,6 +26,12 @@ UiButton::UiButton(IniReader * ini_reader, ResourceManager * resource_manager, s
   this->anchor = ini_reader->getInt(name, "anchor", 0);
 
   this->has_select_color = !ini_reader->get(name, "selectcolor", "").empty();
+  this->fore_color = getColor(ini_reader, name, "forecolor");
+  if (this->has_select_color && !ini_reader->getList(name, "selectcolor").empty()) {
+    this->select_color = getColor(ini_reader, name, "selectcolor");
+  } else {
+    this->select_color = this->fore_color;
+  }
 
   this->font = ini_reader->getInt(name, "font");
 
@@ -25,9 +45,9 @@ UiButton::UiButton(IniReader * ini_reader, ResourceManager * resource_manager, s
 }
 
 UiButton::~UiButton() {
-  SDL_DestroyTexture(text);
+  delete this->animation;
   for (UiElement * child : this->children) {
-    free(child);
+    delete child;
   }
 }
 
@@ -38,17 +58,14 @@ UiAction UiButton::handleInputs(std::vector<Input> &inputs) {
       continue;
     }
     if (input.position.x < this->dest_rect.x || input.position.x > this->dest_rect.x + this->dest_rect.w) {
-      this->selected_updated = true;
       this->selected = false;
       continue;
     }
     if (input.position.y < this->dest_rect.y || input.position.y > this->dest_rect.y + this->dest_rect.h) {
-      this->selected_updated = true;
       this->selected = false;
       continue;
     }
     this->selected = true;
-    this->selected_updated = true;
     switch (input.event) {
       case InputEvent::LEFT_CLICK:
         if(this->ini_reader->getInt(this->name, "action", 0) == 1) {
@@ -72,26 +89,6 @@ UiAction UiButton::handleInputs(std::vector<Input> &inputs) {
 }
 
 void UiButton::draw(SDL_Renderer * renderer, SDL_Rect * layout_rect) {
-  if (!this->text_string.empty() && (this->text == nullptr || (this->selected_updated && this->has_select_color))) {
-    std::vector<std::string> color_values;
-    if (this->selected && this->has_select_color && !ini_reader->getList(name, "selectcolor").empty()) {
-      color_values = ini_reader->getList(name, "selectcolor");
-    } else {
-      color_values = ini_reader->getList(name, "forecolor");
-    }
-    SDL_Color color = {0, 0, 0, 255};
-    if (color_values.size() == 3) {
-      color = {
-        (uint8_t) std::stoi(color_values[0]),
-        (uint8_t) std::stoi(color_values[1]),
-        (uint8_t) std::stoi(color_values[2]),
-        255,
-      };
-    }
-    this->text = this->resource_manager->getStringTexture(renderer, this->font, this->text_string, color);
-    this->shadow = this->resource_manager->getStringTexture(renderer, this->font, this->text_string, {0, 0, 0, 255});
-  }
-
   dest_rect = this->getRect(this->ini_reader->getSection(this->name), layout_rect);
   SDL_Rect text_rect = {dest_rect.x, dest_rect.y, 0, 0};
   if (this->animation != nullptr) {
@@ -104,7 +101,11 @@ void UiButton::draw(SDL_Renderer * renderer, SDL_Rect * layout_rect) {
     }
   }
 
-  SDL_QueryTexture(this->text, NULL, NULL, &text_rect.w, &text_rect.h);
+  if (!this->text_string.empty()) {
+    SDL_Point size = this->resource_manager->measureText(this->font, this->text_string);
+    text_rect.w = size.x;
+    text_rect.h = size.y;
+  }
   if (this->ini_reader->get(this->name, "justify") == "center") {
     text_rect.x -= text_rect.w / 2;
     text_rect.y -= text_rect.h / 2;
@@ -115,10 +116,11 @@ void UiButton::draw(SDL_Renderer * renderer, SDL_Rect * layout_rect) {
     dest_rect = text_rect;
   }
 
-  shadow_rect = {text_rect.x - 1, text_rect.y + 1, text_rect.w, text_rect.h};
-  SDL_RenderCopy(renderer, this->shadow, NULL, &shadow_rect);
-
-  SDL_RenderCopy(renderer, this->text, NULL, &text_rect);
+  if (!this->text_string.empty()) {
+    SDL_Color color = (this->selected && this->has_select_color) ? this->select_color : this->fore_color;
+    this->resource_manager->drawText(renderer, this->font, this->text_string, text_rect.x - 1, text_rect.y + 1, {0, 0, 0, 255});
+    this->resource_manager->drawText(renderer, this->font, this->text_string, text_rect.x, text_rect.y, color);
+  }
   this->drawChildren(renderer, &dest_rect);
 }
 
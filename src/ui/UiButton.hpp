@@ -20,15 +20,13 @@ public:
 
 private:
   std::string text_string = "";
-  SDL_Texture * text = nullptr;
-  SDL_Texture * shadow = nullptr;
   int font = 0;
   Animation * animation = nullptr;
   bool selected = false;
-  bool selected_updated = false;
   bool has_select_color = false;
+  SDL_Color fore_color = {0, 0, 0, 255};
+  SDL_Color select_color = {0, 0, 0, 255};
   SDL_Rect dest_rect = {0, 0, 0, 0};
-  SDL_Rect shadow_rect = {0, 0, 0, 0};
 
   UiAction getActionBasedOnName();
 };
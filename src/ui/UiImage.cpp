@@ -27,14 +27,10 @@ UiImage::UiImage(IniReader * ini_reader, ResourceManager * resource_manager, std
 }
 
 UiImage::~UiImage() {
-  if (this->image) {
-    SDL_DestroyTexture(this->image);
-  }
-  if (this->animation) {
-    free(animation);
-  }
+  this->resource_manager->releaseTexture(this->image);
+  delete this->animation;
   for (UiElement * child : this->children) {
-    free(child);
+    delete child;
   }
 }
 
@@ -45,10 +41,18 @@ UiAction UiImage::handleInputs(std::vector<Input> &inputs) {
 void UiImage::draw(SDL_Renderer *renderer, SDL_Rect * layout_rect) {
   if (!this->image && !this->animation && !this->image_path.empty()) {
     std::string extension = Utils::getFileExtension(this->image_path);
+    // Resolve the path once; loading again later goes straight to the entry
     if(extension.empty() || extension == "ANI") {
-      this->animation = this->resource_manager->getAnimation(this->image_path);
+      if (this->image_handle) {
+        this->animation = this->resource_manager->getAnimation(this->image_handle);
+      } else {
+        this->animation = this->resource_manager->getAnimation(this->image_path, &this->image_handle);
+      }
     } else {
-      this->image = this->resource_manager->getTexture(renderer, this->image_path);
+      if (!this->image_handle) {
+        this->image_handle = this->resource_manager->resolve(this->image_path);
+      }
+      this->image = this->resource_manager->getTexture(renderer, this->image_handle);
     }
   }
 
@@ -60,12 +64,13 @@ void UiImage::draw(SDL_Renderer *renderer, SDL_Rect * layout_rect) {
   // }
   if (this->image) {
     if (dest_rect.w == 0 || dest_rect.h == 0) {
-      SDL_QueryTexture(this->image, NULL, NULL, &dest_rect.w, &dest_rect.h);
+      dest_rect.w = this->image.rect.w;
+      dest_rect.h = this->image.rect.h;
     }
     if (this->ini_reader->get(this->name, "y") == "bottom") {
       dest_rect.y -= dest_rect.h;
     }
-    SDL_RenderCopy(renderer, this->image, NULL, &dest_rect);
+    this->resource_manager->drawTexture(renderer, this->image, &dest_rect);
   }
   if (this->animation) {
     if (dest_rect.w == 0 || dest_rect.h == 0) {
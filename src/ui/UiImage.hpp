@@ -20,7 +20,8 @@ public:
 
 private:
   std::string image_path = "";
-  SDL_Texture * image = nullptr;
+  ResourceHandle image_handle;
+  TextureRegion image;
   Animation * animation = nullptr;
 };
 
@@ -24,11 +24,9 @@ UiLayout::UiLayout(IniReader *ini_reader, ResourceManager *resource_manager, std
 
 UiLayout::~UiLayout() {
     for (UiElement * element : this->children) {
-      free(element);
-    }
-    if (ini_reader != nullptr) {
-      free(ini_reader);
+      delete element;
     }
+    delete ini_reader;
 }
 
 void UiLayout::draw(SDL_Renderer *renderer, SDL_Rect * layout_rect) {
@@ -75,7 +73,9 @@ void UiLayout::process_sections(IniReader *ini_reader, ResourceManager *resource
       } else {
         for(UiElement * element : children) {
           if (element->hasId(new_element->getAnchor())) {
+            // One owner only, the element is deleted with its parent
             element->addChild(new_element);
+            break;
           } else {
             SDL_Log("id was not found");
           }
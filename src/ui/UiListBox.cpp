@@ -168,6 +168,9 @@ UiAction UiListBox::handleInputs(std::vector<Input>& inputs) {
 }
 
 void UiListBox::draw(SDL_Renderer* renderer, SDL_Rect* layout_rect) {
+    // Images queued before have to be drawn before the rects below
+    resource_manager->flushDraws();
+    
     // Calculate our rectangle
     cached_rect.x = layout_rect->x + x;
     cached_rect.y = layout_rect->y + y;
@@ -187,6 +190,9 @@ void UiListBox::draw(SDL_Renderer* renderer, SDL_Rect* layout_rect) {
     }
     
     // Draw items
+    SDL_Rect previous_clip;
+    SDL_RenderGetClipRect(renderer, &previous_clip);
+    bool clipped = SDL_RenderIsClipEnabled(renderer);
     int item_y = cached_rect.y + border;
     int max_items = std::min(visible_items, (int)items.size() - scroll_offset);
     
@@ -225,28 +231,18 @@ void UiListBox::draw(SDL_Renderer* renderer, SDL_Rect* layout_rect) {
             SDL_RenderFillRect(renderer, &item_rect);
         }
         
-        // Draw text
+        // Draw text, clipped to the item when too long
         if (!item.text.empty()) {
-            SDL_Texture* text_texture = resource_manager->getStringTexture(
-                renderer, font_id, item.text, *fg);
-            
-            if (text_texture) {
-                int tex_w, tex_h;
-                SDL_QueryTexture(text_texture, nullptr, nullptr, &tex_w, &tex_h);
-                
-                SDL_Rect text_rect = {
-                    item_rect.x + 4,
-                    item_rect.y + (item_height - tex_h) / 2,
-                    tex_w,
-                    tex_h
-                };
-                
-                // Clip to item bounds
-                if (text_rect.w > item_rect.w - 8) {
-                    text_rect.w = item_rect.w - 8;
-                }
-                
-                SDL_RenderCopy(renderer, text_texture, nullptr, &text_rect);
+            SDL_Rect text_clip = {item_rect.x + 4, item_rect.y, item_rect.w - 8, item_rect.h};
+            SDL_Point text_size = resource_manager->measureText(font_id, item.text);
+            bool too_long = text_size.x > text_clip.w;
+            if (too_long) {
+                SDL_RenderSetClipRect(renderer, &text_clip);
+            }
+            resource_manager->drawText(renderer, font_id, item.text,
+                text_clip.x, item_rect.y + (item_height - text_size.y) / 2, *fg);
+            if (too_long) {
+                SDL_RenderSetClipRect(renderer, clipped ? &previous_clip : nullptr);
             }
         }
         
@@ -9,6 +9,18 @@ UiText::UiText(IniReader * ini_reader, ResourceManager * resource_manager, std::
   this->anchor = ini_reader->getInt(name, "anchor", 0);
   this->font = ini_reader->getInt(name, "font");
 
+  std::vector<std::string> color_values = ini_reader->getList(name, "forecolor");
+  if (color_values.size() >= 3) {
+    try {
+      this->color = {
+        (uint8_t) std::stoi(color_values[0]),
+        (uint8_t) std::stoi(color_values[1]),
+        (uint8_t) std::stoi(color_values[2]),
+        255,
+      };
+    } catch (...) {}
+  }
+
   uint32_t string_id = (uint32_t) ini_reader->getUnsignedInt(name, "id");
   this->text_string = this->resource_manager->getString(string_id);
   if(this->text_string.empty()) {
@@ -21,25 +33,13 @@ UiText::UiText(IniReader * ini_reader, ResourceManager * resource_manager, std::
 }
 
 UiText::~UiText() {
-  if (text) SDL_DestroyTexture(text);
-  if (shadow) SDL_DestroyTexture(shadow);
   for (UiElement * child : this->children) {
     delete child;
   }
 }
 
 void UiText::setText(const std::string& newText) {
-  if (text_string != newText) {
-    text_string = newText;
-    if (text) {
-      SDL_DestroyTexture(text);
-      text = nullptr;
-    }
-    if (shadow) {
-      SDL_DestroyTexture(shadow);
-      shadow = nullptr;
-    }
-  }
+  text_string = newText;
 }
 
 UiAction UiText::handleInputs(std::vector<Input> &inputs) {
@@ -47,43 +47,33 @@ UiAction UiText::handleInputs(std::vector<Input> &inputs) {
 }
 
 void UiText::draw(SDL_Renderer * renderer, SDL_Rect * layout_rect) {
-  if (!this->text_string.empty() && (!this->text || !this->shadow)) {
-    std::vector<std::string> color_values = ini_reader->getList(name, "forecolor");
-    SDL_Color color = {255, 228, 173, 255};
-    if (color_values.size() >= 3) {
-      try {
-        color = {
-          (uint8_t) std::stoi(color_values[0]),
-          (uint8_t) std::stoi(color_values[1]),
-          (uint8_t) std::stoi(color_values[2]),
-          255,
-        };
-      } catch (...) {}
-    }
-    this->text = this->resource_manager->getStringTexture(renderer, this->font, this->text_string, color);
-    this->shadow = this->resource_manager->getStringTexture(renderer, this->font, this->text_string, {0, 0, 0, 255});
-  }
-
-  if (!this->text) {
+  if (this->text_string.empty()) {
     this->drawChildren(renderer, &dest_rect);
     return;
   }
 
   dest_rect = this->getRect(this->ini_reader->getSection(this->name), layout_rect);
-  SDL_QueryTexture(this->text, NULL, NULL, &dest_rect.w, &dest_rect.h);
+  // Text wider than the layout's dx wraps onto more lines
+  int wrap_width = dest_rect.w;
+  SDL_Point size = this->resource_manager->measureText(this->font, this->text_string, wrap_width);
+  int anchor_x = dest_rect.x;
 
+  FontManager::TextAlign align = FontManager::TextAlign::LEFT;
   if (this->ini_reader->get(this->name, "justify") == "center") {
-    dest_rect.x -= dest_rect.w / 2;
+    align = FontManager::TextAlign::CENTER;
+    dest_rect.x -= size.x / 2;
   } else if (this->ini_reader->get(this->name, "justify") == "right") {
-    dest_rect.x -= dest_rect.w;
+    align = FontManager::TextAlign::RIGHT;
+    dest_rect.x -= size.x;
   }
+  dest_rect.w = size.x;
+  dest_rect.h = size.y;
 
   if (this->ini_reader->get(this->name, "y") == "bottom") {
     dest_rect.y -= dest_rect.h;
   }
 
-  shadow_rect = {dest_rect.x - 1, dest_rect.y + 1, dest_rect.w, dest_rect.h};
-  if (this->shadow) SDL_RenderCopy(renderer, this->shadow, NULL, &shadow_rect);
-  SDL_RenderCopy(renderer, this->text, NULL, &dest_rect);
+  this->resource_manager->drawText(renderer, this->font, this->text_string, anchor_x - 1, dest_rect.y + 1, {0, 0, 0, 255}, wrap_width, align);
+  this->resource_manager->drawText(renderer, this->font, this->text_string, anchor_x, dest_rect.y, this->color, wrap_width, align);
   this->drawChildren(renderer, &dest_rect);
 }
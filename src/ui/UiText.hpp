@@ -18,10 +18,8 @@ public:
   
 private:
   std::string text_string = "";
-  SDL_Texture * text = nullptr;
-  SDL_Texture * shadow = nullptr;
   int font = 0;
+  SDL_Color color = {255, 228, 173, 255};
   SDL_Rect dest_rect = {0, 0, 0, 0};
-  SDL_Rect shadow_rect = {0, 0, 0, 0};
 };
 #endif // UI_TEXT_HPP
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Decoder conformance scan for a Zoo Tycoon 1 installation.
+
+Walks every sprite in every ZTD below a folder on a process pool and records,
+per sprite: frame count (engine walk vs. viewer heuristic), pixels outside the
+frame, pixels the engine clips off the .ani box (Animation::loadSurfaces),
+truncated command streams, palette resolution and decode time.
+
+    python zt_decoder_scan.py "C:/Program Files/Zoo Tycoon" -o scan.csv --sort canvas_violations
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import zt_sprite
+
+COLUMNS = [
+    'archive', 'member', 'bytes', 'frames', 'viewer_frames', 'heuristic_miss',
+    'frame_overruns', 'truncated_frames', 'canvas_violations', 'ani',
+    'palette', 'palette_ok', 'decode_ms', 'error',
+]
+NUMERIC = {'bytes', 'frames', 'viewer_frames', 'frame_overruns', 'truncated_frames',
+           'canvas_violations', 'decode_ms'}
+
+CHUNK_SIZE = 250
+
+# Per worker process state
+_archives = {}
+_palettes = frozenset()
+
+
+def find_archives(root):
+    archives = []
+    for folder, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith('.ztd'):
+                archives.append(os.path.join(folder, name))
+    return archives
+
+
+def open_archive(path):
+    zf = _archives.get(path)
+    if zf is None:
+        zf = _archives[path] = zipfile.ZipFile(path, 'r')
+    return zf
+
+
+def init_worker(palettes):
+    global _palettes
+    _palettes = palettes
+
+
+def index_archive(path):
+    """Phase 1: list sprites and palettes, and resolve .ani files to their boxes."""
+    zf = open_archive(path)
+    sprites = []
+    palettes = []
+    boxes = {}
+    for info in zf.infolist():
+        name = zt_sprite.normalize_name(info.filename)
+        if info.is_dir():
+            continue
+        if name.endswith('.pal'):
+            palettes.append(name)
+        elif name.endswith('.ani'):
+            try:
+                text = zf.read(info).decode('latin-1')
+                width, height, members = zt_sprite.ani_sprites(text)
+            except Exception:
+                continue
+            for member in members:
+                boxes.setdefault(member, (name, width, height))
+        elif zt_sprite.is_sprite_name(info.filename):
+            sprites.append(info.filename)
+    return path, sprites, palettes, boxes
+
+
+def scan_sprite(zf, path, member, box):
+    row = dict.fromkeys(COLUMNS, '')
+    row.update(archive=path, member=member)
+    start = time.perf_counter()
+    try:
+        data = zf.read(member)
+        row['bytes'] = len(data)
+
+        frames = zt_sprite.read_frames(data)
+        viewer = zt_sprite.find_frame_headers(data)
+        row['frames'] = len(frames)
+        row['viewer_frames'] = len(viewer)
+        row['heuristic_miss'] = int(len(viewer) != len(frames))
+
+        overruns = 0
+        truncated = 0
+        for frame in frames:
+            frame_overruns, frame_truncated = zt_sprite.check_frame(data, frame)
+            overruns += frame_overruns
+            truncated += frame_truncated
+        row['frame_overruns'] = overruns
+        row['truncated_frames'] = truncated
+
+        if box:
+            row['ani'] = box[0]
+            row['canvas_violations'] = zt_sprite.canvas_violations(data, frames, box[1], box[2])
+
+        palette = zt_sprite.palette_name(data)
+        row['palette'] = palette or ''
+        # Left empty for sprites without a palette, which is not a failure
+        row['palette_ok'] = int(palette in _palettes) if palette else ''
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+    row['decode_ms'] = round((time.perf_counter() - start) * 1000.0, 3)
+    return row
+
+
+def scan_chunk(task):
+    """Phase 2: decode a slice of one archive's sprites."""
+    path, members, boxes = task
+    zf = open_archive(path)
+    return [scan_sprite(zf, path, member, boxes.get(zt_sprite.normalize_name(member))) for member in members]
+
+
+def sort_rows(rows, key, descending):
+    if key in NUMERIC:
+        return sorted(rows, key=lambda r: r[key] if r[key] != '' else -1, reverse=descending)
+    return sorted(rows, key=lambda r: str(r[key]), reverse=descending)
+
+
+def write_report(rows, output):
+    if output.lower().endswith('.json'):
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=1)
+        return
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decode every sprite in every ZTD and report decoder problems")
+    parser.add_argument('install', help="Zoo Tycoon installation (searched recursively for .ztd files)")
+    parser.add_argument('-o', '--output', default='decoder_scan.csv', help="report file (.csv or .json)")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument('--sort', default='archive', choices=COLUMNS, help="column to sort the report by")
+    parser.add_argument('--asc', action='store_true', help="sort ascending (numeric columns default to descending)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    archives = find_archives(args.install)
+    if not archives:
+        print(f"No .ztd files found in {args.install}")
+        return 1
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        indexed = list(pool.map(index_archive, archives))
+
+    palettes = frozenset(p for _, _, pals, _ in indexed for p in pals)
+    tasks = []
+    for path, sprites, _, boxes in indexed:
+        for i in range(0, len(sprites), CHUNK_SIZE):
+            tasks.append((path, sprites[i:i + CHUNK_SIZE], boxes))
+    # Big chunks first so the pool does not end on a straggler
+    tasks.sort(key=lambda t: len(t[1]), reverse=True)
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker, initargs=(palettes,)) as pool:
+        for done, chunk in enumerate(pool.map(scan_chunk, tasks), 1):
+            rows.extend(chunk)
+            sys.stdout.write(f"\r  Scanned {len(rows)} sprites ({done}/{len(tasks)} chunks)")
+            sys.stdout.flush()
+    print()
+
+    descending = args.sort in NUMERIC and not args.asc
+    rows = sort_rows(rows, args.sort, descending)
+    write_report(rows, args.output)
+
+    def count(pred):
+        return sum(1 for r in rows if pred(r))
+
+    print(f"  Archives:            {len(archives)}")
+    print(f"  Sprites:             {len(rows)}")
+    print(f"  Errors:              {count(lambda r: r['error'])}")
+    print(f"  Heuristic misses:    {count(lambda r: r['heuristic_miss'] == 1)}")
+    print(f"  Frame overruns:      {count(lambda r: r['frame_overruns'] not in ('', 0))}")
+    print(f"  Truncated streams:   {count(lambda r: r['truncated_frames'] not in ('', 0))}")
+    print(f"  Canvas violations:   {count(lambda r: r['canvas_violations'] not in ('', 0))}")
+    print(f"  Unresolved palettes: {count(lambda r: r['palette_ok'] == 0)}")
+    print(f"  No palette:          {count(lambda r: not r['palette'] and not r['error'])}")
+    print(f"  Time:                {time.perf_counter() - start:.1f}s ({args.jobs} workers)")
+    print(f"  Report:              {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Local sprite preview server for Zoo Tycoon 1 ZTD archives.
+
+Serves archive listings, member metadata, decoded PNG frames and animated
+(APNG) previews over HTTP on 127.0.0.1, using the same decoder as the sprite
+viewer (zt_sprite.py). Decoding runs on a process pool; results are kept in an
+in-memory LRU and served with ETags so browsers can revalidate cheaply.
+Stdlib only.
+
+    python zt_preview_server.py "C:/Program Files/Zoo Tycoon" --port 8765
+
+Endpoints (all GET, parameters in the query string):
+    /archives                                   archives below the root
+    /members?archive=A                          members of one archive
+    /meta?archive=A&member=M                    sprite header, palette and frames
+    /frame.png?archive=A&member=M&frame=0&zoom=1
+    /preview.png?archive=A&member=M&zoom=1&delay=100   animated PNG
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import struct
+import sys
+import zipfile
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+import zt_sprite
+
+HOST = "127.0.0.1"
+MAX_ZOOM = 8
+MAX_HEADER_BYTES = 16384
+
+STATUS_TEXT = {
+    200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 500: "Internal Server Error",
+}
+
+
+# === IMAGE ENCODING ===
+
+def _chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def _scanlines(width, height, rgba):
+    stride = width * 4
+    return b''.join(b'\0' + bytes(rgba[y * stride:(y + 1) * stride]) for y in range(height))
+
+
+def _ihdr(width, height):
+    return _chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+
+
+def encode_png(width, height, rgba):
+    return (b'\x89PNG\r\n\x1a\n' + _ihdr(width, height) +
+            _chunk(b'IDAT', zlib.compress(_scanlines(width, height, rgba), 6)) +
+            _chunk(b'IEND', b''))
+
+
+def encode_apng(width, height, frames, delay_ms):
+    """frames are RGBA buffers of width x height; every frame shows for delay_ms."""
+    out = [b'\x89PNG\r\n\x1a\n', _ihdr(width, height),
+           _chunk(b'acTL', struct.pack('>II', len(frames), 0))]
+    sequence = 0
+    for i, rgba in enumerate(frames):
+        out.append(_chunk(b'fcTL', struct.pack('>IIIIIHHBB', sequence, width, height, 0, 0,
+                                                 delay_ms, 1000, 1, 0)))
+        sequence += 1
+        data = zlib.compress(_scanlines(width, height, rgba), 6)
+        if i == 0:
+            out.append(_chunk(b'IDAT', data))
+        else:
+            out.append(_chunk(b'fdAT', struct.pack('>I', sequence) + data))
+            sequence += 1
+    out.append(_chunk(b'IEND', b''))
+    return b''.join(out)
+
+
+def scale(width, height, rgba, zoom):
+    if zoom == 1:
+        return rgba
+    out = bytearray()
+    for y in range(height):
+        row = rgba[y * width * 4:(y + 1) * width * 4]
+        scaled = b''.join(bytes(row[x * 4:x * 4 + 4]) * zoom for x in range(width))
+        out += scaled * zoom
+    return out
+
+
+# === WORKER SIDE (runs in the process pool) ===
+
+_archives = {}
+
+
+def _read(archive_path, member):
+    zf = _archives.get(archive_path)
+    if zf is None:
+        zf = _archives[archive_path] = zipfile.ZipFile(archive_path, 'r')
+    return zf.read(member)
+
+
+def _load(archive_path, member, palette_ref):
+    data = _read(archive_path, member)
+    palette = zt_sprite.fallback_palette()
+    if palette_ref:
+        palette = zt_sprite.parse_palette(_read(*palette_ref))
+    return data, palette
+
+
+def _canvas(data, frames, palette):
+    """Decode frames onto one bottom-aligned canvas, like the viewer's exports."""
+    width = max(f['width'] for f in frames)
+    height = max(f['height'] for f in frames)
+    canvases = []
+    for f in frames:
+        pixels = zt_sprite.decode_frame(data, f['rle_pos'], f['width'], f['height'], palette)
+        if f['width'] == width and f['height'] == height:
+            canvases.append(pixels)
+            continue
+        canvas = bytearray(width * height * 4)
+        top = height - f['height']
+        for y in range(f['height']):
+            dst = ((top + y) * width) * 4
+            canvas[dst:dst + f['width'] * 4] = pixels[y * f['width'] * 4:(y + 1) * f['width'] * 4]
+        canvases.append(canvas)
+    return width, height, canvases
+
+
+def render_meta(archive_path, member):
+    """Sprite header; the server adds the palette it resolves from it."""
+    data = _read(archive_path, member)
+    frames = zt_sprite.find_frame_headers(data)
+    return json.dumps({
+        'member': member,
+        'bytes': len(data),
+        'palette': zt_sprite.palette_name(data),
+        'frames': [{k: f[k] for k in ('width', 'height', 'x_off', 'y_off', 'rle_size')} for f in frames],
+    }).encode('utf-8')
+
+
+def render_frame(archive_path, member, palette_ref, frame, zoom):
+    data, palette = _load(archive_path, member, palette_ref)
+    frames = zt_sprite.find_frame_headers(data)
+    if not 0 <= frame < len(frames):
+        raise LookupError(f"{member} has {len(frames)} frames")
+    f = frames[frame]
+    pixels = zt_sprite.decode_frame(data, f['rle_pos'], f['width'], f['height'], palette)
+    return encode_png(f['width'] * zoom, f['height'] * zoom, scale(f['width'], f['height'], pixels, zoom))
+
+
+def render_preview(archive_path, member, palette_ref, zoom, delay):
+    data, palette = _load(archive_path, member, palette_ref)
+    frames = zt_sprite.find_frame_headers(data)
+    if not frames:
+        raise LookupError(f"No valid frames found in {member}")
+    width, height, canvases = _canvas(data, frames, palette)
+    return encode_apng(width * zoom, height * zoom, [scale(width, height, c, zoom) for c in canvases], delay)
+
+
+# === SERVER SIDE ===
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ByteLRU:
+    """OrderedDict LRU bounded by the total size of the cached bodies."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.size = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, value):
+        if len(value[1]) > self.budget:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old[1])
+        self.entries[key] = value
+        self.size += len(value[1])
+        while self.size > self.budget:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted[1])
+
+
+class PreviewServer:
+    def __init__(self, root, pool, cache_bytes):
+        self.root = root
+        self.pool = pool
+        self.cache = ByteLRU(cache_bytes)
+        self.inflight = {}
+        self.archives = {}
+        self.palettes = {}
+        self.palette_tag = None
+        self.scan()
+
+    def scan(self):
+        """Index archives and palette locations; only the central directories are read."""
+        for folder, dirs, files in os.walk(self.root):
+            dirs.sort()
+            for name in sorted(files):
+                if not name.lower().endswith('.ztd'):
+                    continue
+                path = os.path.join(folder, name)
+                key = os.path.relpath(path, self.root).replace(os.sep, '/')
+                try:
+                    with zipfile.ZipFile(path, 'r') as zf:
+                        infos = zf.infolist()
+                except (OSError, zipfile.BadZipFile) as e:
+                    print(f"  Skipping {key}: {e}")
+                    continue
+                stat = os.stat(path)
+                members = {}
+                first_palette = None
+                for info in infos:
+                    members[info.filename] = info
+                    normalized = zt_sprite.normalize_name(info.filename)
+                    if normalized.endswith('.pal'):
+                        self.palettes.setdefault(normalized, (path, info.filename))
+                        if first_palette is None or info.filename < first_palette[1]:
+                            first_palette = (path, info.filename)
+                self.archives[key] = {
+                    'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+                    'members': members, 'first_palette': first_palette,
+                }
+        # Which palette a sprite gets depends on every archive holding palettes
+        stamps = sorted({(a['path'], a['size'], a['mtime']) for a in self.archives.values()
+                         if a['first_palette']})
+        self.palette_tag = hashlib.sha1(repr(stamps).encode()).hexdigest()
+
+    def archive(self, params):
+        key = params.get('archive', '')
+        if key not in self.archives:
+            raise HttpError(404, f"Unknown archive: {key}")
+        return self.archives[key]
+
+    def member(self, archive, params):
+        member = params.get('member', '')
+        if member not in archive['members']:
+            raise HttpError(404, f"Unknown member: {member}")
+        return member
+
+    def palette_for(self, archive, member, header_palette):
+        if header_palette and header_palette in self.palettes:
+            return self.palettes[header_palette]
+        # Same fallback as the viewer: first palette in the archive
+        return archive['first_palette']
+
+    def etag(self, archive, *parts):
+        digest = hashlib.sha1(repr((archive['path'], archive['size'], archive['mtime']) + parts).encode())
+        return '"' + digest.hexdigest()[:24] + '"'
+
+    def member_etag(self, archive, kind, member, *parts):
+        """ETag from what the scan already knows, so it costs no decoding."""
+        info = archive['members'][member]
+        return self.etag(archive, kind, member, info.CRC, info.file_size, self.palette_tag, *parts)
+
+    async def meta(self, archive, member):
+        """Parsed sprite header and the palette the viewer would pick for it."""
+        _, body = await self.render(self.etag(archive, 'header', member), render_meta, archive['path'], member)
+        meta = json.loads(body)
+        return meta, self.palette_for(archive, member, meta.get('palette'))
+
+    async def meta_body(self, archive, member):
+        meta, palette_ref = await self.meta(archive, member)
+        meta['palette_source'] = list(palette_ref) if palette_ref else None
+        return None, json.dumps(meta).encode('utf-8')
+
+    async def image_body(self, etag, archive, member, func, *args):
+        _, palette_ref = await self.meta(archive, member)
+        return await self.render(etag, func, archive['path'], member, palette_ref, *args)
+
+    async def render(self, key, func, *args):
+        """Run func on the pool once per key, however many requests ask for it."""
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        future = self.inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.pool, func, *args)
+            self.inflight[key] = future
+            try:
+                body = await future
+            finally:
+                del self.inflight[key]
+            self.cache.put(key, (key, body))
+            return (key, body)
+        return (key, await future)
+
+    async def handle(self, path, params):
+        """Returns (etag or None, content type, body or a coroutine producing (etag, body))."""
+        if path == '/archives':
+            body = [{'archive': key, 'size': a['size'], 'members': len(a['members'])}
+                    for key, a in sorted(self.archives.items())]
+            return None, 'application/json', json.dumps(body).encode('utf-8')
+
+        if path == '/stats':
+            body = {'cache_entries': len(self.cache.entries), 'cache_bytes': self.cache.size,
+                    'hits': self.cache.hits, 'misses': self.cache.misses, 'inflight': len(self.inflight)}
+            return None, 'application/json', json.dumps(body).encode('utf-8')
+
+        archive = self.archive(params)
+        if path == '/members':
+            etag = self.etag(archive, 'members')
+            body = [{'name': i.filename, 'size': i.file_size, 'compressed': i.compress_size,
+                     'sprite': zt_sprite.is_sprite_name(i.filename)}
+                    for i in archive['members'].values() if not i.is_dir()]
+            return etag, 'application/json', json.dumps(body).encode('utf-8')
+
+        member = self.member(archive, params)
+        try:
+            zoom = min(max(int(params.get('zoom', 1)), 1), MAX_ZOOM)
+            frame = int(params.get('frame', 0))
+            delay = min(max(int(params.get('delay', 100)), 10), 10000)
+        except ValueError:
+            raise HttpError(400, "zoom, frame and delay must be integers")
+
+        # The palette is only known once the member is read, so the bodies
+        # resolve it; the ETags come from the member and the palette index
+        if path == '/meta':
+            etag = self.member_etag(archive, 'meta', member)
+            return etag, 'application/json', self.meta_body(archive, member)
+        if path == '/frame.png':
+            etag = self.member_etag(archive, 'frame', member, frame, zoom)
+            return etag, 'image/png', self.image_body(etag, archive, member, render_frame, frame, zoom)
+        if path == '/preview.png':
+            etag = self.member_etag(archive, 'preview', member, zoom, delay)
+            return etag, 'image/apng', self.image_body(etag, archive, member, render_preview, zoom, delay)
+        raise HttpError(404, f"Unknown endpoint: {path}")
+
+    async def respond(self, method, target, headers):
+        url = urlsplit(target)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        etag, content_type, body = await self.handle(url.path, params)
+        # Revalidation is answered before any decoding happens
+        if etag and etag in [t.strip() for t in headers.get('if-none-match', '').split(',')]:
+            if not isinstance(body, bytes):
+                body.close()
+            return 304, {'ETag': etag}, b''
+        if not isinstance(body, bytes):
+            _, body = await body
+        extra = {'Content-Type': content_type}
+        if etag:
+            extra['ETag'] = etag
+            extra['Cache-Control'] = 'no-cache'
+        return 200, extra, body
+
+    async def connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(':')
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+
+                try:
+                    if method not in ('GET', 'HEAD'):
+                        raise HttpError(405, f"{method} not supported")
+                    status, extra, body = await self.respond(method, target, headers)
+                except HttpError as e:
+                    status, extra, body = e.status, {'Content-Type': 'text/plain'}, str(e).encode('utf-8')
+                except LookupError as e:
+                    status, extra, body = 404, {'Content-Type': 'text/plain'}, str(e).encode('utf-8')
+                except Exception as e:
+                    status, extra, body = 500, {'Content-Type': 'text/plain'}, f"{type(e).__name__}: {e}".encode('utf-8')
+
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                response = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+                            f"Content-Length: {len(body)}",
+                            "Access-Control-Allow-Origin: *",
+                            f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                response += [f"{k}: {v}" for k, v in extra.items()]
+                # HEAD gets the headers of the GET response, Content-Length included
+                writer.write(('\r\n'.join(response) + '\r\n\r\n').encode('latin-1') + (b'' if method == 'HEAD' else body))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+
+async def serve(args):
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        server = PreviewServer(args.root, pool, args.cache_mb * 1024 * 1024)
+        print(f"  Indexed {len(server.archives)} archives, {len(server.palettes)} palettes")
+        listener = await asyncio.start_server(server.connection, HOST, args.port, limit=MAX_HEADER_BYTES)
+        print(f"  Serving on http://{HOST}:{args.port}/archives")
+        async with listener:
+            await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve ZTD sprite previews on localhost")
+    parser.add_argument('root', help="folder searched recursively for .ztd files")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help="decoder processes")
+    parser.add_argument('--cache-mb', type=int, default=64, help="in-memory response cache size")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
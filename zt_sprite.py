@@ -0,0 +1,368 @@
+"""Zoo Tycoon 1 sprite format helpers.
+
+Shared by the sprite viewer, the decoder scan and the preview server so that
+every tool parses sprites the same way. Nothing in here needs Tk or PIL.
+"""
+
+import struct
+
+# Same header limits the engine uses in AniFile::loadAnimationData
+MAX_FRAME_SIZE = 10000000
+FRAME_HEADER_SIZE = 14
+
+
+def normalize_name(name):
+    """Lowercase + forward slashes, like normalizePath in ResourceManager.cpp"""
+    return name.replace('\\', '/').strip('/').lower()
+
+
+def is_sprite_name(name):
+    """Sprites are the members without an extension (see ZtdFile::getImageSurface)"""
+    if name.endswith('/'):
+        return False
+    base = name.rsplit('/', 1)[-1]
+    dot = base.rfind('.')
+    # Utils::getFileExtension only treats up to 3 trailing characters as an extension
+    return dot == -1 or dot < len(base) - 4
+
+
+def parse_palette(data):
+    palette = []
+    if len(data) >= 1028:
+        count = struct.unpack_from('<I', data, 0)[0]
+        for i in range(min(count, 256)):
+            offset = 4 + i * 4
+            if offset + 4 <= len(data):
+                r, g, b, a = data[offset:offset+4]
+                palette.append((r, g, b))
+    elif len(data) >= 768:
+        for i in range(256):
+            offset = i * 3
+            if offset + 3 <= len(data):
+                palette.append(tuple(data[offset:offset+3]))
+    while len(palette) < 256:
+        palette.append((0, 0, 0))
+    return palette
+
+
+def fallback_palette():
+    palette = []
+    for i in range(256):
+        if i == 0: palette.append((255, 0, 255))
+        elif i < 64: palette.append((40+i, 30+i//2, 20))
+        elif i < 128: palette.append((80+(i-64), 50+(i-64)//2, 30))
+        elif i < 192: palette.append((140+(i-128), 100+(i-128)//2, 60))
+        else: palette.append((min(255, 200+(i-192)), min(255, 150+(i-192)), min(255, 100)))
+    return palette
+
+
+def palette_name(data):
+    """Return the palette path stored in the sprite header, or None."""
+    if len(data) < 8:
+        return None
+    str_len = struct.unpack_from('<I', data, 4)[0]
+    if str_len == 0 or 8 + str_len > len(data):
+        return None
+    name = data[8:8 + str_len].split(b'\0', 1)[0]
+    return normalize_name(name.decode('latin-1'))
+
+
+def parse_main_header(data):
+    """Parse the main file header. Returns (frame_header_start, base_width) or None."""
+    if len(data) < 20:
+        return None
+
+    try:
+        # @0: height_header (u32)
+        # @4: str_len (u32)
+        # @8: palette string (str_len bytes)
+        # @8+str_len: width (u32)
+        # @8+str_len+4: first frame header starts
+
+        str_len = struct.unpack_from('<I', data, 4)[0]
+
+        if str_len == 0 or str_len > 200:
+            return None
+
+        width_pos = 8 + str_len
+        if width_pos + 4 > len(data):
+            return None
+
+        base_width = struct.unpack_from('<I', data, width_pos)[0]
+
+        if base_width == 0 or base_width > 500:
+            return None
+
+        frame_header_start = width_pos + 4
+
+        return (frame_header_start, base_width)
+    except struct.error:
+        return None
+
+
+def find_frame_headers(data):
+    """Find all animation frame headers in sprite data (viewer heuristic)"""
+
+    # First, parse main header to find where frames start
+    header_info = parse_main_header(data)
+    if not header_info:
+        return []
+
+    frame_start, base_width = header_info
+
+    frames = []
+    pos = frame_start
+
+    while pos + 14 < len(data) and len(frames) < 100:
+        # Frame header: [rle_size:u32][height:u16][width:u16][x_off:u16][y_off:u16][flags:u16]
+        rle_size = struct.unpack_from('<I', data, pos)[0]
+        h = struct.unpack_from('<H', data, pos + 4)[0]
+        w = struct.unpack_from('<H', data, pos + 6)[0]
+        x_off = struct.unpack_from('<H', data, pos + 8)[0]
+        y_off = struct.unpack_from('<H', data, pos + 10)[0]
+
+        # Validate header - be more lenient
+        if 50 < rle_size < 10000 and 5 < h < 300 and 5 < w < 300:
+            frames.append({
+                'header_pos': pos,
+                'rle_pos': pos + 14,
+                'rle_size': rle_size,
+                'width': w,
+                'height': h,
+                'x_off': x_off,
+                'y_off': y_off
+            })
+
+            # Find next header by searching after this frame's data
+            next_search_start = pos + 14 + rle_size - 30
+            if next_search_start < pos + 14:
+                next_search_start = pos + 14
+
+            found = False
+            for search in range(next_search_start, min(next_search_start + 60, len(data) - 14)):
+                rs = struct.unpack_from('<I', data, search)[0]
+                hh = struct.unpack_from('<H', data, search + 4)[0]
+                ww = struct.unpack_from('<H', data, search + 6)[0]
+                if 50 < rs < 10000 and 5 < hh < 300 and 5 < ww < 300:
+                    # Additional validation: dimensions should be similar to first frame
+                    if abs(ww - frames[0]['width']) < 20 and abs(hh - frames[0]['height']) < 20:
+                        pos = search
+                        found = True
+                        break
+            if not found:
+                break
+        else:
+            break
+
+    return frames
+
+
+def parse_header(data):
+    """Header as AniFile::loadAnimationData reads it: frame time, palette name
+    (length prefixed), frame count. Returns (frame_time, frame_count,
+    frame_header_start) or None when the data is too short."""
+    if len(data) < 8:
+        return None
+    frame_time, name_length = struct.unpack_from('<II', data, 0)
+    if 8 + name_length + 4 > len(data):
+        return None
+    frame_count = struct.unpack_from('<I', data, 8 + name_length)[0]
+    return frame_time, frame_count, 12 + name_length
+
+
+def read_frames(data):
+    """Walk the frame table the way the engine does (walkFrames in AniFile.cpp).
+
+    Each frame's data is walked line by line rather than skipped by its stated
+    size: a line is a command count, then per command a skip, a pixel count and
+    the pixels. A frame ends after height lines; the walk stops at the first
+    line that runs past the end of the data or a frame with an impossible
+    size. When there is exactly one frame more than the header's frame count,
+    the last one is the background. Offsets are signed, as in
+    AnimationFrameData.
+    """
+    header = parse_header(data)
+    if not header:
+        return []
+
+    _, frame_count, pos = header
+    size = len(data)
+    frames = []
+    while pos + FRAME_HEADER_SIZE <= size:
+        rle_size, h, w, x_off, y_off, flags = struct.unpack_from('<IHHhhH', data, pos)
+        if rle_size == 0 or rle_size > MAX_FRAME_SIZE:
+            break
+        pos += FRAME_HEADER_SIZE
+        rle_pos = pos
+        line_count = 0
+        while line_count < h and pos < size:
+            line_end = pos + 1
+            complete = True
+            for _ in range(data[pos]):
+                complete = line_end + 2 <= size and line_end + 2 + data[line_end + 1] <= size
+                if not complete:
+                    break
+                line_end += 2 + data[line_end + 1]
+            if not complete:
+                pos = size
+                break
+            pos = line_end
+            line_count += 1
+        frames.append({
+            'header_pos': rle_pos - FRAME_HEADER_SIZE,
+            'rle_pos': rle_pos,
+            'rle_size': rle_size,
+            'line_count': line_count,
+            'width': w,
+            'height': h,
+            'x_off': x_off,
+            'y_off': y_off,
+            'background': False,
+        })
+    if frames and len(frames) == frame_count + 1:
+        frames[-1]['background'] = True
+    return frames
+
+
+def check_frame(data, frame):
+    """Walk the lines read_frames found for a frame without drawing them.
+
+    Returns (overruns, truncated) where overruns counts pixels that land past
+    the frame width and truncated is True when the data ran out before all
+    of the frame's lines.
+    """
+    ptr = frame['rle_pos']
+    width = frame['width']
+    overruns = 0
+    for _ in range(frame['line_count']):
+        cmd_count = data[ptr]
+        ptr += 1
+        x = 0
+        for _ in range(cmd_count):
+            x += data[ptr]
+            run = data[ptr + 1]
+            ptr += 2 + run
+            if x + run > width:
+                overruns += x + run - max(x, width)
+            x += run
+    return overruns, frame['line_count'] < frame['height']
+
+
+def decode_frame(data, start_ptr, width, height, palette):
+    """Decode one frame to a width*height*4 RGBA bytearray."""
+    pixels = bytearray(width * height * 4)
+    colors = [bytes((r, g, b, 255)) for r, g, b in palette[:256]]
+    colors[0] = b'\0\0\0\0'
+    ptr = start_ptr
+    size = len(data)
+
+    for y in range(height):
+        if ptr >= size: break
+        cmd_count = data[ptr]
+        ptr += 1
+        if cmd_count >= 0xF0: continue
+
+        x = 0
+        row = y * width
+        for _ in range(cmd_count):
+            if ptr + 1 >= size: break
+            skip, run = data[ptr], data[ptr + 1]
+            ptr += 2
+            x += skip
+            for idx in data[ptr:ptr + run]:
+                if x < width:
+                    o = (row + x) * 4
+                    pixels[o:o + 4] = colors[idx]
+                x += 1
+            ptr += run
+    return pixels
+
+
+def parse_ini(text):
+    """Minimal IniReader: lowercase sections/keys, repeated keys joined by ';'"""
+    content = {}
+    section = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line[0] in ';#':
+            continue
+        if line[0] == '[':
+            end = line.find(']')
+            if end != -1:
+                section = line[1:end].lower()
+            continue
+        key, sep, value = line.partition('=')
+        if not sep or section is None:
+            continue
+        key = key.strip().lower()
+        value = value.strip()
+        entries = content.setdefault(section, {})
+        entries[key] = entries[key] + ';' + value if key in entries else value
+    return content
+
+
+def ani_sprites(text):
+    """Resolve an .ani file to (width, height, [sprite member names]) like AniFile::getAnimation."""
+    animation = parse_ini(text).get('animation', {})
+
+    def get_int(key):
+        try:
+            return int(animation.get(key, '-1').split(';')[0])
+        except ValueError:
+            return -1
+
+    width = get_int('x1') - get_int('x0')
+    height = get_int('y1') - get_int('y0')
+    directory = '/'.join(d for d in (animation.get('dir%d' % i, '') for i in range(4)) if d)
+    directions = [d for d in animation.get('animation', '').split(';') if d]
+    return width, height, [normalize_name(directory + '/' + d) for d in directions]
+
+
+def _half(value):
+    """value / 2 with C++ integer division, which truncates toward zero."""
+    return int(value / 2)
+
+
+def fit_offset(frames, width, height):
+    """Port of calculateOffset in Animation.cpp: where each frame's anchor goes
+    in the width x height surface, as (x, y). With a background frame the
+    background is centred, otherwise the box covering every frame is."""
+    background = next((f for f in frames if f.get('background')), None)
+    if background:
+        return (_half(width) - _half(background['width']) + background['x_off'],
+                _half(height) - _half(background['height']) + background['y_off'])
+    if not frames:
+        return 0, 0
+    # Frame edges relative to the anchor
+    left = min(-f['x_off'] for f in frames)
+    top = min(-f['y_off'] for f in frames)
+    right = max(f['width'] - f['x_off'] for f in frames)
+    bottom = max(f['height'] - f['y_off'] for f in frames)
+    return _half(width - (right - left)) - left, _half(height - (bottom - top)) - top
+
+
+def canvas_violations(data, frames, width, height):
+    """Count pixels Animation::loadSurfaces clips off its width x height
+    surface (decodeFrame draws only the part of each span that is inside)."""
+    if width <= 0 or height <= 0:
+        return sum(f['width'] * f['height'] for f in frames)
+    offset_x, offset_y = fit_offset(frames, width, height)
+    violations = 0
+    for frame in frames:
+        ptr = frame['rle_pos']
+        top = offset_y - frame['y_off']
+        for y in range(frame['line_count']):
+            cmd_count = data[ptr]
+            ptr += 1
+            x = offset_x - frame['x_off']
+            row_outside = not 0 <= top + y < height
+            for _ in range(cmd_count):
+                x += data[ptr]
+                run = data[ptr + 1]
+                ptr += 2 + run
+                if row_outside:
+                    violations += run
+                else:
+                    violations += run - max(0, min(x + run, width) - max(x, 0))
+                x += run
+    return violations
@@ -5,6 +5,8 @@ from tkinter import filedialog, messagebox, Scrollbar, ttk
 from PIL import Image, ImageTk
 import os
 
+import zt_sprite
+
 class ZTSpriteViewer:
     def __init__(self, root):
         self.root = root
@@ -172,22 +174,7 @@ class ZTSpriteViewer:
             messagebox.showerror("Error", str(e))
     
     def parse_palette(self, data):
-        palette = []
-        if len(data) >= 1028:
-            count = struct.unpack_from('<I', data, 0)[0]
-            for i in range(min(count, 256)):
-                offset = 4 + i * 4
-                if offset + 4 <= len(data):
-                    r, g, b, a = data[offset:offset+4]
-                    palette.append((r, g, b))
-        elif len(data) >= 768:
-            for i in range(256):
-                offset = i * 3
-                if offset + 3 <= len(data):
-                    palette.append(tuple(data[offset:offset+3]))
-        while len(palette) < 256:
-            palette.append((0, 0, 0))
-        return palette
+        return zt_sprite.parse_palette(data)
     
     def auto_load_palette(self):
         pal_files = [f for f in self.file_list if f.lower().endswith('.pal')]
@@ -202,13 +189,7 @@ class ZTSpriteViewer:
         self.create_fallback_palette()
     
     def create_fallback_palette(self):
-        self.palette = []
-        for i in range(256):
-            if i == 0: self.palette.append((255, 0, 255))
-            elif i < 64: self.palette.append((40+i, 30+i//2, 20))
-            elif i < 128: self.palette.append((80+(i-64), 50+(i-64)//2, 30))
-            elif i < 192: self.palette.append((140+(i-128), 100+(i-128)//2, 60))
-            else: self.palette.append((min(255, 200+(i-192)), min(255, 150+(i-192)), min(255, 100)))
+        self.palette = zt_sprite.fallback_palette()
         self.palette_name = "Fallback"
         self.lbl_palette.config(text="Palette: Fallback", fg="#ffc107")
     
@@ -235,119 +216,16 @@ class ZTSpriteViewer:
     # === SPRITE DECODING ===
     
     def decode_frame(self, data, start_ptr, width, height):
-        img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        pixels = img.load()
-        ptr = start_ptr
-        
-        for y in range(height):
-            if ptr >= len(data): break
-            cmd_count = data[ptr]
-            ptr += 1
-            if cmd_count >= 0xF0: continue
-            
-            x = 0
-            for _ in range(cmd_count):
-                if ptr + 1 >= len(data): break
-                skip, run = data[ptr], data[ptr + 1]
-                ptr += 2
-                x += skip
-                for _ in range(run):
-                    if ptr >= len(data): break
-                    idx = data[ptr]
-                    if x < width and idx < 256:
-                        r, g, b = self.palette[idx]
-                        pixels[x, y] = (0, 0, 0, 0) if idx == 0 else (r, g, b, 255)
-                    x += 1
-                    ptr += 1
-        return img
+        pixels = zt_sprite.decode_frame(data, start_ptr, width, height, self.palette)
+        return Image.frombytes('RGBA', (width, height), bytes(pixels))
     
     def parse_main_header(self, data):
         """Parse the main file header. Returns (frame_header_start, base_width) or None."""
-        if len(data) < 20:
-            return None
-        
-        try:
-            # @0: height_header (u32)
-            # @4: str_len (u32)
-            # @8: palette string (str_len bytes)
-            # @8+str_len: width (u32)
-            # @8+str_len+4: first frame header starts
-            
-            str_len = struct.unpack_from('<I', data, 4)[0]
-            
-            if str_len == 0 or str_len > 200:
-                return None
-            
-            width_pos = 8 + str_len
-            if width_pos + 4 > len(data):
-                return None
-            
-            base_width = struct.unpack_from('<I', data, width_pos)[0]
-            
-            if base_width == 0 or base_width > 500:
-                return None
-            
-            frame_header_start = width_pos + 4
-            
-            return (frame_header_start, base_width)
-        except:
-            return None
+        return zt_sprite.parse_main_header(data)
     
     def find_frame_headers(self, data):
         """Find all animation frame headers in sprite data"""
-        
-        # First, parse main header to find where frames start
-        header_info = self.parse_main_header(data)
-        if not header_info:
-            return []
-        
-        frame_start, base_width = header_info
-        
-        frames = []
-        pos = frame_start
-        
-        while pos + 14 < len(data) and len(frames) < 100:
-            # Frame header: [rle_size:u32][height:u16][width:u16][x_off:u16][y_off:u16][flags:u16]
-            rle_size = struct.unpack_from('<I', data, pos)[0]
-            h = struct.unpack_from('<H', data, pos + 4)[0]
-            w = struct.unpack_from('<H', data, pos + 6)[0]
-            x_off = struct.unpack_from('<H', data, pos + 8)[0]
-            y_off = struct.unpack_from('<H', data, pos + 10)[0]
-            
-            # Validate header - be more lenient
-            if 50 < rle_size < 10000 and 5 < h < 300 and 5 < w < 300:
-                frames.append({
-                    'header_pos': pos,
-                    'rle_pos': pos + 14,
-                    'rle_size': rle_size,
-                    'width': w,
-                    'height': h,
-                    'x_off': x_off,
-                    'y_off': y_off
-                })
-                
-                # Find next header by searching after this frame's data
-                next_search_start = pos + 14 + rle_size - 30
-                if next_search_start < pos + 14:
-                    next_search_start = pos + 14
-                
-                found = False
-                for search in range(next_search_start, min(next_search_start + 60, len(data) - 14)):
-                    rs = struct.unpack_from('<I', data, search)[0]
-                    hh = struct.unpack_from('<H', data, search + 4)[0]
-                    ww = struct.unpack_from('<H', data, search + 6)[0]
-                    if 50 < rs < 10000 and 5 < hh < 300 and 5 < ww < 300:
-                        # Additional validation: dimensions should be similar to first frame
-                        if abs(ww - frames[0]['width']) < 20 and abs(hh - frames[0]['height']) < 20:
-                            pos = search
-                            found = True
-                            break
-                if not found:
-                    break
-            else:
-                break
-        
-        return frames
+        return zt_sprite.find_frame_headers(data)
     
     def load_sprite(self, filename):
         """Load sprite file and decode all animation frames"""